@@ -10,6 +10,7 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 from anthropic import Anthropic
 from supabase import create_client
+from llm_metrics import create_message
 
 load_dotenv()
 
@@ -70,7 +71,9 @@ Return your response as JSON with this structure:
 
 Return ONLY the JSON, no markdown formatting."""
 
-        response = anthropic.messages.create(
+        response = create_message(
+            anthropic,
+            task="concept.analyze_random",
             model="claude-sonnet-4-20250514",
             max_tokens=4096,
             messages=[{"role": "user", "content": prompt}]
@@ -3,12 +3,25 @@
 Flask API server for LyricBox custom concept generation.
 """
 
-from flask import Flask, request, jsonify, send_file, Response
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 from concept_generator import generate_custom_concept
+from llm_metrics import create_message, metrics as llm_metrics
+from model_router import model_router, string_list, parse_json_array, OutputValidationError
+from concurrency_gateway import anthropic_gateway
+from corpus_cache import song_corpus, invalidation_allowed, INVALIDATE_TOKEN_HEADER
+from session_store import concept_sessions, melody_sessions
+from concept_prefetch import concept_prefetcher
+from parallel_fetch import fetch_parallel
+from progression_index import progression_index
+from melody_cache import melody_search_cache
+from mix_index import mix_index
 import traceback
 import io
 import re
+import json
+import threading
+from concurrent.futures import Future
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -39,6 +52,93 @@ def count_syllables_server(text):
     word_count = len([w for w in words if w])
     return max(syllable_count, word_count)
 
+
+def session_rows(session, song_ids=None):
+    """
+    song_analysis rows for a concept session, in the order of song_ids
+    (all ranked candidates when song_ids is empty). Songs the user added by
+    hand after matching come from the corpus cache.
+    """
+    rows = session.get('rows', [])
+    if not song_ids:
+        return rows
+
+    by_id = {row['songs']['id']: row for row in rows}
+    missing = [song_id for song_id in song_ids if song_id not in by_id]
+    if missing:
+        by_id.update((row['songs']['id'], row) for row in song_corpus.rows_for_song_ids(missing))
+    return [by_id[song_id] for song_id in song_ids if song_id in by_id]
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key runs the
+    function, callers arriving while it runs wait for and share its result
+    (or exception). Nothing is cached once the call finishes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}    # key -> Future of the in-flight call
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'shared': 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._stats['calls'] += 1
+            else:
+                self._stats['shared'] += 1
+
+        if not leader:
+            print(f"🔗 Sharing in-flight {self.name} call")
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._calls), **self._stats}
+
+
+def flight_key(*parts):
+    """Normalized key for request parameters (case, whitespace and dict order insensitive)."""
+    def normalize(value):
+        if isinstance(value, str):
+            return ' '.join(value.lower().split())
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items() if v not in (None, [], '')}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+    return json.dumps(normalize(list(parts)), sort_keys=True, default=str)
+
+
+# Shared budget (seconds) for the reads generate-next-line makes before prompting
+NEXT_LINE_FETCH_TIMEOUT = 8.0
+
+# Melody search results; Claude is only asked when our chord data has fewer matches
+MELODY_RESULTS = 10
+
+# One group per kind of expensive call
+concept_match_flights = SingleFlight('concept match')
+concept_generate_flights = SingleFlight('concept generation')
+melody_search_flights = SingleFlight('melody search')
+rhyme_lookup_flights = SingleFlight('rhyme lookup')
+
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
 
@@ -52,8 +152,13 @@ def find_matching_songs():
     {
         "user_idea": "string",
         "num_songs": 10,
-        "filters": {...}
+        "filters": {...},
+        "session_id": "..." (optional, reuses themes when the idea is unchanged)
     }
+    
+    Returns the matches plus a session_id; generate-custom-concept,
+    generate-more-titles and generate-next-line accept it to reuse the
+    extracted themes and candidates instead of recomputing them.
     """
     print("=" * 60, flush=True)
     print("FIND MATCHING SONGS ENDPOINT CALLED - NEW VERSION!", flush=True)
@@ -73,16 +178,48 @@ def find_matching_songs():
         
         generator = ConceptGenerator()
         
-        # Extract themes
-        print("Extracting themes...", flush=True)
-        themes = generator.extract_themes(user_idea)
-        print(f"Extracted themes: {themes}", flush=True)
+        session_id = data.get('session_id')
+        session = concept_sessions.get(session_id)
+        prefetched = None
+        if session and session.get('user_idea') == user_idea:
+            themes = session['themes']
+            print(f"Reusing session themes: {themes}", flush=True)
+        else:
+            def get_themes():
+                prefetched = concept_prefetcher.get(user_idea)
+                if prefetched:
+                    print(f"Using prefetched themes: {prefetched['themes']}", flush=True)
+                    return prefetched['themes'], prefetched
+                # Extract themes
+                print("Extracting themes...", flush=True)
+                themes = generator.extract_themes(user_idea)
+                print(f"Extracted themes: {themes}", flush=True)
+                return themes, None
+            
+            # Identical ideas submitted at the same time share one extraction
+            themes, prefetched = concept_match_flights.do(flight_key(user_idea), get_themes)
         
-        # Find matching songs
-        print(f"Finding matching songs...", flush=True)
-        matching_songs = generator.find_matching_songs(themes, num_songs, filters)
+        # Find matching songs (already scored if the prefetch used the same filters)
+        if prefetched and prefetched['num_songs'] == num_songs and prefetched['filters'] == filters:
+            matching_songs = prefetched['candidates']
+        else:
+            print(f"Finding matching songs...", flush=True)
+            matching_songs = generator.find_matching_songs(themes, num_songs, filters)
         print(f"Got {len(matching_songs)} matching songs back", flush=True)
         
+        # Keep themes and candidates server-side for the follow-up calls
+        session_data = {
+            'user_idea': user_idea,
+            'num_songs': num_songs,
+            'filters': filters,
+            'themes': themes,
+            'rows': [item['song'] for item in matching_songs],
+            'concept': None,
+            'reference_songs': None
+        }
+        if not concept_sessions.update(session_id, **session_data):
+            session_id = concept_sessions.create(session_data)
+        
         # Format response
         songs_data = []
         for item in matching_songs:
@@ -108,6 +245,7 @@ def find_matching_songs():
         print(f"Sample song data: {songs_data[0] if songs_data else 'none'}")
         
         return jsonify({
+            'session_id': session_id,
             'extracted_themes': themes,
             'songs': songs_data
         })
@@ -134,7 +272,8 @@ def generate_concept():
             "genres": ["pop"],
             "artists": ["Taylor Swift"]
         },
-        "manual_song_ids": ["id1", "id2"]
+        "manual_song_ids": ["id1", "id2"],
+        "session_id": "..." (optional, from find-matching-songs)
     }
     """
     try:
@@ -148,14 +287,57 @@ def generate_concept():
         filters = data.get('filters', {})
         manual_song_ids = data.get('manual_song_ids')
         
-        # Generate concept
-        concept = generate_custom_concept(
-            user_idea=user_idea,
-            num_songs=num_songs,
-            filters=filters,
-            manual_song_ids=manual_song_ids
+        # A session for the same idea already has themes and candidates
+        session_id = data.get('session_id')
+        session = concept_sessions.get(session_id)
+        if session and session.get('user_idea') != user_idea:
+            session = None
+        
+        themes, example_songs = None, None
+        if session:
+            themes = session['themes']
+            if manual_song_ids:
+                example_songs = session_rows(session, manual_song_ids)
+            elif session.get('num_songs') == num_songs and session.get('filters') == filters:
+                example_songs = session_rows(session)
+            print(f"Using concept session {session_id} "
+                  f"({'themes + songs' if example_songs is not None else 'themes'})")
+        else:
+            prefetched = concept_prefetcher.get(user_idea)
+            if prefetched:
+                themes = prefetched['themes']
+                if not manual_song_ids and prefetched['num_songs'] == num_songs and prefetched['filters'] == filters:
+                    example_songs = [item['song'] for item in prefetched['candidates']]
+                print("Using prefetched concept themes")
+        
+        # Generate concept (identical concurrent requests share one generation)
+        shared_concept = concept_generate_flights.do(
+            flight_key(user_idea, num_songs, filters, manual_song_ids),
+            lambda: generate_custom_concept(
+                user_idea=user_idea,
+                num_songs=num_songs,
+                filters=filters,
+                manual_song_ids=manual_song_ids,
+                themes=themes,
+                example_songs=example_songs
+            )
         )
         
+        # Remember the concept for generate-more-titles (copy: the result may be shared)
+        concept = dict(shared_concept)
+        meta = concept['_meta'] = dict(shared_concept['_meta'])
+        session_fields = {'concept': concept, 'reference_songs': meta['example_songs']}
+        if not (session and concept_sessions.update(session_id, **session_fields)):
+            session_id = concept_sessions.create({
+                'user_idea': user_idea,
+                'num_songs': num_songs,
+                'filters': filters,
+                'themes': meta['extracted_themes'],
+                'rows': [],
+                **session_fields
+            })
+        meta['session_id'] = session_id
+        
         return jsonify(concept)
     
     except Exception as e:
@@ -164,6 +346,43 @@ def generate_concept():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/concept/prefetch', methods=['POST'])
+def prefetch_concept():
+    """
+    Start theme extraction and song matching for a concept idea in the
+    background (called on debounce while the user types). Repeated calls for
+    the same idea share one job; find-matching-songs and
+    generate-custom-concept pick up the result.
+    
+    Expected JSON body:
+    {
+        "user_idea": "string",
+        "num_songs": 10,
+        "filters": {...}
+    }
+    
+    Returns:
+        {"status": "started" | "pending" | "ready" | "skipped"}
+    """
+    try:
+        data = request.json
+        user_idea = data.get('user_idea')
+        if not user_idea:
+            return jsonify({'error': 'user_idea is required'}), 400
+        
+        status = concept_prefetcher.prefetch(
+            user_idea,
+            num_songs=data.get('num_songs', 10),
+            filters=data.get('filters', {})
+        )
+        return jsonify({'status': status})
+    
+    except Exception as e:
+        print(f"Error prefetching concept: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/export-concept', methods=['POST'])
 def export_concept():
     """
@@ -314,7 +533,8 @@ def generate_more_titles():
             "tone": "..."
         },
         "reference_songs": ["Song - Artist", ...],
-        "existing_titles": ["Title 1", ...]
+        "existing_titles": ["Title 1", ...],
+        "session_id": "..." (optional, fills in concept and reference_songs)
     }
     """
     try:
@@ -324,8 +544,9 @@ def generate_more_titles():
         anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
         
         data = request.json
-        concept = data.get('concept', {})
-        reference_songs = data.get('reference_songs', [])
+        session = concept_sessions.get(data.get('session_id')) or {}
+        concept = data.get('concept') or session.get('concept') or {}
+        reference_songs = data.get('reference_songs') or session.get('reference_songs') or []
         existing_titles = data.get('existing_titles', [])
         
         # Build context from reference songs
@@ -356,9 +577,26 @@ Generate 5 NEW alternative titles that:
 Return ONLY a JSON array of 5 title strings, no other text.
 Example: ["Title One", "Title Two", "Title Three", "Title Four", "Title Five"]"""
 
-        # Call Claude
-        response = anthropic_client.messages.create(
-            model="claude-sonnet-4-5-20250929",
+        # About five new titles; repeats of existing ones are dropped
+        existing_lower = {title.strip().lower() for title in existing_titles}
+        
+        titles_list = string_list(min_items=3, max_items=10)
+        
+        def validate_titles(text):
+            titles = [t for t in titles_list(text) if t.strip().lower() not in existing_lower]
+            if len(titles) < 3:
+                raise OutputValidationError(f"only {len(titles)} new titles")
+            return titles
+        
+        def any_new_titles(text):
+            return [t for t in titles_list.lenient(text) if t.strip().lower() not in existing_lower]
+        
+        # Call Claude (fast model first, escalates on invalid output)
+        new_titles = model_router.create(
+            anthropic_client,
+            task="titles.generate_more",
+            validate=validate_titles,
+            fallback=any_new_titles,
             max_tokens=500,
             messages=[{
                 "role": "user",
@@ -366,25 +604,6 @@ Example: ["Title One", "Title Two", "Title Three", "Title Four", "Title Five"]""
             }]
         )
         
-        # Parse response
-        titles_json = response.content[0].text.strip()
-        
-        # Remove markdown code blocks if present
-        if titles_json.startswith('```'):
-            titles_json = titles_json.split('```')[1]
-            if titles_json.startswith('json'):
-                titles_json = titles_json[4:]
-            titles_json = titles_json.strip()
-        
-        # Find JSON array in response
-        if '[' in titles_json:
-            start = titles_json.index('[')
-            end = titles_json.rindex(']') + 1
-            titles_json = titles_json[start:end]
-        
-        import json
-        new_titles = json.loads(titles_json)
-        
         print(f"Generated {len(new_titles)} new titles")
         
         return jsonify({'titles': new_titles})
@@ -408,7 +627,8 @@ def generate_next_line():
         "rhyme_target": "you",
         "rhyme_position": "end",
         "rhyme_type": "perfect" (optional),
-        "reference_song_ids": ["id1", "id2", ...]
+        "reference_song_ids": ["id1", "id2", ...],
+        "session_id": "..." (optional, from find-matching-songs)
     }
     """
     try:
@@ -443,36 +663,47 @@ def generate_next_line():
         if words_to_avoid:
             print(f"Words to avoid: {words_to_avoid}")
         
-        # Get rhyme options from database
-        rhyme_options = []
-        if rhyme_target:
-            query = supabase.table('rhyme_pairs').select('rhymes_with, rhyme_type, songs(title, artist)')
-            query = query.ilike('word', rhyme_target)
-            
-            if rhyme_type and rhyme_type != 'any':
-                query = query.eq('rhyme_type', rhyme_type)
+        # Rhyme options and reference songs are independent reads - fetch them together
+        def lookup_rhymes():
+            if not rhyme_target:
+                return []
             
-            result = query.limit(50).execute()
+            def run_query():
+                query = supabase.table('rhyme_pairs').select('rhymes_with, rhyme_type, songs(title, artist)')
+                query = query.ilike('word', rhyme_target)
+                
+                if rhyme_type and rhyme_type != 'any':
+                    query = query.eq('rhyme_type', rhyme_type)
+                
+                return query.limit(50).execute()
             
-            if result.data:
-                rhyme_words = set()
-                for pair in result.data:
-                    rhyme_word = pair['rhymes_with']
-                    # Don't suggest the same word as the rhyme target
-                    if rhyme_word.lower() != rhyme_target.lower():
-                        rhyme_words.add(rhyme_word)
-                rhyme_options = list(rhyme_words)[:20]  # Top 20 rhyme options
-        
-        print(f"Found {len(rhyme_options)} rhyme options")
-        
-        # Get reference songs
-        reference_songs = []
-        if reference_song_ids:
-            result = supabase.table('song_analysis').select(
-                'songs(title, artist), themes, thematic_vocabulary'
-            ).in_('song_id', reference_song_ids).execute()
+            result = rhyme_lookup_flights.do(flight_key(rhyme_target, rhyme_type), run_query)
             
-            reference_songs = result.data if result.data else []
+            rhyme_words = set()
+            for pair in result.data or []:
+                rhyme_word = pair['rhymes_with']
+                # Don't suggest the same word as the rhyme target
+                if rhyme_word.lower() != rhyme_target.lower():
+                    rhyme_words.add(rhyme_word)
+            return list(rhyme_words)[:20]  # Top 20 rhyme options
+        
+        def lookup_reference_songs():
+            if not reference_song_ids:
+                return []
+            session = concept_sessions.get(data.get('session_id'))
+            if session:
+                return session_rows(session, reference_song_ids)
+            return song_corpus.rows_for_song_ids(reference_song_ids)
+        
+        fetched = fetch_parallel(
+            {'rhyme_options': lookup_rhymes, 'reference_songs': lookup_reference_songs},
+            timeout=NEXT_LINE_FETCH_TIMEOUT,
+            defaults={'rhyme_options': [], 'reference_songs': []}
+        )
+        rhyme_options = fetched['rhyme_options']
+        reference_songs = fetched['reference_songs']
+        
+        print(f"Found {len(rhyme_options)} rhyme options, {len(reference_songs)} reference songs")
         
         # Build reference songs context
         songs_context = ""
@@ -578,7 +809,9 @@ Return ONLY a JSON array of exactly 20 line strings.
 Example: ["Line one here", "Line two here", "Line three here", ...]"""
 
         # Call Claude
-        response = anthropic_client.messages.create(
+        response = create_message(
+            anthropic_client,
+            task="lines.next_line",
             model="claude-sonnet-4-5-20250929",
             max_tokens=2000,
             messages=[{
@@ -757,7 +990,9 @@ Return ONLY a JSON array of exactly 20 variation strings.
 Example: ["Variation one", "Variation two", ...]"""
 
         # Call Claude
-        response = anthropic_client.messages.create(
+        response = create_message(
+            anthropic_client,
+            task="lines.more_like_this",
             model="claude-sonnet-4-5-20250929",
             max_tokens=2000,
             messages=[{
@@ -871,7 +1106,9 @@ Generate 10 new lines that:
 Return ONLY a JSON array of 10 line strings, no other text.
 Example: ["Line one", "Line two", ...]"""
 
-        response = anthropic_client.messages.create(
+        response = create_message(
+            anthropic_client,
+            task="figurative.variations",
             model="claude-sonnet-4-5-20250929",
             max_tokens=1000,
             messages=[{
@@ -972,8 +1209,40 @@ Example format:
 
 Return ONLY the JSON array, no other text."""
 
-        response = anthropic_client.messages.create(
-            model="claude-sonnet-4-5-20250929",
+        # Matches must quote the given lines and carry a 1-10 score; a reply
+        # where most lines were invented is rejected, stray ones are dropped
+        known_lines = {item['line'].strip().strip('"').lower() for item in lines}
+        
+        def validate_matches(text):
+            matches = []
+            items = parse_json_array(text)
+            for match in items:
+                if not isinstance(match, dict) or not isinstance(match.get('line'), str):
+                    raise OutputValidationError("match without a line")
+                relevance = match.get('relevance')
+                if isinstance(relevance, bool) or not isinstance(relevance, (int, float)) or not 1 <= relevance <= 10:
+                    raise OutputValidationError(f"bad relevance: {relevance!r}")
+                if match['line'].strip().strip('"').lower() in known_lines:
+                    matches.append(match)
+            if len(matches) * 2 < len(items):
+                raise OutputValidationError(f"{len(items) - len(matches)} of {len(items)} lines not in input")
+            return matches
+        
+        def usable_matches(text):
+            # Best effort: keep every well-formed match of a given line
+            return [
+                match for match in parse_json_array(text)
+                if isinstance(match, dict) and isinstance(match.get('line'), str)
+                and not isinstance(match.get('relevance'), bool)
+                and isinstance(match.get('relevance'), (int, float)) and 1 <= match['relevance'] <= 10
+                and match['line'].strip().strip('"').lower() in known_lines
+            ]
+        
+        matches = model_router.create(
+            anthropic_client,
+            task="figurative.filter",
+            validate=validate_matches,
+            fallback=usable_matches,
             max_tokens=2000,
             messages=[{
                 "role": "user",
@@ -981,25 +1250,6 @@ Return ONLY the JSON array, no other text."""
             }]
         )
         
-        # Parse response
-        matches_json = response.content[0].text.strip()
-        
-        # Remove markdown code blocks if present
-        if matches_json.startswith('```'):
-            matches_json = matches_json.split('```')[1]
-            if matches_json.startswith('json'):
-                matches_json = matches_json[4:]
-            matches_json = matches_json.strip()
-        
-        # Find JSON array in response
-        if '[' in matches_json:
-            start = matches_json.index('[')
-            end = matches_json.rindex(']') + 1
-            matches_json = matches_json[start:end]
-        
-        import json
-        matches = json.loads(matches_json)
-        
         print(f"Claude selected {len(matches)} best matches")
         
         return jsonify({'matches': matches})
@@ -1118,6 +1368,8 @@ def delete_real_talk_source(source_id):
     """Delete a Real Talk source and all its entries."""
     try:
         from supabase import create_client
+        from bm25_index import drop_source_index
+        from real_talk_utils import real_talk_entries
         import os
         from dotenv import load_dotenv
         load_dotenv()
@@ -1126,6 +1378,8 @@ def delete_real_talk_source(source_id):
         
         # Delete entries first (cascade should handle this, but be explicit)
         supabase.table('real_talk_entries').delete().eq('source_id', source_id).execute()
+        drop_source_index(source_id)
+        real_talk_entries.invalidate()
         
         # Delete source
         supabase.table('real_talk_sources').delete().eq('id', source_id).execute()
@@ -1390,25 +1644,48 @@ def real_talk_intelligent_search():
     Expected JSON body:
     {
         "query": "moment of realization they were wrong",
-        "entries": [...],  // Pre-filtered entries to analyze
-        "limit": 50
+        "filters": {"situations": [...], "age_min": 20, ...},  // Optional
+        "entries": [...],  // Optional: pre-filtered entries instead of filters
+        "limit": 50,       // Shortlist size Claude reranks
+        "stream": false    // Optional: SSE with merged results after each chunk
     }
+    
+    Without entries, every entry matching the filters (from the in-process
+    entry cache) is ranked locally (BM25) and the best `limit` are reranked
+    by Claude in concurrent chunks.
     """
     try:
-        from real_talk_utils import intelligent_search
+        from real_talk_utils import intelligent_search, intelligent_search_iter, load_search_candidates
         
         data = request.json
         query = data.get('query', '')
-        entries = data.get('entries', [])
+        entries = data.get('entries')
         limit = data.get('limit', 50)
+        stream = data.get('stream', False)
         
         if not query:
             return jsonify({'error': 'query is required'}), 400
         
-        if not entries:
-            return jsonify({'error': 'entries are required'}), 400
+        if entries is None:
+            entries = load_search_candidates(data.get('filters') or {})
         
-        print(f"Intelligent search for: {query} (analyzing {len(entries)} entries)")
+        if not entries:
+            return jsonify({'results': [], 'count': 0, 'query': query})
+        
+        print(f"Intelligent search for: {query} (ranking {len(entries)} entries, Claude reranks {limit})")
+        
+        # SSE mode: partial rankings while remaining chunks finish
+        if stream:
+            def generate():
+                try:
+                    for update in intelligent_search_iter(query, entries, limit=limit):
+                        yield f"data: {json.dumps({**update, 'count': len(update['results']), 'query': query})}\n\n"
+                except Exception as e:
+                    print(f"Error in intelligent search: {e}")
+                    traceback.print_exc()
+                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            
+            return Response(stream_with_context(generate()), mimetype='text/event-stream')
         
         results = intelligent_search(query, entries, limit=limit)
         
@@ -1586,6 +1863,10 @@ def melody_search():
     """
     Search for songs matching a chord progression.
     
+    Songs from our own chord data (song_chords) come first, chorus matches
+    before other sections; Claude suggestions fill any remaining slots.
+    Results are cached per canonical progression, BPM bucket and filters.
+    
     Expected JSON body:
     {
         "chords": "Am C F G",
@@ -1602,8 +1883,11 @@ def melody_search():
     }
     """
     try:
+        from dataclasses import replace
         from chord_converter import convert_progression
         from melody_claude import find_matching_songs
+        from progression_index import find_corpus_songs, song_identity, song_hash, to_c_frame, verify_suggestions
+        from melody_cache import melody_cache_key
         
         data = request.json
         chord_input = data.get('chords')
@@ -1628,38 +1912,104 @@ def melody_search():
         chart_position = data.get('chart_position')
         artist_style = data.get('artist_style')
         
-        # Search using Claude
-        songs = find_matching_songs(
-            roman_numerals=progression.roman_numerals,
-            original_chords=progression.original_chords,
-            key=progression.key,
-            bpm=bpm,
-            bpm_tolerance=bpm_tolerance,
-            time_signature=time_signature,
-            genres=genres,
-            year_start=year_start,
-            year_end=year_end,
-            chart_position=chart_position,
-            artist_style=artist_style
+        route = request.path
+        numerals = to_c_frame(progression.roman_numerals, progression.original_chords, progression.key)
+        
+        def search():
+            # Verified matches from our own chord data come first
+            try:
+                songs = find_corpus_songs(
+                    roman_numerals=progression.roman_numerals,
+                    original_chords=progression.original_chords,
+                    key=progression.key,
+                    bpm=bpm,
+                    bpm_tolerance=bpm_tolerance,
+                    time_signature=time_signature,
+                    genres=genres,
+                    year_start=year_start,
+                    year_end=year_end,
+                    chart_position=chart_position,
+                    limit=MELODY_RESULTS
+                )
+            except Exception as e:
+                print(f"⚠️  Corpus progression search failed, using Claude only: {e}")
+                songs = []
+            
+            if len(songs) < MELODY_RESULTS:
+                # Extend with Claude (identical concurrent searches share one call)
+                claude_songs = melody_search_flights.do(
+                    flight_key(progression.roman_numerals, progression.key, bpm, bpm_tolerance, time_signature,
+                               genres, year_start, year_end, chart_position, artist_style),
+                    lambda: find_matching_songs(
+                        roman_numerals=progression.roman_numerals,
+                        original_chords=progression.original_chords,
+                        key=progression.key,
+                        bpm=bpm,
+                        bpm_tolerance=bpm_tolerance,
+                        time_signature=time_signature,
+                        genres=genres,
+                        year_start=year_start,
+                        year_end=year_end,
+                        chart_position=chart_position,
+                        artist_style=artist_style,
+                        route=route
+                    )
+                )
+                try:
+                    claude_songs = verify_suggestions(claude_songs, numerals)
+                except Exception as e:
+                    print(f"⚠️  Could not verify Claude suggestions: {e}")
+                seen = {song_identity(s.artist_name, s.song_name) for s in songs}
+                for song in claude_songs:
+                    if len(songs) >= MELODY_RESULTS:
+                        break
+                    identity = song_identity(song.artist_name, song.song_name)
+                    if identity not in seen:
+                        seen.add(identity)
+                        songs.append(replace(song, rank=len(songs) + 1))
+            
+            return songs
+        
+        # Popular searches are served from cache (stale entries refresh in the background)
+        songs, cache_status = melody_search_cache.get(
+            melody_cache_key(
+                numerals, bpm, bpm_tolerance, time_signature, genres, year_start, year_end,
+                chart_position, artist_style
+            ),
+            search
         )
         
+        search_criteria = {
+            'roman_numerals': progression.roman_numerals,
+            'original_chords': progression.original_chords,
+            'key': progression.key,
+            'bpm': bpm,
+            'bpm_tolerance': bpm_tolerance,
+            'time_signature': time_signature,
+            'genres': genres,
+            'year_start': year_start,
+            'year_end': year_end,
+            'chart_position': chart_position,
+            'artist_style': artist_style
+        }
+        
+        # "More like these" rounds continue from this session (criteria + songs shown)
+        session_id = melody_sessions.create({
+            'criteria': search_criteria,
+            'seen': {song_hash(s.artist_name, s.song_name) for s in songs},
+            'recent': [f"{s.artist_name} - {s.song_name}" for s in songs]
+        })
+        
         return jsonify({
             'songs': [s.to_dict() for s in songs],
+            'cache': cache_status,
+            'session_id': session_id,
             'progression': {
                 'roman_numerals': progression.roman_numerals,
                 'original_chords': progression.original_chords,
                 'key': progression.key
             },
-            'search_criteria': {
-                'bpm': bpm,
-                'bpm_tolerance': bpm_tolerance,
-                'time_signature': time_signature,
-                'genres': genres,
-                'year_start': year_start,
-                'year_end': year_end,
-                'chart_position': chart_position,
-                'artist_style': artist_style
-            }
+            'search_criteria': search_criteria
         })
     
     except Exception as e:
@@ -1673,24 +2023,46 @@ def melody_more_like_these():
     """
     Find more songs similar to user's selections.
     
+    The session from /api/melody/search keeps the search criteria and a
+    hash of every song shown so far; repeats are filtered out here, and
+    only the most recent ones are listed in the prompt.
+    
     Expected JSON body:
     {
-        "original_criteria": { ... },  // From the search response
+        "session_id": "...",           // From the search response
         "liked_songs": [ ... ],        // Array of song objects user liked
-        "excluded_songs": ["Artist - Title", ...]  // Songs to exclude
+        // Fallbacks when the session has expired:
+        "original_criteria": { ... },  // From the search response
+        "excluded_songs": ["Artist - Title", ...]
     }
+    
+    Returns the new songs and the session_id to send next time.
     """
     try:
-        from melody_claude import find_more_like_these, MelodySong
+        from melody_claude import find_more_like_these, MelodySong, EXCLUSION_WINDOW
+        from progression_index import song_hash, to_c_frame, verify_suggestions
         
         data = request.json
-        original_criteria = data.get('original_criteria', {})
         liked_songs_data = data.get('liked_songs', [])
-        excluded_songs = data.get('excluded_songs', [])
         
         if not liked_songs_data:
             return jsonify({'error': 'liked_songs is required'}), 400
         
+        session_id = data.get('session_id')
+        session = melody_sessions.get(session_id)
+        if session is None:
+            # Expired session or older client: rebuild it from the request
+            excluded_songs = data.get('excluded_songs', [])
+            session = {
+                'criteria': data.get('original_criteria', {}),
+                'seen': {song_hash(*(s.split(' - ', 1) + [''])[:2]) for s in excluded_songs},
+                'recent': excluded_songs[-EXCLUSION_WINDOW:]
+            }
+            session_id = melody_sessions.create(session)
+        original_criteria = session['criteria']
+        # Work on a copy: a concurrent request may be reading the stored set
+        seen = set(session['seen'])
+        
         # Convert to MelodySong objects
         liked_songs = [
             MelodySong(
@@ -1704,16 +2076,43 @@ def melody_more_like_these():
             )
             for s in liked_songs_data
         ]
+        seen.update(song_hash(s.artist_name, s.song_name) for s in liked_songs)
         
         # Get more songs
-        new_songs = find_more_like_these(
+        suggestions = find_more_like_these(
             original_criteria=original_criteria,
             liked_songs=liked_songs,
-            excluded_songs=excluded_songs
+            excluded_songs=session['recent'],
+            excluded_total=len(seen)
         )
         
+        # Drop anything already shown (the prompt only lists the recent ones)
+        new_songs = []
+        for song in suggestions:
+            identity = song_hash(song.artist_name, song.song_name)
+            if identity not in seen:
+                seen.add(identity)
+                new_songs.append(song)
+        if len(new_songs) < len(suggestions):
+            print(f"🔁 Dropped {len(suggestions) - len(new_songs)} repeated suggestions")
+        
+        # Replace claimed chords/BPM with ours where we have the song
+        if original_criteria.get('original_chords'):
+            try:
+                new_songs = verify_suggestions(new_songs, to_c_frame(
+                    original_criteria.get('roman_numerals', []),
+                    original_criteria['original_chords'],
+                    original_criteria.get('key')
+                ))
+            except Exception as e:
+                print(f"⚠️  Could not verify Claude suggestions: {e}")
+        
+        recent = session['recent'] + [f"{s.artist_name} - {s.song_name}" for s in new_songs]
+        melody_sessions.update(session_id, seen=seen, recent=recent[-EXCLUSION_WINDOW:])
+        
         return jsonify({
-            'songs': [s.to_dict() for s in new_songs]
+            'songs': [s.to_dict() for s in new_songs],
+            'session_id': session_id
         })
     
     except Exception as e:
@@ -1834,13 +2233,139 @@ def melody_create_playlist():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/mix/compatible', methods=['POST'])
+def mix_compatible_songs():
+    """
+    Songs that mix with a key and tempo (harmonically compatible on the
+    Camelot wheel, BPM within tolerance, half/double time included).
+    
+    Expected JSON body (either song_id, or key and bpm):
+    {
+        "song_id": 123,              // Mix with this song (its key and BPM)
+        "key": "8A",                 // Camelot, Open Key ("1m") or key name ("Am")
+        "bpm": 124,
+        "bpm_tolerance": 3,          // Optional, default 3
+        "half_double": true,         // Optional, default true
+        // Optional facets (0-100):
+        "danceability_min": 60, "danceability_max": 100,
+        "acousticness_min": 0, "acousticness_max": 40,
+        "genres": ["House"],
+        "limit": 25
+    }
+    """
+    try:
+        from mix_index import parse_camelot, format_camelot
+        
+        data = request.json or {}
+        index = mix_index.get_index()
+        
+        song_id = data.get('song_id')
+        if song_id is not None:
+            song = index.songs_by_id.get(song_id)
+            if song is None:
+                return jsonify({'error': 'Song has no BPM or key data'}), 404
+            key, bpm = song.camelot, song.bpm
+        else:
+            key = parse_camelot(data.get('key'))
+            bpm = data.get('bpm')
+            if key is None or not bpm:
+                return jsonify({'error': 'song_id, or key and bpm, are required'}), 400
+        
+        def facet(name):
+            return (data.get(f'{name}_min'), data.get(f'{name}_max'))
+        
+        songs = index.search(
+            key=key,
+            bpm=float(bpm),
+            bpm_tolerance=float(data.get('bpm_tolerance', 3)),
+            half_double=data.get('half_double', True),
+            danceability=facet('danceability'),
+            acousticness=facet('acousticness'),
+            genres=data.get('genres'),
+            exclude_song_id=song_id,
+            limit=int(data.get('limit', 25))
+        )
+        
+        return jsonify({
+            'key': format_camelot(key),
+            'bpm': bpm,
+            'songs': songs
+        })
+    
+    except Exception as e:
+        print(f"Error in mix compatible songs: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint."""
     return jsonify({'status': 'ok'})
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    LLM call metrics per route and task.
+
+    Returns rolling latency percentiles (p50/p90/p99), token usage,
+    cache hit rate, error counts and lifetime cost for every Claude and
+    Whisper call made by this process, plus the current state of the
+    adaptive Anthropic concurrency gateway, fast/full model routing, song
+    corpus cache, chord progression index, melody search cache, mix index,
+    concept sessions, concept prefetching and single-flight request coalescing.
+    Raw records are in llm_calls.jsonl.
+    """
+    try:
+        return jsonify({
+            'llm': llm_metrics.snapshot(),
+            'gateway': anthropic_gateway.stats(),
+            'model_router': model_router.stats(),
+            'corpus': song_corpus.stats(),
+            'sessions': {'concept': concept_sessions.stats(), 'melody': melody_sessions.stats()},
+            'prefetch': concept_prefetcher.stats(),
+            'progression_index': progression_index.stats(),
+            'melody_cache': melody_search_cache.stats(),
+            'mix_index': mix_index.stats(),
+            'single_flight': {
+                flights.name: flights.stats()
+                for flights in (concept_match_flights, concept_generate_flights,
+                                melody_search_flights, rhyme_lookup_flights)
+            }
+        })
+    except Exception as e:
+        print(f"Error getting metrics: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/corpus/invalidate', methods=['POST'])
+def invalidate_corpus():
+    """
+    Rebuild the cached song corpus, chord progression index and mix index
+    now (called by import scripts after writing song_analysis, song_chords
+    or songs; see corpus_cache.notify_corpus_changed).
+    
+    Needs the CORPUS_INVALIDATE_TOKEN secret in the X-Corpus-Token header
+    when one is configured; otherwise only local callers are accepted.
+    """
+    if not invalidation_allowed(request.remote_addr, request.headers.get(INVALIDATE_TOKEN_HEADER)):
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        song_corpus.invalidate()
+        progression_index.invalidate()
+        mix_index.invalidate()
+        return jsonify({'success': True})
+    except Exception as e:
+        print(f"Error invalidating corpus: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
 if __name__ == '__main__':
     print("🚀 LyricBox API Server starting on http://localhost:3001")
+    # Load the corpus now rather than inside the first request's reads
+    song_corpus.warm()
     app.run(host='0.0.0.0', port=3001, debug=True)
 
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 """
-Automatic full import - waits for adaptive test, then imports all songs.
+Automatic full import - imports all songs at the highest safe throughput.
+
+Concurrency is governed by the shared AIMD gateway (concurrency_gateway.py),
+which ramps Claude parallelism up while calls succeed and backs off on
+429/529 responses, so no separate batch-size calibration run is needed.
 """
 
 import os
 import asyncio
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any
 from dotenv import load_dotenv
@@ -15,12 +20,17 @@ import pandas as pd
 
 from lyrics_client import MultiSourceLyricsClient
 from song_analyzer import SongAnalyzer
+from concurrency_gateway import anthropic_gateway
+from corpus_cache import notify_corpus_changed
 
 load_dotenv()
 
+# Songs per progress checkpoint (throughput is set by the gateway, not this)
+CHECKPOINT_SIZE = 100
+
 
 class AutoFullImport:
-    """Automatically import all songs after adaptive test."""
+    """Automatically import all songs with adaptive concurrency."""
     
     def __init__(self):
         self.supabase = create_client(
@@ -28,7 +38,8 @@ class AutoFullImport:
             os.getenv("SUPABASE_KEY")
         )
         self.lyrics_client = MultiSourceLyricsClient()
-        self.analyzer = SongAnalyzer()
+        # Long songs are split into section windows analyzed in parallel
+        self.analyzer = SongAnalyzer(chunked=True)
         
         # Results
         self.import_log = {
@@ -39,31 +50,6 @@ class AutoFullImport:
             "total_pairs": 0
         }
     
-    def wait_for_adaptive_test(self):
-        """Wait for adaptive test to finish."""
-        print("⏳ Waiting for adaptive test to complete...")
-        print("   (Checking for adaptive_test_results.json)")
-        
-        while not os.path.exists("adaptive_test_results.json"):
-            time.sleep(30)
-            print("   Still waiting...")
-        
-        print("✅ Adaptive test complete!")
-        time.sleep(5)  # Give it time to finish writing
-    
-    def get_optimal_batch_size(self) -> int:
-        """Read optimal batch size from test results."""
-        with open("adaptive_test_results.json", "r") as f:
-            results = json.load(f)
-        
-        optimal = results.get("optimal_batch_size", 20)
-        safe_size = max(1, optimal - 1)  # Subtract 1 for safety
-        
-        print(f"\n📊 Adaptive test found: {optimal} songs/batch")
-        print(f"🛡️  Using safe size: {safe_size} songs/batch (optimal - 1)")
-        
-        return safe_size
-    
     def clear_database(self):
         """Clear the database for fresh import."""
         print("\n🗑️  Clearing database...")
@@ -104,16 +90,16 @@ class AutoFullImport:
         artist = song["artist"]
         
         try:
-            # Fetch lyrics
-            lyrics_result = self.lyrics_client.get_lyrics(artist, title)
+            # Fetch lyrics (blocking I/O runs in worker threads so songs overlap)
+            lyrics_result = await asyncio.to_thread(self.lyrics_client.get_lyrics, artist, title)
             
             if not lyrics_result.success:
                 error_msg = f"❌ [{song_num}/{total}] {title} - {lyrics_result.error}"
                 print(error_msg)
                 return {"success": False, "error": lyrics_result.error, "song": title}
             
-            # Analyze with Claude
-            analysis = self.analyzer.analyze(lyrics_result.lyrics, title, artist)
+            # Analyze with Claude (the gateway decides how many run at once)
+            analysis = await asyncio.to_thread(self.analyzer.analyze, lyrics_result.lyrics, title, artist)
             
             if not analysis:
                 error_msg = f"❌ [{song_num}/{total}] {title} - Analysis failed"
@@ -121,7 +107,7 @@ class AutoFullImport:
                 return {"success": False, "error": "Analysis failed", "song": title}
             
             # Save to database
-            self._save_to_database(song, lyrics_result, analysis)
+            await asyncio.to_thread(self._save_to_database, song, lyrics_result, analysis)
             
             pairs_count = len(analysis.rhyme_pairs)
             print(f"✅ [{song_num}/{total}] {title} - {pairs_count} rhyme pairs ({lyrics_result.source})")
@@ -226,7 +212,12 @@ class AutoFullImport:
         self.import_log["total_pairs"] += total_pairs
         self.import_log["errors"].extend(errors)
         
+        gateway_stats = anthropic_gateway.stats()
+        batch_info["claude_concurrency"] = gateway_stats["limit"]
+        batch_info["claude_throttles"] = gateway_stats["throttles"]
+        
         print(f"\n✅ Batch {batch_num} complete: {successful}/{len(songs)} successful in {duration:.1f}s")
+        print(f"   Claude concurrency now {gateway_stats['limit']} ({gateway_stats['throttles']} throttles so far)")
         print(f"   Total progress: {self.import_log['total_songs']}/{total_songs} songs, {self.import_log['total_pairs']} pairs")
         
         if errors:
@@ -238,28 +229,29 @@ class AutoFullImport:
         print("🚀 AUTOMATIC FULL IMPORT")
         print("=" * 60)
         
-        # Step 1: Wait for adaptive test
-        self.wait_for_adaptive_test()
-        
-        # Step 2: Get optimal batch size
-        batch_size = self.get_optimal_batch_size()
+        # Worker threads cap at the gateway ceiling; the gateway itself
+        # decides how many Claude calls are actually in flight
+        batch_size = CHECKPOINT_SIZE
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=anthropic_gateway.max_limit)
+        )
         
-        # Step 3: Clear database
+        # Step 1: Clear database
         self.clear_database()
         
-        # Step 4: Load all songs
+        # Step 2: Load all songs
         all_songs = self.load_all_songs()
         total_songs = len(all_songs)
         total_batches = (total_songs + batch_size - 1) // batch_size
         
-        print(f"\n📦 Will process {total_batches} batches of {batch_size} songs")
-        print(f"⏱️  Estimated time: ~{total_batches * 8 / 60:.1f} hours")
+        print(f"\n📦 Will process {total_batches} checkpoints of {batch_size} songs")
+        print(f"🚦 Claude concurrency starts at {anthropic_gateway.limit} and adapts (max {anthropic_gateway.max_limit})")
         print(f"\nStarting import at {datetime.now().strftime('%I:%M %p')}")
         print("=" * 60)
         
         import_start = time.time()
         
-        # Step 5: Import all batches
+        # Step 3: Import all batches
         for batch_num in range(1, total_batches + 1):
             start_idx = (batch_num - 1) * batch_size
             end_idx = min(start_idx + batch_size, total_songs)
@@ -269,6 +261,9 @@ class AutoFullImport:
             
             # Save progress after each batch
             self._save_progress()
+            
+            # Let a running API server pick up the new songs
+            notify_corpus_changed()
         
         # Final summary
         total_duration = time.time() - import_start
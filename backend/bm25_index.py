@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+BM25 lexical ranking for Real Talk entries.
+Ranks thousands of entries against a query in milliseconds, so Claude only
+has to rerank a short list of the best candidates.
+
+Entries are tokenized once and cached per source; scoring uses document
+frequencies pooled across the sources being searched. sync_sources() with
+the full entry table also drops entries (and sources) that no longer exist,
+so document frequencies and lengths don't drift.
+"""
+
+import re
+import math
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Common words that carry no search signal
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'if', 'of', 'to', 'in', 'on', 'at',
+    'for', 'with', 'about', 'from', 'by', 'as', 'is', 'are', 'was', 'were', 'be',
+    'been', 'am', 'it', 'its', 'this', 'that', 'these', 'those', 'i', 'me', 'my',
+    'you', 'your', 'he', 'she', 'him', 'her', 'his', 'we', 'us', 'our', 'they',
+    'them', 'their', 'so', 'do', 'did', 'does', 'have', 'has', 'had', 'just',
+    'not', 'no', 'what', 'when', 'where', 'who', 'how', 'then', 'than', 'there',
+    'im', 'its', 'dont', 'can', 'will', 'would', 'could', 'should', 'really',
+}
+
+# Field weights (repeat counts) - titles and tags are short but telling
+TITLE_WEIGHT = 2
+TAG_WEIGHT = 2
+
+# Standard BM25 parameters
+K1 = 1.5
+B = 0.75
+
+
+def _stem(token: str) -> str:
+    """Very light suffix stripping so 'realized'/'realizing'/'realization' match."""
+    for suffix in ('ation', 'ing', 'ed', 'es', 'ly', 's'):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, drop stopwords and apostrophes, lightly stem."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall((text or '').lower()):
+        token = token.replace("'", '')
+        if token and token not in STOPWORDS:
+            tokens.append(_stem(token))
+    return tokens
+
+
+def entry_tokens(entry: Dict[str, Any]) -> List[str]:
+    """Weighted token stream for an entry: title and tags count extra."""
+    tags = ' '.join(
+        tag.replace('_', ' ')
+        for tag in (entry.get('situation_tags') or []) + (entry.get('emotional_tags') or [])
+    )
+    return (
+        tokenize(entry.get('title')) * TITLE_WEIGHT
+        + tokenize(tags) * TAG_WEIGHT
+        + tokenize(entry.get('raw_text'))
+    )
+
+
+class BM25Index:
+    """Tokenized entries for one source, with document frequencies."""
+
+    def __init__(self):
+        self.docs: Dict[str, Tuple[Counter, int]] = {}   # entry id -> (term counts, length)
+        self._signatures: Dict[str, int] = {}             # entry id -> hash of indexed text
+        self.df: Counter = Counter()
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def sync(self, entries: Iterable[Dict[str, Any]], complete: bool = False):
+        """
+        Index entries that are new or whose text changed since last time.
+
+        Args:
+            complete: entries are every entry of the source; indexed ids not
+                among them are removed
+        """
+        with self._lock:
+            synced = set()
+            for entry in entries:
+                entry_id = str(entry.get('id'))
+                synced.add(entry_id)
+                signature = hash((entry.get('title'), entry.get('raw_text'),
+                                  tuple(entry.get('situation_tags') or []),
+                                  tuple(entry.get('emotional_tags') or [])))
+                if self._signatures.get(entry_id) == signature:
+                    continue
+
+                if entry_id in self.docs:
+                    self._remove(entry_id)
+
+                counts = Counter(entry_tokens(entry))
+                length = sum(counts.values())
+                self.docs[entry_id] = (counts, length)
+                self._signatures[entry_id] = signature
+                self.df.update(counts.keys())
+                self.total_length += length
+
+            if complete:
+                for entry_id in [entry_id for entry_id in self.docs if entry_id not in synced]:
+                    self._remove(entry_id)
+
+    def _remove(self, entry_id: str):
+        counts, length = self.docs.pop(entry_id)
+        self._signatures.pop(entry_id, None)
+        self.df.subtract(counts.keys())
+        # Drop terms no entry uses any more so df doesn't grow without bound
+        for term in counts:
+            if self.df[term] <= 0:
+                del self.df[term]
+        self.total_length -= length
+
+
+# Per-source index cache (entries without a source share the None key)
+_source_indexes: Dict[Any, BM25Index] = {}
+_cache_lock = threading.Lock()
+
+
+def get_source_index(source_id: Any) -> BM25Index:
+    """Cached index for a source, created empty on first use."""
+    with _cache_lock:
+        index = _source_indexes.get(source_id)
+        if index is None:
+            index = _source_indexes[source_id] = BM25Index()
+        return index
+
+
+def drop_source_index(source_id: Any):
+    """Forget a source's index (e.g., after the source is deleted)."""
+    with _cache_lock:
+        _source_indexes.pop(source_id, None)
+
+
+def sync_sources(entries: List[Dict[str, Any]]):
+    """
+    Bring every source index in line with the full entry table: entries are
+    added, updated or removed, and sources without entries are dropped.
+    """
+    by_source: Dict[Any, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        by_source.setdefault(entry.get('source_id'), []).append(entry)
+
+    for source_id, source_entries in by_source.items():
+        get_source_index(source_id).sync(source_entries, complete=True)
+    with _cache_lock:
+        for source_id in [source_id for source_id in _source_indexes if source_id not in by_source]:
+            del _source_indexes[source_id]
+
+
+def rank_entries(query: str, entries: List[Dict[str, Any]]) -> List[Tuple[float, Dict[str, Any]]]:
+    """
+    Rank entries against a query with BM25.
+
+    Args:
+        query: Search text (e.g., "moment of realization they were wrong")
+        entries: Candidate entries (need id, source_id, title, raw_text, tags)
+
+    Returns:
+        (score, entry) pairs sorted by score descending. Entries with no
+        matching terms score 0 and keep their original order at the end.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not entries:
+        return []
+    if not terms:
+        return [(0.0, entry) for entry in entries]
+
+    by_source: Dict[Any, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        by_source.setdefault(entry.get('source_id'), []).append(entry)
+
+    indexes = []
+    for source_id, source_entries in by_source.items():
+        index = get_source_index(source_id)
+        index.sync(source_entries)
+        indexes.append(index)
+
+    # Collection statistics pooled across the sources being searched
+    doc_count = sum(len(index.docs) for index in indexes)
+    avg_length = (sum(index.total_length for index in indexes) / doc_count) if doc_count else 0.0
+    idf = {}
+    for term in terms:
+        df = sum(index.df.get(term, 0) for index in indexes)
+        idf[term] = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+    scored = []
+    for position, entry in enumerate(entries):
+        index = get_source_index(entry.get('source_id'))
+        counts, length = index.docs.get(str(entry.get('id')), (Counter(), 0))
+        norm = K1 * (1 - B + B * length / avg_length) if avg_length else K1
+        score = 0.0
+        for term in terms:
+            tf = counts.get(term, 0)
+            if tf:
+                score += idf[term] * tf * (K1 + 1) / (tf + norm)
+        scored.append((score, position, entry))
+
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [(score, entry) for score, _, entry in scored]
+
+
+def best_excerpt(text: str, query: str, width: int = 500) -> str:
+    """
+    The width-character window of text containing the most query terms.
+    Falls back to the opening of the text when no term appears.
+    """
+    text = text or ''
+    if len(text) <= width:
+        return text
+
+    terms = set(tokenize(query))
+    if not terms:
+        return text[:width]
+
+    hits = [
+        match.start()
+        for match in TOKEN_PATTERN.finditer(text.lower())
+        if _stem(match.group().replace("'", '')) in terms
+    ]
+    if not hits:
+        return text[:width]
+
+    # Slide over hit positions: the window starting near the densest run wins
+    best_start, best_count = 0, 0
+    right = 0
+    for left, start in enumerate(hits):
+        while right < len(hits) and hits[right] < start + width:
+            right += 1
+        if right - left > best_count:
+            best_start, best_count = start, right - left
+
+    # Back up to a word boundary a little before the first hit
+    start = max(0, min(best_start - 50, len(text) - width))
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    return text[start:start + width]
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Build canonical theme clusters offline.
+Collects every distinct theme in song_analysis, groups them by lemma key
+(theme_normalizer), optionally merges synonym groups with one Claude pass,
+and writes the mapping to the theme_canonical table.
+
+Canonical ids are stable across runs: each cluster keeps the id its themes
+(or themes with the same lemma key) had in theme_canonical, and only new
+clusters get new ids, past the current maximum. Rows for themes that left
+the corpus are deleted.
+
+Usage:
+    python build_theme_clusters.py              # lemma keys only
+    python build_theme_clusters.py --claude     # plus Claude synonym merging
+    python build_theme_clusters.py --dry-run    # print clusters, write nothing
+"""
+
+import os
+import sys
+import json
+from collections import Counter
+from typing import List, Dict, Optional
+
+from anthropic import Anthropic
+from dotenv import load_dotenv
+from supabase import create_client
+
+from llm_metrics import create_message
+from theme_normalizer import lemma_key
+from corpus_cache import notify_corpus_changed
+
+load_dotenv()
+
+PAGE_SIZE = 1000
+
+# Cluster labels sent to Claude per request
+CLAUDE_BATCH_SIZE = 300
+
+SYNONYM_PROMPT = """Below are numbered song themes. Group the ones that mean the same thing as a song theme (e.g., "heartbreak" and "broken heart", "moving on" and "letting go").
+
+Only group true synonyms - related but different themes ("love" and "lust", "nostalgia" and "regret") stay separate.
+
+{themes}
+
+Return ONLY a JSON array of groups, each an array of theme numbers, listing only groups with 2 or more themes:
+[[0, 14], [3, 7, 21]]"""
+
+
+class UnionFind:
+    """Disjoint sets over cluster indexes."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def load_theme_counts(supabase) -> Counter:
+    """How many analyses use each distinct (lowercased) theme."""
+    counts = Counter()
+    offset = 0
+    while True:
+        result = supabase.table('song_analysis').select('themes')\
+            .order('id').range(offset, offset + PAGE_SIZE - 1).execute()
+        page = result.data or []
+        for row in page:
+            counts.update(set(t.lower().strip() for t in row.get('themes') or [] if t and t.strip()))
+        if len(page) < PAGE_SIZE:
+            return counts
+        offset += PAGE_SIZE
+
+
+def load_existing_clusters(supabase) -> Dict[str, int]:
+    """Current theme_canonical mapping as {theme text: canonical id} (empty if the table is missing)."""
+    existing = {}
+    offset = 0
+    try:
+        while True:
+            result = supabase.table('theme_canonical').select('theme_text, canonical_id')\
+                .order('theme_text').range(offset, offset + PAGE_SIZE - 1).execute()
+            page = result.data or []
+            existing.update((row['theme_text'], row['canonical_id']) for row in page)
+            if len(page) < PAGE_SIZE:
+                return existing
+            offset += PAGE_SIZE
+    except Exception as e:
+        print(f"⚠️  Could not read theme_canonical, assigning fresh ids: {e}")
+        return {}
+
+
+def claude_synonym_groups(labels: List[str]) -> List[List[int]]:
+    """Ask Claude which cluster labels are synonyms, in batches."""
+    anthropic = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    groups = []
+
+    for start in range(0, len(labels), CLAUDE_BATCH_SIZE):
+        batch = labels[start:start + CLAUDE_BATCH_SIZE]
+        print(f"🤖 Claude synonym pass: themes {start}-{start + len(batch) - 1}...")
+
+        response = create_message(
+            anthropic,
+            task="themes.cluster",
+            route="build_theme_clusters",
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=4000,
+            messages=[{
+                "role": "user",
+                "content": SYNONYM_PROMPT.format(
+                    themes='\n'.join(f"{i}. {label}" for i, label in enumerate(batch))
+                )
+            }]
+        )
+
+        text = response.content[0].text.strip()
+        try:
+            batch_groups = json.loads(text[text.index('['):text.rindex(']') + 1])
+        except ValueError as e:
+            print(f"  ⚠️  Could not parse synonym groups, skipping batch: {e}")
+            continue
+
+        for group in batch_groups:
+            members = [start + i for i in group if isinstance(i, int) and 0 <= i < len(batch)]
+            if len(members) > 1:
+                groups.append(members)
+
+    return groups
+
+
+def build_clusters(theme_counts: Counter, use_claude: bool = False,
+                   existing: Optional[Dict[str, int]] = None) -> Dict[str, Dict]:
+    """
+    Cluster themes into canonical ids.
+
+    Args:
+        existing: Current {theme text: canonical id}; clusters reuse these ids
+
+    Returns:
+        {theme text: {'canonical_id': int, 'canonical_label': str}}
+    """
+    # First pass: identical lemma keys form one cluster
+    key_members: Dict[str, List[str]] = {}
+    for theme in theme_counts:
+        key = lemma_key(theme)
+        if key:
+            key_members.setdefault(key, []).append(theme)
+
+    keys = sorted(key_members, key=lambda k: -sum(theme_counts[t] for t in key_members[k]))
+    labels = [max(key_members[k], key=lambda t: (theme_counts[t], -len(t))) for k in keys]
+    print(f"🔑 {len(theme_counts)} distinct themes → {len(keys)} lemma clusters")
+
+    # Second pass: merge synonym clusters
+    sets = UnionFind(len(keys))
+    if use_claude:
+        for group in claude_synonym_groups(labels):
+            for other in group[1:]:
+                sets.union(group[0], other)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(keys)):
+        groups.setdefault(sets.find(i), []).append(i)
+
+    # Ids previously held by themes of each lemma key (matches reworded themes too)
+    existing = existing or {}
+    key_ids: Dict[str, Counter] = {}
+    for theme, canonical_id in existing.items():
+        key_ids.setdefault(lemma_key(theme), Counter())[canonical_id] += 1
+    next_id = max(existing.values(), default=0) + 1
+
+    # Roots are each group's most common cluster, so larger groups claim ids first
+    mapping = {}
+    claimed = set()
+    reused = 0
+    for root in sorted(groups):
+        votes = Counter()
+        for i in groups[root]:
+            votes.update(key_ids.get(keys[i], {}))
+        canonical_id = next((cid for cid, _ in votes.most_common() if cid not in claimed), None)
+        if canonical_id is None:
+            canonical_id, next_id = next_id, next_id + 1
+        else:
+            reused += 1
+        claimed.add(canonical_id)
+        for i in groups[root]:
+            for theme in key_members[keys[i]]:
+                mapping[theme] = {'canonical_id': canonical_id, 'canonical_label': labels[root]}
+
+    cluster_count = len(set(entry['canonical_id'] for entry in mapping.values()))
+    print(f"🧩 {cluster_count} canonical themes ({reused} keep their existing id)")
+    return mapping
+
+
+def save_clusters(supabase, mapping: Dict[str, Dict], existing: Dict[str, int]):
+    """Upsert the mapping and delete rows for themes no longer in the corpus."""
+    rows = [{'theme_text': theme, **entry} for theme, entry in mapping.items()]
+    for start in range(0, len(rows), PAGE_SIZE):
+        supabase.table('theme_canonical').upsert(rows[start:start + PAGE_SIZE]).execute()
+
+    stale = [theme for theme in existing if theme not in mapping]
+    # Theme texts go into the request URL, so delete in small batches
+    for start in range(0, len(stale), 100):
+        supabase.table('theme_canonical').delete().in_('theme_text', stale[start:start + 100]).execute()
+    print(f"💾 Saved {len(rows)} theme mappings, removed {len(stale)} stale ones")
+
+
+def build_theme_clusters(use_claude: bool = False, dry_run: bool = False):
+    supabase = create_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_KEY")
+    )
+
+    print("🔍 Loading song themes...")
+    theme_counts = load_theme_counts(supabase)
+    existing = load_existing_clusters(supabase)
+    mapping = build_clusters(theme_counts, use_claude=use_claude, existing=existing)
+
+    if dry_run:
+        clusters: Dict[int, List[str]] = {}
+        for theme, entry in mapping.items():
+            clusters.setdefault(entry['canonical_id'], []).append(theme)
+        for canonical_id, themes in sorted(clusters.items()):
+            if len(themes) > 1:
+                print(f"  {canonical_id:>5}: {', '.join(sorted(themes))}")
+        return
+
+    save_clusters(supabase, mapping, existing)
+    notify_corpus_changed()
+    print("✅ Theme clusters built!")
+
+
+if __name__ == "__main__":
+    build_theme_clusters(use_claude='--claude' in sys.argv, dry_run='--dry-run' in sys.argv)
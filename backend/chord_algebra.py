@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Chord algebra shared by the Ultimate Guitar scraper, the melody chord
+converter and the progression index.
+
+One compiled parser and one set of note tables. Parsed chords are interned
+__slots__ objects, and every transform (simplify, transpose to C, capo
+transpose, Roman numerals) is memoized. Chord vocabularies are small, so
+bulk processing of thousands of sections is mostly cache lookups.
+
+The ug_scraper transform modules are thin wrappers around this one.
+"""
+
+import re
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Chromatic scale (sharp spelling, as stored in song_chords)
+NOTES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+NOTE_INDEX = {note: i for i, note in enumerate(NOTES)}
+
+# Note to semitone mapping (C = 0), either spelling
+NOTE_TO_SEMITONE = {
+    **NOTE_INDEX,
+    'Db': 1, 'Eb': 3, 'Gb': 6, 'Ab': 8, 'Bb': 10
+}
+
+FLAT_TO_SHARP = {'Db': 'C#', 'Eb': 'D#', 'Gb': 'F#', 'Ab': 'G#', 'Bb': 'A#'}
+
+# C major scale degree and natural quality per root
+SCALE_DEGREES = {
+    'C': 'I', 'D': 'II', 'E': 'III', 'F': 'IV', 'G': 'V', 'A': 'VI', 'B': 'VII'
+}
+
+ROOT_PATTERN = re.compile(r'^([A-G][#b]?)')
+# Quality is minor "m" but not the "m" of "maj7" (major, kept in the suffix)
+CHORD_PATTERN = re.compile(r'^([A-G][#b]?)(m(?!aj)|dim|aug)?(.*)$', re.DOTALL)
+
+# Distinct chord strings / (key, chord) pairs kept per memoized transform
+CACHE_SIZE = 65536
+
+
+class Chord:
+    """A parsed chord: root note, basic quality and everything after it."""
+
+    __slots__ = ('root', 'quality', 'suffix')
+
+    def __init__(self, root: str, quality: str, suffix: str):
+        self.root = root          # "C", "F#", "Bb"
+        self.quality = quality    # "", "m", "dim" or "aug"
+        self.suffix = suffix      # "7", "maj7", "add9", "sus4", ...
+
+    @property
+    def simple(self) -> str:
+        return self.root + self.quality
+
+    def __str__(self) -> str:
+        return self.root + self.quality + self.suffix
+
+    def __repr__(self) -> str:
+        return f"Chord({str(self)!r})"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_chord(chord: str) -> Optional[Chord]:
+    """
+    Parse a chord name (no slash handling). The same string always returns
+    the same Chord object.
+
+    Returns:
+        Chord, or None if it doesn't start with a note name
+    """
+    match = CHORD_PATTERN.match(chord)
+    if not match:
+        return None
+    return Chord(match.group(1), match.group(2) or '', match.group(3))
+
+
+def _split_slash(chord: str) -> Optional[Tuple[str, str]]:
+    """("D", "F#") for "D/F#"; None unless there is exactly one slash."""
+    if '/' in chord:
+        parts = chord.split('/')
+        if len(parts) == 2:
+            return parts[0], parts[1]
+    return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def simplify_chord(chord: str) -> str:
+    """Strip embellishments: "Cadd9" → "C", "Am7" → "Am", "D/F#" → "D"."""
+    parsed = parse_chord(chord)
+    return parsed.simple if parsed else chord
+
+
+@lru_cache(maxsize=256)
+def interval_to_c(tonality: str) -> Optional[int]:
+    """
+    Semitones that move a key to the C major frame (major keys → C, minor
+    keys → A minor). None when the key root isn't a note name.
+    """
+    is_minor = tonality.endswith('m')
+    tonality_root = tonality[:-1] if is_minor else tonality
+    if tonality_root not in NOTE_TO_SEMITONE:
+        return None
+    target = NOTE_INDEX['A' if is_minor else 'C']
+    return (target - NOTE_TO_SEMITONE[tonality_root]) % 12
+
+
+KEY_NAME_PATTERN = re.compile(r'^([A-G])([#b♯♭]?)\s*(m|min|minor|maj|major)?$', re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def normalize_tonality(key: Optional[str]) -> Optional[str]:
+    """
+    UG-style tonality ("F#m", "A#") from any stored key spelling:
+    "F#m", "Bb", "A minor", "C major", "E♭". None for "Unknown" or blanks.
+    """
+    match = KEY_NAME_PATTERN.match((key or '').strip())
+    if not match:
+        return None
+    accidental = {'♯': '#', '♭': 'b'}.get(match.group(2), match.group(2)).replace('B', 'b')
+    root = match.group(1).upper() + accidental
+    root = FLAT_TO_SHARP.get(root, root)
+    if root not in NOTE_INDEX:
+        return None
+    mode = (match.group(3) or '').lower()
+    return root + ('m' if mode in ('m', 'min', 'minor') else '')
+
+
+def parse_chord_list(value) -> List[str]:
+    """Chord list from a song_chords column (TEXT[] array, JSON text or space-separated text)."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(chord) for chord in value]
+    text = str(value).strip()
+    if text.startswith('['):
+        try:
+            return [str(chord) for chord in json.loads(text)]
+        except ValueError:
+            pass
+    return text.split()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def transpose_to_c(tonality: str, chord: str) -> str:
+    """
+    Transpose a chord into the C major frame, keeping embellishments.
+    Flat or sharp spellings are accepted (in the key and the chord); the
+    result is sharp-spelled. Slash chords transpose both parts.
+    Unparseable chords are returned as is.
+
+    Args:
+        tonality: Original key (e.g., "G", "Am", "F#m")
+        chord: Chord to transpose (e.g., "G", "Cadd9", "D/F#")
+    """
+    slash = _split_slash(chord)
+    if slash:
+        return f"{transpose_to_c(tonality, slash[0])}/{transpose_to_c(tonality, slash[1])}"
+
+    match = ROOT_PATTERN.match(chord)
+    interval = interval_to_c(tonality)
+    if not match or interval is None or match.group(1) not in NOTE_TO_SEMITONE:
+        return chord
+    root = match.group(1)
+    return NOTES[(NOTE_TO_SEMITONE[root] + interval) % 12] + chord[len(root):]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def transpose_by_capo(chord: str, capo_fret: int) -> str:
+    """
+    Transpose a chord shape up by the capo position to the sounding chord
+    (sharp spelling). Slash chords transpose both parts.
+    """
+    if capo_fret == 0:
+        return chord
+
+    slash = _split_slash(chord)
+    if slash:
+        return f"{transpose_by_capo(slash[0], capo_fret)}/{transpose_by_capo(slash[1], capo_fret)}"
+
+    match = ROOT_PATTERN.match(chord)
+    if not match:
+        return chord
+    root = match.group(1)
+    sharp_root = FLAT_TO_SHARP.get(root, root)
+    if sharp_root not in NOTE_INDEX:
+        return chord
+    return NOTES[(NOTE_INDEX[sharp_root] + capo_fret) % 12] + chord[len(root):]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def convert_to_roman(chord: str) -> str:
+    """
+    Roman numeral for a chord in the C major frame, keeping embellishments:
+    "C" → "I", "Am7" → "vi7", "Bdim" → "vii°", "C/E" → "I/iii".
+    Non-diatonic roots are returned as is.
+    """
+    slash = _split_slash(chord)
+    if slash:
+        return f"{convert_to_roman(slash[0])}/{convert_to_roman(slash[1])}"
+
+    parsed = parse_chord(chord)
+    if parsed is None or parsed.root not in SCALE_DEGREES:
+        return chord
+
+    degree = SCALE_DEGREES[parsed.root]
+    if parsed.quality == 'dim':
+        return degree.lower() + '°' + parsed.suffix
+    if parsed.quality == 'aug':
+        return degree + '+' + parsed.suffix
+    if parsed.quality == 'm':
+        return degree.lower() + parsed.suffix
+    return degree + parsed.suffix
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def process_chord(tonality: str, chord: str) -> Tuple[str, str, str, str, str, str]:
+    """
+    All six stored versions of one chord:
+    (original, original simplified, in C, in C simplified, Roman, Roman simplified)
+    """
+    simple = simplify_chord(chord)
+    in_c = transpose_to_c(tonality, chord)
+    in_c_simple = transpose_to_c(tonality, simple)
+    return (chord, simple, in_c, in_c_simple, convert_to_roman(in_c), convert_to_roman(in_c_simple))
+
+
+PROCESSED_VERSIONS = ('original', 'original_simple', 'in_c', 'in_c_simple', 'roman', 'roman_simple')
+
+
+def process_chords(tonality: str, chords: List[str]) -> Dict[str, List[str]]:
+    """
+    Process a chord list into the six versions stored in song_chords.
+
+    Returns:
+        {'original': [...], 'original_simple': [...], 'in_c': [...],
+         'in_c_simple': [...], 'roman': [...], 'roman_simple': [...]}
+    """
+    processed = [process_chord(tonality, chord) for chord in chords]
+    return {
+        version: [versions[i] for versions in processed]
+        for i, version in enumerate(PROCESSED_VERSIONS)
+    }
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counts of the memoized transforms."""
+    return {
+        name: fn.cache_info()._asdict()
+        for name, fn in (('parse', parse_chord), ('simplify', simplify_chord),
+                         ('transpose_to_c', transpose_to_c), ('capo', transpose_by_capo),
+                         ('roman', convert_to_roman), ('process', process_chord))
+    }
@@ -5,9 +5,13 @@ Converts chord names (Am, C, F, G) to Roman numerals (vi, I, IV, V).
 """
 
 import re
+from functools import lru_cache
 from typing import List, Tuple
 from dataclasses import dataclass
 
+from chord_algebra import NOTE_TO_SEMITONE, ROOT_PATTERN
+from key_inference import estimate_key
+
 
 @dataclass
 class ChordProgression:
@@ -17,17 +21,6 @@ class ChordProgression:
     key: str                       # 'A minor' or 'C major'
 
 
-# Note to semitone mapping (C = 0)
-NOTE_TO_SEMITONE = {
-    'C': 0, 'C#': 1, 'Db': 1,
-    'D': 2, 'D#': 3, 'Eb': 3,
-    'E': 4,
-    'F': 5, 'F#': 6, 'Gb': 6,
-    'G': 7, 'G#': 8, 'Ab': 8,
-    'A': 9, 'A#': 10, 'Bb': 10,
-    'B': 11
-}
-
 # Major scale intervals (semitones from root)
 MAJOR_SCALE = [0, 2, 4, 5, 7, 9, 11]
 
@@ -35,6 +28,7 @@ MAJOR_SCALE = [0, 2, 4, 5, 7, 9, 11]
 MINOR_SCALE = [0, 2, 3, 5, 7, 8, 10]
 
 
+@lru_cache(maxsize=4096)
 def parse_chord(chord: str) -> Tuple[str, bool]:
     """
     Parse a chord name into root note and quality.
@@ -48,7 +42,7 @@ def parse_chord(chord: str) -> Tuple[str, bool]:
     chord = chord.strip()
     
     # Match root note (supports sharps/flats)
-    match = re.match(r'^([A-G][#b]?)', chord)
+    match = ROOT_PATTERN.match(chord)
     if not match:
         raise ValueError(f"Invalid chord: {chord}")
     
@@ -68,7 +62,10 @@ def infer_key(chords: List[str]) -> Tuple[str, bool]:
     """
     Infer the key from a chord progression.
     
-    Strategy: First chord is usually the tonic.
+    Strategy: score all 24 keys against the chords (key_inference), with
+    the first chord as a tie-breaking hint for the tonic. Falls back to the
+    first chord when nothing can be scored. The root keeps the spelling
+    used in the chords ("Bb", not "A#").
     
     Returns:
         Tuple of (key_root, is_major_key)
@@ -77,9 +74,19 @@ def infer_key(chords: List[str]) -> Tuple[str, bool]:
         return 'C', True
     
     first_root, first_is_major = parse_chord(chords[0])
-    return first_root, first_is_major
+    estimate = estimate_key(chords)
+    if estimate is None:
+        return first_root, first_is_major
+    
+    key_semitone = NOTE_TO_SEMITONE[estimate.root]
+    for chord in chords:
+        match = ROOT_PATTERN.match(chord.strip())
+        if match and NOTE_TO_SEMITONE.get(match.group(1)) == key_semitone:
+            return match.group(1), estimate.is_major
+    return estimate.root, estimate.is_major
 
 
+@lru_cache(maxsize=4096)
 def chord_to_roman(chord: str, key_root: str, is_major_key: bool) -> str:
     """
     Convert a chord to Roman numeral based on the key.
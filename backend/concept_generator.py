@@ -6,15 +6,24 @@ Generates song concepts based on user ideas, learning from similar hit songs in
 
 import os
 import json
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from anthropic import Anthropic
-from supabase import create_client
 from dotenv import load_dotenv
+from llm_metrics import create_message
+from model_router import model_router, string_list
+from corpus_cache import song_corpus
 
 load_dotenv()
 
 anthropic = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+# Input tokens spent on example songs in the concept prompt
+EXAMPLE_TOKEN_BUDGET = int(os.getenv("CONCEPT_EXAMPLE_TOKEN_BUDGET", "2000"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate (~4 characters per token for English prose)."""
+    return max(1, (len(text) + 3) // 4)
 
 THEME_EXTRACTION_PROMPT = """Extract 3-5 key themes from this song concept idea. Return ONLY a JSON array of theme strings.
 
@@ -72,36 +81,22 @@ Return ONLY valid JSON, no other text."""
 class ConceptGenerator:
     """Generates custom song concepts using Claude AI."""
     
-    def extract_themes(self, user_idea: str) -> List[str]:
+    def extract_themes(self, user_idea: str, route: Optional[str] = None) -> List[str]:
         """Extract key themes from user's concept idea."""
         print(f"Extracting themes from: {user_idea}")
         
-        response = anthropic.messages.create(
-            model="claude-sonnet-4-5-20250929",
+        # Fast model first; escalates if the reply isn't a 1-8 item string array
+        themes = model_router.create(
+            anthropic,
+            task="concept.extract_themes",
+            validate=string_list(min_items=1, max_items=8),
+            route=route,
             max_tokens=500,
             messages=[{
                 "role": "user",
                 "content": THEME_EXTRACTION_PROMPT.format(user_idea=user_idea)
             }]
         )
-        
-        themes_json = response.content[0].text.strip()
-        print(f"Raw theme extraction response: {themes_json}")
-        
-        # Remove markdown code blocks if present
-        if themes_json.startswith('```'):
-            themes_json = themes_json.split('```')[1]
-            if themes_json.startswith('json'):
-                themes_json = themes_json[4:]
-            themes_json = themes_json.strip()
-        
-        # Try to find JSON array in the response
-        if '[' in themes_json:
-            start = themes_json.index('[')
-            end = themes_json.rindex(']') + 1
-            themes_json = themes_json[start:end]
-        
-        themes = json.loads(themes_json)
         print(f"Extracted themes: {themes}")
         return themes
     
@@ -111,100 +106,30 @@ class ConceptGenerator:
         num_songs: int = 10,
         filters: Optional[Dict] = None
     ) -> List[Dict]:
-        """Find songs in database with matching themes."""
+        """
+        Find songs in database with matching themes.
+        
+        Scoring runs on the cached corpus's theme index (see corpus_cache.py):
+        each extracted theme counts once per song when it appears in, or
+        contains, one of the song's themes. Ties go to the better Billboard rank.
+        """
         filters = filters or {}
         
         print(f"Searching for {num_songs} songs matching themes: {themes}")
         
-        # Build query - use !inner to ensure we only get rows where song join succeeds
-        query = supabase.table('song_analysis').select(
-            'song_id, concept_summary, themes, imagery, tone, universal_scenarios, section_breakdown, songs!inner(id, title, artist, year, billboard_rank, genre)'
-        )
-        
-        # Apply filters (note: years filter on songs table)
-        if filters.get('years'):
-            query = query.filter('songs.year', 'in', f"({','.join(map(str, filters['years']))})")
-        
-        if filters.get('minRank') and filters.get('maxRank'):
-            query = query.filter('songs.billboard_rank', 'gte', filters['minRank'])
-            query = query.filter('songs.billboard_rank', 'lte', filters['maxRank'])
-        
-        if filters.get('artists'):
-            query = query.filter('songs.artist', 'in', f"({','.join(filters['artists'])})")
-        
-        # Execute query - NO LIMIT! Get ALL songs that match filters
-        print(f"Executing query with filters applied (no limit - getting ALL matching songs)...")
-        result = query.execute()
-        
-        # Apply genre filter in Python (case-insensitive partial matching)
-        if filters.get('genres'):
-            filtered_genres = [g.lower() for g in filters['genres']]
-            original_count = len(result.data) if result.data else 0
-            result.data = [
-                song for song in (result.data or [])
-                if song.get('songs') and song['songs'].get('genre') and 
-                any(fg in song['songs']['genre'].lower() for fg in filtered_genres)
-            ]
-            print(f"Genre filter applied: {original_count} -> {len(result.data)} songs")
-        
-        print(f"Query returned {len(result.data) if result.data else 0} total songs")
-        
-        if not result.data:
+        index = song_corpus.get_index()
+        if not len(index):
             print("No songs found at all - database might be empty!")
             return []
         
-        # Score songs by theme overlap
-        print(f"Scoring {len(result.data)} songs by theme overlap with: {themes}")
-        scored_songs = []
-        for song in result.data:
-            song_themes = song.get('themes', [])
-            if not song_themes:
-                continue
-            
-            # Get billboard rank - handle different data structures
-            billboard_rank = 999
-            if 'songs' in song and song['songs']:
-                billboard_rank = song['songs'].get('billboard_rank') or 999
-            
-            # Calculate overlap score - fuzzy matching
-            # Check if extracted theme keywords appear in song theme phrases
-            overlap = 0
-            for extracted_theme in themes:
-                extracted_lower = extracted_theme.lower()
-                for song_theme in song_themes:
-                    song_theme_lower = song_theme.lower()
-                    # Check if keyword appears in phrase
-                    if extracted_lower in song_theme_lower or song_theme_lower in extracted_lower:
-                        overlap += 1
-                        break  # Count each extracted theme only once
-            
-            scored_songs.append({
-                'song': song,
-                'score': overlap,
-                'billboard_rank': billboard_rank
-            })
-        
-        # Sort by overlap score (desc), then billboard rank (asc)
-        scored_songs.sort(key=lambda x: (-x['score'], x['billboard_rank']))
-        
-        # Deduplicate by song ID (database has duplicates)
-        seen_song_ids = set()
-        deduplicated = []
-        for item in scored_songs:
-            song_info = item['song'].get('songs') or {}
-            song_id = song_info.get('id')
-            if song_id and song_id not in seen_song_ids:
-                seen_song_ids.add(song_id)
-                deduplicated.append(item)
+        top_songs = index.top_songs(themes, num_songs, filters)
         
         # Debug: Show top scores
         print(f"\nTop 10 song scores (after deduplication):")
-        for i, item in enumerate(deduplicated[:10]):
+        for i, item in enumerate(top_songs[:10]):
             song_info = item['song'].get('songs', {}) or {}
             print(f"  {i+1}. Score={item['score']}, Rank=#{item['billboard_rank']}, {song_info.get('title', 'Unknown')} - {song_info.get('artist', 'Unknown')}")
         
-        # Return top N with scores
-        top_songs = deduplicated[:num_songs]
         print(f"Found {len(top_songs)} unique matching songs")
         
         return top_songs
@@ -224,6 +149,53 @@ Imagery: {', '.join(song_data.get('imagery', [])[:3])}
 Tone: {song_data.get('tone', 'N/A')}
 """.strip()
     
+    def pack_examples(
+        self,
+        example_songs: List[Dict],
+        token_budget: int = EXAMPLE_TOKEN_BUDGET,
+        max_examples: Optional[int] = None,
+        diverse_artists: bool = True
+    ) -> Tuple[List[Dict], int]:
+        """
+        Choose which example songs go into the concept prompt.
+        
+        Walks the songs best match first, skips a second song by an artist
+        already chosen, and stops adding once the formatted examples would
+        exceed the token budget (the best example is always kept).
+        
+        Args:
+            example_songs: song_analysis rows, best match first
+            token_budget: Estimated tokens allowed for all examples
+            max_examples: Optional cap on the number of examples
+            diverse_artists: Skip repeat artists (off for songs the user picked)
+        
+        Returns:
+            (chosen rows, estimated tokens used)
+        """
+        packed = []
+        used_tokens = 0
+        artists = set()
+        
+        for song in example_songs:
+            if max_examples is not None and len(packed) >= max_examples:
+                break
+            
+            artist = ((song.get('songs') or {}).get('artist') or '').strip().lower()
+            if diverse_artists and artist and artist in artists:
+                continue
+            
+            tokens = estimate_tokens(self.format_example(song))
+            if packed and used_tokens + tokens > token_budget:
+                continue
+            
+            packed.append(song)
+            used_tokens += tokens
+            if artist:
+                artists.add(artist)
+        
+        print(f"Packed {len(packed)}/{len(example_songs)} examples (~{used_tokens} tokens, budget {token_budget})")
+        return packed, used_tokens
+    
     def generate_concept(
         self,
         user_idea: str,
@@ -239,7 +211,9 @@ Tone: {song_data.get('tone', 'N/A')}
         ])
         
         # Generate concept
-        response = anthropic.messages.create(
+        response = create_message(
+            anthropic,
+            task="concept.generate",
             model="claude-sonnet-4-5-20250929",
             max_tokens=4000,
             system=[{
@@ -277,7 +251,9 @@ def generate_custom_concept(
     user_idea: str,
     num_songs: int = 10,
     filters: Optional[Dict] = None,
-    manual_song_ids: Optional[List[str]] = None
+    manual_song_ids: Optional[List[str]] = None,
+    themes: Optional[List[str]] = None,
+    example_songs: Optional[List[Dict]] = None
 ) -> Dict:
     """
     Main function to generate a custom concept.
@@ -287,6 +263,8 @@ def generate_custom_concept(
         num_songs: Number of example songs to use
         filters: Optional filters for song selection
         manual_song_ids: Optional list of manually selected song IDs
+        themes: Already extracted themes (skips theme extraction)
+        example_songs: Already selected song_analysis rows (skips song selection)
     
     Returns:
         Generated concept dictionary
@@ -294,40 +272,52 @@ def generate_custom_concept(
     generator = ConceptGenerator()
     
     # Extract themes from user idea
-    themes = generator.extract_themes(user_idea)
+    if themes is None:
+        themes = generator.extract_themes(user_idea)
     
     # Get example songs
-    if manual_song_ids:
-        # Use manually selected songs
-        result = supabase.table('song_analysis').select('''
-            concept_summary,
-            themes,
-            imagery,
-            tone,
-            universal_scenarios,
-            section_breakdown,
-            songs!inner (title, artist, billboard_rank)
-        ''').filter('song_id', 'in', f"({','.join(manual_song_ids)})").execute()
-        example_songs = result.data
+    if example_songs is not None:
+        pass
+    elif manual_song_ids:
+        # Use manually selected songs (served from the corpus cache)
+        example_songs = song_corpus.rows_for_song_ids(manual_song_ids)
     else:
-        # Find matching songs by theme
-        example_songs = generator.find_matching_songs(themes, num_songs, filters)
+        # Find matching songs by theme (extra candidates leave room for artist diversity)
+        example_songs = [item['song'] for item in generator.find_matching_songs(themes, num_songs * 2, filters)]
+    
+    # Fit the best, most varied examples into the prompt budget
+    # (songs the user picked are all kept unless they don't fit)
+    candidates = example_songs
+    example_songs, example_tokens = generator.pack_examples(
+        candidates,
+        max_examples=None if manual_song_ids else num_songs,
+        diverse_artists=not manual_song_ids
+    )
     
     # Generate concept
     concept = generator.generate_concept(user_idea, example_songs)
     
     # Add metadata
-    example_song_names = []
-    for s in example_songs:
-        if 'songs' in s and s['songs']:
-            example_song_names.append(f"{s['songs'].get('title', 'Unknown')} - {s['songs'].get('artist', 'Unknown')}")
+    def song_name(s):
+        return f"{s['songs'].get('title', 'Unknown')} - {s['songs'].get('artist', 'Unknown')}"
+    
+    example_song_names = [song_name(s) for s in example_songs if s.get('songs')]
     
     concept['_meta'] = {
         'user_idea': user_idea,
         'extracted_themes': themes,
         'num_examples': len(example_songs),
-        'example_songs': example_song_names
+        'example_songs': example_song_names,
+        'example_candidates': len(candidates),
+        'example_tokens': example_tokens,
+        'example_token_budget': EXAMPLE_TOKEN_BUDGET
     }
+    if manual_song_ids:
+        # Picked songs that didn't fit the token budget
+        packed_ids = {id(s) for s in example_songs}
+        concept['_meta']['dropped_songs'] = [
+            song_name(s) for s in candidates if id(s) not in packed_ids and s.get('songs')
+        ]
     
     return concept
 
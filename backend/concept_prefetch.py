@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Speculative theme extraction for the concept flow.
+The concept input calls /api/concept/prefetch while the user types; theme
+extraction and candidate scoring start in the background so that
+find-matching-songs and generate-custom-concept can pick up the results
+instead of waiting on the first Claude round trip.
+
+- Keyed by normalized idea text (case and whitespace insensitive)
+- Repeated prefetches of the same idea share one in-flight job
+- Results expire after a few minutes and the store is size-bounded
+"""
+
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeout
+from typing import Dict, Optional, Any
+
+from concept_generator import ConceptGenerator
+
+# Background extraction jobs running at once
+PREFETCH_WORKERS = int(os.getenv("CONCEPT_PREFETCH_WORKERS", "4"))
+
+# Seconds a prefetched result stays usable
+PREFETCH_TTL = int(os.getenv("CONCEPT_PREFETCH_TTL", "600"))
+
+MAX_ENTRIES = 200
+
+# Ideas shorter than this are still being typed and are not worth a Claude call
+MIN_IDEA_WORDS = 4
+
+# How long a request waits for an in-flight prefetch before extracting itself
+DEFAULT_WAIT = 20.0
+
+PREFETCH_ROUTE = '/api/concept/prefetch'
+
+
+def normalize_idea(user_idea: str) -> str:
+    return re.sub(r'\s+', ' ', (user_idea or '').strip().lower())
+
+
+class ConceptPrefetcher:
+    """Background theme extraction + candidate scoring, coalesced per idea."""
+
+    def __init__(self, max_workers: int = PREFETCH_WORKERS, ttl: int = PREFETCH_TTL,
+                 max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='concept-prefetch')
+        self._jobs: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (started_at, future)
+        self._lock = threading.Lock()
+        self._stats = {'started': 0, 'coalesced': 0, 'hits': 0, 'misses': 0, 'skipped': 0}
+
+    def prefetch(self, user_idea: str, num_songs: int = 10, filters: Optional[Dict] = None) -> str:
+        """
+        Start extraction for an idea unless it is already running or cached.
+
+        Returns:
+            'started', 'pending', 'ready' or 'skipped' (idea too short)
+        """
+        key = normalize_idea(user_idea)
+        if len(key.split()) < MIN_IDEA_WORDS:
+            self._stats['skipped'] += 1
+            return 'skipped'
+
+        with self._lock:
+            future = self._live_future(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return 'ready' if future.done() else 'pending'
+
+            future = self._executor.submit(self._run, user_idea, num_songs, filters or {})
+            self._jobs[key] = (time.time(), future)
+            while len(self._jobs) > self.max_entries:
+                self._jobs.popitem(last=False)
+            self._stats['started'] += 1
+            return 'started'
+
+    def get(self, user_idea: str, wait: float = DEFAULT_WAIT) -> Optional[Dict[str, Any]]:
+        """
+        Prefetched result for an idea, waiting up to `wait` seconds for an
+        in-flight job. None when nothing usable was prefetched.
+
+        Returns:
+            {'themes': [...], 'candidates': [...], 'num_songs': int, 'filters': {...}}
+        """
+        key = normalize_idea(user_idea)
+        with self._lock:
+            future = self._live_future(key)
+
+        if future is None:
+            self._stats['misses'] += 1
+            return None
+        try:
+            result = future.result(timeout=wait)
+        except FutureTimeout:
+            self._stats['misses'] += 1
+            return None
+        except Exception as e:
+            print(f"⚠️  Concept prefetch failed, extracting again: {e}")
+            with self._lock:
+                self._jobs.pop(key, None)
+            self._stats['misses'] += 1
+            return None
+
+        self._stats['hits'] += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'cached': len(self._jobs), 'ttl': self.ttl, **self._stats}
+
+    def _live_future(self, key: str) -> Optional[Future]:
+        """In-flight or fresh job for a key (caller holds the lock)."""
+        job = self._jobs.get(key)
+        if job is None:
+            return None
+        started_at, future = job
+        if time.time() - started_at > self.ttl or (future.done() and future.exception() is not None):
+            del self._jobs[key]
+            return None
+        self._jobs.move_to_end(key)
+        return future
+
+    @staticmethod
+    def _run(user_idea: str, num_songs: int, filters: Dict) -> Dict[str, Any]:
+        generator = ConceptGenerator()
+        themes = generator.extract_themes(user_idea, route=PREFETCH_ROUTE)
+        candidates = generator.find_matching_songs(themes, num_songs, filters)
+        print(f"🔮 Prefetched {len(themes)} themes, {len(candidates)} songs for: {user_idea[:60]}")
+        return {'themes': themes, 'candidates': candidates, 'num_songs': num_songs, 'filters': filters}
+
+
+# Shared prefetcher for the API server process
+concept_prefetcher = ConceptPrefetcher()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Adaptive concurrency gateway for rate-limited APIs.
+AIMD (additive increase, multiplicative decrease) limiter shared by every
+Claude call in the process, so imports and API routes run at the highest
+throughput the account allows without an offline calibration run.
+
+- Each successful call raises the limit by ~1 per full window of calls
+- A 429/529 (or rate-limit headers close to zero) cuts the limit in half
+- retry-after is honoured: no new calls start until it has elapsed
+- Transient failures (connection errors, timeouts, 408/409, 5xx) are
+  retried with exponential backoff, as the SDK's own retry loop did
+"""
+
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+# HTTP status codes that mean "slow down"
+THROTTLE_STATUS_CODES = (429, 529)
+
+# HTTP status codes worth retrying after a short backoff (plus any other 5xx)
+TRANSIENT_STATUS_CODES = (408, 409)
+
+# Exception names of network failures that have no status code
+# (anthropic.APIConnectionError / APITimeoutError, httpx and builtin errors)
+TRANSIENT_ERROR_NAMES = ('APIConnectionError', 'APITimeoutError', 'ConnectError', 'ReadTimeout',
+                         'ConnectTimeout', 'RemoteProtocolError', 'ConnectionError', 'TimeoutError')
+
+# Rate-limit headers reported by the Anthropic API on every response
+RATE_LIMIT_HEADER_PAIRS = [
+    ('anthropic-ratelimit-requests-remaining', 'anthropic-ratelimit-requests-limit'),
+    ('anthropic-ratelimit-tokens-remaining', 'anthropic-ratelimit-tokens-limit'),
+    ('anthropic-ratelimit-input-tokens-remaining', 'anthropic-ratelimit-input-tokens-limit'),
+    ('anthropic-ratelimit-output-tokens-remaining', 'anthropic-ratelimit-output-tokens-limit'),
+]
+
+
+class AdaptiveConcurrencyGateway:
+    """Thread-safe AIMD concurrency limiter with retry-after support."""
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease_factor: float = 0.5,
+        max_retries: int = 4,
+        headroom: float = 0.1,
+        default_backoff: float = 2.0,
+        max_transient_retries: int = 2,
+        transient_backoff: float = 0.5,
+        max_transient_backoff: float = 8.0
+    ):
+        """
+        Args:
+            name: Label used in logs and stats
+            initial_limit: Concurrent calls allowed before any feedback
+            min_limit: Floor for the limit after decreases
+            max_limit: Ceiling for the limit after increases
+            decrease_factor: Multiplier applied to the limit on throttling
+            max_retries: Times a throttled call is retried before giving up
+            headroom: Fraction of remaining rate limit below which increases pause
+            default_backoff: Seconds to pause when a 429/529 has no retry-after
+            max_transient_retries: Times a transiently failed call is retried
+            transient_backoff: First backoff (doubling per retry) for transient failures
+            max_transient_backoff: Cap on a single transient backoff
+        """
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self.headroom = headroom
+        self.default_backoff = default_backoff
+        self.max_transient_retries = max_transient_retries
+        self.transient_backoff = transient_backoff
+        self.max_transient_backoff = max_transient_backoff
+
+        self._cond = threading.Condition()
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._hold_increase_until = 0.0
+        self._last_decrease = 0.0
+
+        self._stats = {
+            'successes': 0,
+            'throttles': 0,
+            'retries': 0,
+            'transient_retries': 0,
+            'errors': 0,
+            'peak_in_flight': 0,
+            'peak_limit': int(self._limit)
+        }
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight."""
+        return int(self._limit)
+
+    def acquire(self):
+        """Block until a slot is free and no retry-after pause is active."""
+        with self._cond:
+            while True:
+                wait_for = self._blocked_until - time.monotonic()
+                if wait_for > 0:
+                    self._cond.wait(wait_for)
+                    continue
+                if self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    self._stats['peak_in_flight'] = max(self._stats['peak_in_flight'], self._in_flight)
+                    return
+                self._cond.wait()
+
+    def release(self, outcome: str, retry_after: Optional[float] = None):
+        """
+        Return a slot and adjust the limit.
+
+        Args:
+            outcome: 'success', 'throttled' or 'error' (errors leave the limit unchanged)
+            retry_after: Seconds the server asked us to wait (throttled calls only)
+        """
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+
+            if outcome == 'success':
+                self._stats['successes'] += 1
+                if now >= self._hold_increase_until:
+                    # Additive increase: +1 per full window of successful calls
+                    self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+                    self._stats['peak_limit'] = max(self._stats['peak_limit'], int(self._limit))
+
+            elif outcome == 'throttled':
+                self._stats['throttles'] += 1
+                pause = retry_after if retry_after is not None else self.default_backoff
+                self._blocked_until = max(self._blocked_until, now + pause)
+                # Calls already in flight will throttle too - decrease once per burst
+                if now - self._last_decrease > pause:
+                    old_limit = int(self._limit)
+                    self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+                    self._last_decrease = now
+                    print(f"⚠️  {self.name}: throttled, concurrency {old_limit} → {int(self._limit)}, pausing {pause:.1f}s")
+
+            else:
+                self._stats['errors'] += 1
+
+            self._cond.notify_all()
+
+    def observe_headers(self, headers: Any):
+        """
+        Inspect rate-limit headers from a successful response.
+        Pauses additive increase while any remaining budget is below the headroom.
+        """
+        if not headers:
+            return
+
+        for remaining_header, limit_header in RATE_LIMIT_HEADER_PAIRS:
+            try:
+                remaining = float(headers.get(remaining_header))
+                limit = float(headers.get(limit_header))
+            except (TypeError, ValueError):
+                continue
+
+            if limit > 0 and remaining / limit < self.headroom:
+                with self._cond:
+                    self._hold_increase_until = time.monotonic() + 1.0
+                return
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn() inside a concurrency slot, retrying on 429/529 (after
+        retry-after) and on transient failures (after exponential backoff).
+
+        Args:
+            fn: Zero-argument callable making one API request
+
+        Returns:
+            Whatever fn returns
+        """
+        throttled = transient = 0
+        while True:
+            self.acquire()
+            try:
+                result = fn()
+            except Exception as e:
+                if is_throttle_error(e):
+                    self.release('throttled', retry_after_seconds(e))
+                    if throttled >= self.max_retries:
+                        raise
+                    throttled += 1
+                    with self._cond:
+                        self._stats['retries'] += 1
+                    continue
+
+                self.release('error')
+                if not is_transient_error(e) or transient >= self.max_transient_retries:
+                    raise
+                # Back off outside the slot, with jitter so retries don't line up
+                pause = retry_after_seconds(e)
+                if pause is None:
+                    pause = min(self.max_transient_backoff, self.transient_backoff * 2 ** transient)
+                    pause *= 1 - 0.25 * random.random()
+                transient += 1
+                with self._cond:
+                    self._stats['transient_retries'] += 1
+                time.sleep(pause)
+                continue
+
+            self.release('success')
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit, in-flight count and lifetime counters."""
+        with self._cond:
+            return {
+                'name': self.name,
+                'limit': int(self._limit),
+                'in_flight': self._in_flight,
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'paused_for_seconds': round(max(0.0, self._blocked_until - time.monotonic()), 2),
+                **self._stats
+            }
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """True for rate-limit (429) and overloaded (529) API errors."""
+    return getattr(error, 'status_code', None) in THROTTLE_STATUS_CODES
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for failures that usually succeed on retry: network errors, timeouts, 408/409 and 5xx."""
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return status_code in TRANSIENT_STATUS_CODES or status_code >= 500
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read retry-after (seconds or HTTP date) from an API error's response headers."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# Shared gateway for every Claude call in this process
+anthropic_gateway = AdaptiveConcurrencyGateway(
+    'anthropic',
+    initial_limit=int(os.getenv("ANTHROPIC_INITIAL_CONCURRENCY", "4")),
+    max_limit=int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "64"))
+)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+In-process cache of the song_analysis corpus (analysis + song fields).
+The concept endpoints read from here instead of downloading the whole
+table on every request.
+
+- Read-through: the first request loads the corpus, later ones never wait;
+  warm() starts the load in the background at server startup
+- A background thread polls a cheap watermark (row counts plus the latest
+  song_analysis created_at / updated_at) and rebuilds the corpus and theme
+  index only when it changes, so re-analysis in place is picked up too
+- Rows are stored as slotted records with tuples and interned strings
+- Theme clusters (theme_canonical) are reloaded with the corpus
+- invalidate() forces a rebuild; importers in other processes call
+  notify_corpus_changed(), which hits /api/corpus/invalidate (with the
+  CORPUS_INVALIDATE_TOKEN shared secret when one is set)
+"""
+
+import os
+import sys
+import hmac
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple
+
+from dotenv import load_dotenv
+
+from theme_index import ThemeIndex
+from theme_normalizer import ThemeNormalizer, load_theme_mapping
+from parallel_fetch import fetch_parallel
+
+load_dotenv()
+
+# Columns cached for every song (everything the concept endpoints read)
+SONG_ANALYSIS_COLUMNS = (
+    'song_id, concept_summary, themes, imagery, tone, universal_scenarios, section_breakdown, '
+    'thematic_vocabulary, songs!inner(id, title, artist, year, billboard_rank, genre)'
+)
+
+PAGE_SIZE = 1000
+
+# Seconds between watermark checks
+REFRESH_INTERVAL = int(os.getenv("CORPUS_REFRESH_INTERVAL", "60"))
+
+# Watermark reads get their own small pool: a corpus load can itself run
+# inside a shared parallel_fetch read, and must not queue behind it
+_watermark_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='corpus-watermark')
+
+# Where importers send invalidations
+API_SERVER_URL = os.getenv("API_SERVER_URL", "http://localhost:3001")
+
+# Shared secret for /api/corpus/invalidate; without one only local callers are accepted
+INVALIDATE_TOKEN = os.getenv("CORPUS_INVALIDATE_TOKEN")
+INVALIDATE_TOKEN_HEADER = 'X-Corpus-Token'
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def _text(value: Optional[str]) -> Optional[str]:
+    """Intern short repeated strings (themes, tones, artists, genres)."""
+    return sys.intern(value) if isinstance(value, str) and len(value) <= 64 else value
+
+
+def _texts(values: Optional[List[str]]) -> Tuple[str, ...]:
+    return tuple(_text(v) for v in values or [] if v)
+
+
+class CorpusRow:
+    """One song_analysis row with its song, stored compactly."""
+
+    __slots__ = (
+        'song_id', 'concept_summary', 'themes', 'imagery', 'tone',
+        'universal_scenarios', 'section_breakdown', 'thematic_vocabulary',
+        'title', 'artist', 'year', 'billboard_rank', 'genre'
+    )
+
+    def __init__(self, row: Dict[str, Any]):
+        song = row.get('songs') or {}
+        self.song_id = song.get('id') or row.get('song_id')
+        self.concept_summary = row.get('concept_summary')
+        self.themes = _texts(row.get('themes'))
+        self.imagery = _texts(row.get('imagery'))
+        self.tone = _text(row.get('tone'))
+        self.universal_scenarios = _texts(row.get('universal_scenarios'))
+        self.section_breakdown = _texts(row.get('section_breakdown'))
+        self.thematic_vocabulary = _texts(row.get('thematic_vocabulary'))
+        self.title = song.get('title')
+        self.artist = _text(song.get('artist'))
+        self.year = song.get('year')
+        self.billboard_rank = song.get('billboard_rank')
+        self.genre = _text(song.get('genre'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The row in the shape Supabase returns (with an embedded 'songs' object)."""
+        return {
+            'song_id': self.song_id,
+            'concept_summary': self.concept_summary,
+            'themes': list(self.themes),
+            'imagery': list(self.imagery),
+            'tone': self.tone,
+            'universal_scenarios': list(self.universal_scenarios),
+            'section_breakdown': list(self.section_breakdown),
+            'thematic_vocabulary': list(self.thematic_vocabulary),
+            'songs': {
+                'id': self.song_id,
+                'title': self.title,
+                'artist': self.artist,
+                'year': self.year,
+                'billboard_rank': self.billboard_rank,
+                'genre': self.genre
+            }
+        }
+
+
+class SongCorpusCache:
+    """Read-through corpus cache with watermark-based background refresh."""
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._supabase = None
+        self._index: Optional[ThemeIndex] = None
+        self._by_song_id: Dict[Any, CorpusRow] = {}
+        self._watermark: Optional[Tuple] = None
+        self._load_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._invalidated = False
+        self._refresher: Optional[threading.Thread] = None
+        self._stats = {'loads': 0, 'last_load_seconds': None, 'loaded_at': None, 'invalidations': 0}
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            from supabase import create_client
+            self._supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        return self._supabase
+
+    def get_index(self) -> ThemeIndex:
+        """Theme index over the whole corpus (loads it on first use)."""
+        if self._index is None:
+            with self._load_lock:
+                if self._index is None:
+                    self._reload()
+                    self._start_refresher()
+        return self._index
+
+    def warm(self):
+        """Load the corpus in a background thread (no-op once loaded)."""
+        if self._index is None:
+            threading.Thread(target=self._warm, name='corpus-warm', daemon=True).start()
+
+    def rows_for_song_ids(self, song_ids: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Rows for specific songs, in the order requested (unknown ids skipped).
+        Served from the cache; before it has loaded, the rows are queried
+        directly and the load starts in the background, so callers never wait
+        for the whole corpus.
+        """
+        if self._index is None:
+            self.warm()
+            result = self.supabase.table('song_analysis').select(SONG_ANALYSIS_COLUMNS)\
+                .in_('song_id', list(song_ids)).order('id').execute()
+            by_song_id = {}
+            for row in result.data or []:
+                by_song_id.setdefault(row['song_id'], CorpusRow(row))
+        else:
+            by_song_id = self._by_song_id
+        return [by_song_id[song_id].to_dict() for song_id in song_ids if song_id in by_song_id]
+
+    def invalidate(self):
+        """Rebuild on the next refresh cycle, which starts immediately."""
+        self._invalidated = True
+        self._stats['invalidations'] += 1
+        self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            'songs': len(index) if index is not None else 0,
+            'themes': len(index.vocab) if index is not None else 0,
+            'watermark': list(self._watermark) if self._watermark else None,
+            'refresh_interval': self.refresh_interval,
+            **self._stats
+        }
+
+    def _current_watermark(self) -> Tuple:
+        """
+        Row counts of song_analysis and songs plus the newest song_analysis
+        created_at and updated_at - cheap to fetch, changes on import and on
+        re-analysis (updated_at needs add_song_analysis_updated_at.sql; it is
+        None until then).
+        """
+        def count(table):
+            return lambda: self.supabase.table(table).select('id', count='exact').limit(1).execute().count
+
+        def latest(column):
+            def read():
+                result = self.supabase.table('song_analysis').select(column)\
+                    .order(column, desc=True, nullsfirst=False).limit(1).execute()
+                return (result.data or [{}])[0].get(column)
+            return read
+
+        marks = fetch_parallel(
+            {'song_analysis': count('song_analysis'), 'songs': count('songs'),
+             'created_at': latest('created_at'), 'updated_at': latest('updated_at')},
+            defaults={'updated_at': None},
+            executor=_watermark_executor
+        )
+        return (marks['song_analysis'], marks['songs'], marks['created_at'], marks['updated_at'])
+
+    def _load_rows(self) -> List[CorpusRow]:
+        rows = []
+        offset = 0
+        while True:
+            # Page on the unique id: song_id repeats (duplicate analyses), and
+            # offset paging on a non-unique key can skip or repeat rows
+            result = self.supabase.table('song_analysis').select(SONG_ANALYSIS_COLUMNS)\
+                .order('id').range(offset, offset + PAGE_SIZE - 1).execute()
+            page = result.data or []
+            rows.extend(CorpusRow(row) for row in page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            offset += PAGE_SIZE
+
+    def _reload(self):
+        """Load the corpus and swap in a new index (readers keep the old one meanwhile)."""
+        start = time.time()
+        watermark = self._current_watermark()
+        rows = self._load_rows()
+        index = ThemeIndex(rows, ThemeNormalizer(load_theme_mapping(self.supabase)))
+
+        by_song_id = {}
+        for row in rows:
+            by_song_id.setdefault(row.song_id, row)
+
+        self._index, self._by_song_id, self._watermark = index, by_song_id, watermark
+        self._stats['loads'] += 1
+        self._stats['last_load_seconds'] = round(time.time() - start, 2)
+        self._stats['loaded_at'] = time.time()
+        print(f"🗂️  Song corpus loaded: {len(index)} songs, {len(index.vocab)} themes "
+              f"in {self._stats['last_load_seconds']}s")
+
+    def _warm(self):
+        try:
+            self.get_index()
+        except Exception as e:
+            print(f"⚠️  Song corpus warm-up failed: {e}")
+
+    def _start_refresher(self):
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, name='corpus-refresh', daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            try:
+                invalidated, self._invalidated = self._invalidated, False
+                if invalidated or self._current_watermark() != self._watermark:
+                    with self._load_lock:
+                        self._reload()
+            except Exception as e:
+                print(f"⚠️  Song corpus refresh failed: {e}")
+
+
+# Shared cache for the API server process
+song_corpus = SongCorpusCache()
+
+
+def invalidation_allowed(remote_addr: Optional[str], token: Optional[str]) -> bool:
+    """
+    Whether an invalidation request may proceed: the shared secret must
+    match when INVALIDATE_TOKEN is set, otherwise the caller must be local.
+    """
+    if INVALIDATE_TOKEN:
+        return bool(token) and hmac.compare_digest(token, INVALIDATE_TOKEN)
+    return remote_addr in LOCAL_ADDRESSES
+
+
+def notify_corpus_changed(base_url: str = API_SERVER_URL):
+    """
+    Tell a running API server that song_analysis changed (for import scripts).
+    Failures are ignored - the server's watermark check catches up anyway.
+    """
+    try:
+        import requests
+        headers = {INVALIDATE_TOKEN_HEADER: INVALIDATE_TOKEN} if INVALIDATE_TOKEN else {}
+        requests.post(f"{base_url}/api/corpus/invalidate", headers=headers, timeout=2)
+    except Exception as e:
+        print(f"⚠️  Could not notify API server of corpus change: {e}")
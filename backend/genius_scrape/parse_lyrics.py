@@ -7,6 +7,48 @@ Returns structured data ready for database storage.
 import re
 
 
+# Section marker like [Verse 1], [Chorus], [Bridge: Artist]
+SECTION_MARKER = re.compile(r'\[(.*?)\]')
+
+
+def split_sections(raw_lyrics):
+    """
+    Split raw lyrics into sections, keeping each line's position.
+    
+    Args:
+        raw_lyrics: String with section markers like "[Verse 1]\nlyrics..."
+    
+    Returns:
+        List of dicts with 'section_name' and 'lines' (list of (line_number, text)).
+        Line numbers are 1-based positions in raw_lyrics. Lines before the first
+        marker are returned with section_name None.
+        Example: [
+            {'section_name': 'Verse 1', 'lines': [(2, "I'm going under"), (3, '...')]},
+            {'section_name': 'Chorus', 'lines': [(6, 'I need somebody'), ...]}
+        ]
+    """
+    if not raw_lyrics:
+        return []
+    
+    sections = []
+    current = {'section_name': None, 'lines': []}
+    
+    for line_number, line in enumerate(raw_lyrics.split('\n'), 1):
+        section_match = SECTION_MARKER.match(line.strip())
+        
+        if section_match:
+            if current['lines']:
+                sections.append(current)
+            current = {'section_name': section_match.group(1), 'lines': []}
+        else:
+            current['lines'].append((line_number, line))
+    
+    if current['lines']:
+        sections.append(current)
+    
+    return sections
+
+
 def parse_lyrics(raw_lyrics):
     """
     Parse raw lyrics text into sections.
@@ -26,42 +68,16 @@ def parse_lyrics(raw_lyrics):
     
     print("Parsing lyrics into sections...")
     
-    sections = []
-    
-    # Split by lines
-    lines = raw_lyrics.split('\n')
-    
-    current_section = None
-    current_lyrics = []
-    
-    for line in lines:
-        # Check if line is a section marker like [Verse 1], [Chorus], etc.
-        section_match = re.match(r'\[(.*?)\]', line.strip())
-        
-        if section_match:
-            # Save previous section if it exists
-            if current_section and current_lyrics:
-                sections.append({
-                    'section_name': current_section,
-                    'lyrics_text': '\n'.join(current_lyrics).strip()
-                })
-            
-            # Start new section
-            current_section = section_match.group(1)
-            current_lyrics = []
-        else:
-            # Add line to current section
-            if current_section:
-                current_lyrics.append(line)
-    
-    # Save the last section
-    if current_section and current_lyrics:
-        sections.append({
-            'section_name': current_section,
-            'lyrics_text': '\n'.join(current_lyrics).strip()
-        })
+    # Lines before the first section marker are not stored
+    sections = [
+        {
+            'section_name': section['section_name'],
+            'lyrics_text': '\n'.join(text for _, text in section['lines']).strip()
+        }
+        for section in split_sections(raw_lyrics)
+        if section['section_name']
+    ]
     
     print(f"✓ Parsed {len(sections)} sections")
     
     return sections
-
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 from supabase import create_client
 from song_analyzer import SongAnalyzer
 from lyrics_client import MultiSourceLyricsClient
+from corpus_cache import notify_corpus_changed
 
 load_dotenv()
 
@@ -113,6 +114,8 @@ async def main():
     results = await asyncio.gather(*tasks)
     
     successful = sum(1 for r in results if r)
+    if successful:
+        notify_corpus_changed()
     print()
     print("=" * 60)
     print(f"✅ Imported {successful}/{len(missing)} songs")
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Key estimation from chords.
+Scores all 24 major/minor keys against a chord-tone histogram using the
+Krumhansl-Kessler key profiles (correlation), plus a bonus for how often
+each key's tonic chord is played. Scores become a confidence value via a
+softmax, so relative major/minor ambiguity shows up as low confidence.
+
+estimate_key() handles one progression (the melody search input);
+estimate_keys() scores a whole corpus in one vectorized NumPy pass.
+
+Batch job (fills songs.musical_key where Ultimate Guitar had no tonality):
+    python key_inference.py              # write estimates
+    python key_inference.py --dry-run    # report, write nothing
+"""
+
+import os
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from chord_algebra import NOTES, NOTE_TO_SEMITONE, parse_chord, parse_chord_list, normalize_tonality
+
+load_dotenv()
+
+# Krumhansl-Kessler probe-tone profiles (C major / C minor)
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+# Key index i: 0-11 = major keys on NOTES[i], 12-23 = minor keys on NOTES[i - 12]
+KEY_NAMES = list(NOTES) + [note + 'm' for note in NOTES]
+
+CHORD_TONES = {'': (0, 4, 7), 'm': (0, 3, 7), 'dim': (0, 3, 6), 'aug': (0, 4, 8)}
+
+# Chords without a third (say nothing about major or minor)
+SUS2_TONES = (0, 2, 7)
+SUS4_TONES = (0, 5, 7)
+POWER_TONES = (0, 7)
+
+# Histogram weight of a chord's root relative to its other tones
+ROOT_WEIGHT = 2.0
+
+# Score bonus per share of chords that are the key's tonic chord
+TONIC_WEIGHT = 0.5
+
+# Score bonus when a single progression starts on the key's tonic chord
+FIRST_CHORD_WEIGHT = 0.15
+
+# Softmax temperature turning scores into confidence
+TEMPERATURE = 0.05
+
+# Estimates at or above this confidence fill a missing musical_key
+MIN_FILL_CONFIDENCE = float(os.getenv("KEY_INFERENCE_MIN_CONFIDENCE", "0.6"))
+
+PAGE_SIZE = 1000
+UPSERT_BATCH_SIZE = 500
+
+# songs columns read and written by the batch job (track_name and artist_id
+# are NOT NULL, so every upserted row carries them)
+SONG_KEY_COLUMNS = (
+    'track_name', 'artist_id', 'musical_key',
+    'musical_key_inferred', 'musical_key_confidence', 'musical_key_source'
+)
+
+
+@dataclass
+class KeyEstimate:
+    """Most likely key for a set of chords."""
+    key: str             # UG-style tonality: "G", "F#m"
+    confidence: float    # 0-1
+    runner_up: str       # Second most likely key
+
+    @property
+    def root(self) -> str:
+        return self.key[:-1] if self.key.endswith('m') else self.key
+
+    @property
+    def is_major(self) -> bool:
+        return not self.key.endswith('m')
+
+
+def _zscore(matrix: np.ndarray) -> np.ndarray:
+    centered = matrix - matrix.mean(axis=-1, keepdims=True)
+    std = centered.std(axis=-1, keepdims=True)
+    return np.divide(centered, std, out=np.zeros_like(centered), where=std > 0)
+
+
+# 24 x 12 standardized profiles, one row per key
+KEY_PROFILES = _zscore(np.array(
+    [np.roll(MAJOR_PROFILE, i) for i in range(12)] + [np.roll(MINOR_PROFILE, i) for i in range(12)]
+))
+
+
+def chord_shape(chord: str) -> Optional[Tuple[int, Tuple[int, ...], Optional[int]]]:
+    """
+    (root semitone, chord-tone intervals, index of the key it is the tonic
+    chord of) for a chord name; the key index is None for chords that are
+    not plain major or minor triads (sus, power, dim, aug). None when the
+    chord can't be parsed.
+    """
+    parsed = parse_chord(chord.split('/')[0])
+    if parsed is None or parsed.root not in NOTE_TO_SEMITONE:
+        return None
+    root = NOTE_TO_SEMITONE[parsed.root]
+    suffix = parsed.suffix.lower()
+    if not parsed.quality and 'sus' in suffix:
+        return root, SUS2_TONES if 'sus2' in suffix else SUS4_TONES, None
+    if not parsed.quality and suffix.startswith('5'):
+        return root, POWER_TONES, None
+    if parsed.quality in ('', 'm'):
+        return root, CHORD_TONES[parsed.quality], root + (12 if parsed.quality == 'm' else 0)
+    return root, CHORD_TONES[parsed.quality], None
+
+
+def chord_features(chords: Sequence[str]) -> Optional[tuple]:
+    """
+    Pitch-class histogram (12) and tonic-chord shares (24) for a chord list.
+    None when no chord could be parsed.
+    """
+    histogram = np.zeros(12)
+    tonic_counts = np.zeros(24)
+    parsed_count = 0
+    for chord in chords:
+        shape = chord_shape(chord)
+        if shape is None:
+            continue
+        root, tones, tonic = shape
+        for i, interval in enumerate(tones):
+            histogram[(root + interval) % 12] += ROOT_WEIGHT if i == 0 else 1.0
+        if tonic is not None:
+            tonic_counts[tonic] += 1
+        parsed_count += 1
+    if not parsed_count:
+        return None
+    return histogram, tonic_counts / parsed_count
+
+
+def estimate_keys(histograms: np.ndarray, tonic_shares: np.ndarray,
+                  first_chords: Optional[np.ndarray] = None) -> tuple:
+    """
+    Vectorized key scores for N chord sets.
+
+    Args:
+        histograms: N x 12 pitch-class histograms
+        tonic_shares: N x 24 share of chords that are each key's tonic chord
+        first_chords: Optional N x 24 one-hot of the opening chord's key
+
+    Returns:
+        (best key index N, confidence N, runner-up key index N)
+    """
+    correlation = _zscore(histograms) @ KEY_PROFILES.T / 12
+    scores = correlation + TONIC_WEIGHT * tonic_shares
+    if first_chords is not None:
+        scores = scores + FIRST_CHORD_WEIGHT * first_chords
+
+    exp = np.exp((scores - scores.max(axis=1, keepdims=True)) / TEMPERATURE)
+    probabilities = exp / exp.sum(axis=1, keepdims=True)
+    ranked = np.argsort(-scores, axis=1)
+    best = ranked[:, 0]
+    return best, probabilities[np.arange(len(best)), best], ranked[:, 1]
+
+
+def estimate_key(chords: Sequence[str]) -> Optional[KeyEstimate]:
+    """
+    Key of a single progression. The opening chord counts as a weak hint
+    for the tonic, since short progressions usually start on it.
+    """
+    features = chord_features(chords)
+    if features is None:
+        return None
+    histogram, tonic_shares = features
+
+    first_chord = np.zeros(24)
+    first = chord_shape(chords[0]) if chords else None
+    if first is not None and first[2] is not None:
+        first_chord[first[2]] = 1
+
+    best, confidence, runner_up = estimate_keys(histogram[None, :], tonic_shares[None, :], first_chord[None, :])
+    return KeyEstimate(KEY_NAMES[best[0]], round(float(confidence[0]), 3), KEY_NAMES[runner_up[0]])
+
+
+def estimate_song_keys(song_chords: Dict[Any, List[str]]) -> Dict[Any, KeyEstimate]:
+    """
+    Keys for many songs at once.
+
+    Args:
+        song_chords: {song_id: every chord of the song, all sections}
+    """
+    song_ids, histograms, tonic_shares = [], [], []
+    for song_id, chords in song_chords.items():
+        features = chord_features(chords)
+        if features is not None:
+            song_ids.append(song_id)
+            histograms.append(features[0])
+            tonic_shares.append(features[1])
+    if not song_ids:
+        return {}
+
+    best, confidence, runner_up = estimate_keys(np.array(histograms), np.array(tonic_shares))
+    return {
+        song_id: KeyEstimate(KEY_NAMES[b], round(float(c), 3), KEY_NAMES[r])
+        for song_id, b, c, r in zip(song_ids, best, confidence, runner_up)
+    }
+
+
+def load_song_chords(supabase) -> tuple:
+    """({song_id: [chords]}, {song_id: songs row (SONG_KEY_COLUMNS)}) from song_chords pages."""
+    chords: Dict[Any, List[str]] = {}
+    songs: Dict[Any, Dict[str, Any]] = {}
+    offset = 0
+    while True:
+        result = supabase.table('song_chords')\
+            .select(f"song_id, chords_original, songs({', '.join(SONG_KEY_COLUMNS)})")\
+            .order('chord_id').range(offset, offset + PAGE_SIZE - 1).execute()
+        page = result.data or []
+        for row in page:
+            chords.setdefault(row['song_id'], []).extend(parse_chord_list(row.get('chords_original')))
+            songs[row['song_id']] = row.get('songs') or {}
+        if len(page) < PAGE_SIZE:
+            return chords, songs
+        offset += PAGE_SIZE
+
+
+def _changed(song: Dict[str, Any], update: Dict[str, Any]) -> bool:
+    for column, value in update.items():
+        stored = song.get(column)
+        if column == 'musical_key_confidence' and stored is not None:
+            if abs(float(stored) - value) > 0.0005:
+                return True
+        elif stored != value:
+            return True
+    return False
+
+
+def infer_song_keys(dry_run: bool = False) -> Dict[str, int]:
+    """
+    Estimate every song's key from its chords and record it.
+
+    - No usable musical_key: filled with the estimate when confidence is
+      at least MIN_FILL_CONFIDENCE (source 'inferred'), otherwise left empty
+      and flagged (source 'inferred_low_confidence')
+    - Existing musical_key: kept; flagged (source 'conflict') when a
+      confident estimate disagrees with it
+    - Keys filled by an earlier run (source 'inferred') are re-estimated
+
+    The estimate and its confidence are always stored in
+    musical_key_inferred / musical_key_confidence. Only songs whose values
+    change are written, in upsert batches.
+    """
+    from supabase import create_client
+    supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+    print("🎹 Loading song chords...")
+    song_chords, songs = load_song_chords(supabase)
+    estimates = estimate_song_keys(song_chords)
+    print(f"🔑 Estimated keys for {len(estimates)} of {len(song_chords)} songs")
+
+    totals = Counter()
+    updates = []
+    for song_id, estimate in estimates.items():
+        song = songs.get(song_id) or {}
+        source = song.get('musical_key_source')
+        # Keys this job filled earlier are re-estimated, not defended
+        stored = None if source == 'inferred' else normalize_tonality(song.get('musical_key'))
+        update = {
+            'musical_key': song.get('musical_key'),
+            'musical_key_inferred': estimate.key,
+            'musical_key_confidence': estimate.confidence,
+            'musical_key_source': None if source == 'conflict' else source
+        }
+        if stored is None:
+            if estimate.confidence >= MIN_FILL_CONFIDENCE:
+                update.update(musical_key=estimate.key, musical_key_source='inferred')
+                totals['filled'] += 1
+            else:
+                if source == 'inferred':
+                    update['musical_key'] = None
+                update['musical_key_source'] = 'inferred_low_confidence'
+                totals['low_confidence'] += 1
+        elif stored != estimate.key and estimate.confidence >= MIN_FILL_CONFIDENCE:
+            update['musical_key_source'] = 'conflict'
+            totals['conflicts'] += 1
+            if dry_run and totals['conflicts'] <= 20:
+                print(f"  ⚠️  song {song_id}: stored {stored}, chords say {estimate.key} ({estimate.confidence:.0%})")
+        else:
+            totals['agree' if stored == estimate.key else 'kept'] += 1
+        if _changed(song, update) and song.get('track_name'):
+            updates.append({'song_id': song_id, 'track_name': song['track_name'],
+                            'artist_id': song.get('artist_id'), **update})
+            if update['musical_key'] != song.get('musical_key'):
+                totals['keys_changed'] += 1
+
+    totals['changed'] = len(updates)
+    print(f"📊 filled {totals['filled']}, low confidence {totals['low_confidence']}, "
+          f"conflicts {totals['conflicts']}, agreeing {totals['agree']}, kept {totals['kept']}; "
+          f"{len(updates)} songs changed")
+    if dry_run:
+        return dict(totals)
+
+    for start in range(0, len(updates), UPSERT_BATCH_SIZE):
+        supabase.table('songs').upsert(updates[start:start + UPSERT_BATCH_SIZE], on_conflict='song_id').execute()
+        print(f"  {min(start + UPSERT_BATCH_SIZE, len(updates))}/{len(updates)} songs updated")
+
+    if totals['keys_changed']:
+        # Re-derive the Roman numerals of songs whose key changed
+        from reprocess_chords import reprocess_chords
+        reprocess_chords()
+    print("✅ Key inference complete!")
+    return dict(totals)
+
+
+if __name__ == "__main__":
+    infer_song_keys(dry_run='--dry-run' in sys.argv)
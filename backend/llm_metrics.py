@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+LLM call instrumentation.
+Thin wrappers around Claude and Whisper calls that record route, model,
+latency, token usage, cache hits, cost and errors for every request.
+
+Records are kept in a rolling in-memory window (served by /api/metrics)
+and appended to a JSONL log for offline analysis.
+"""
+
+import os
+import json
+import math
+import time
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from concurrency_gateway import anthropic_gateway
+
+# Rolling window size per (route, task) group
+WINDOW_SIZE = 500
+
+# JSONL log location (one JSON object per call)
+LOG_PATH = os.getenv(
+    "LLM_METRICS_LOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_calls.jsonl")
+)
+
+# USD per million tokens: (input, output, cache_write, cache_read)
+MODEL_PRICING = {
+    "claude-sonnet-4-5-20250929": (3.00, 15.00, 3.75, 0.30),
+    "claude-sonnet-4-20250514": (3.00, 15.00, 3.75, 0.30),
+    "claude-haiku-4-5-20251001": (1.00, 5.00, 1.25, 0.10),
+}
+
+
+class LLMMetrics:
+    """Thread-safe rolling store of LLM call records."""
+
+    def __init__(self, window_size: int = WINDOW_SIZE, log_path: Optional[str] = LOG_PATH):
+        self.window_size = window_size
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._windows: Dict[tuple, deque] = {}
+        self._totals: Dict[tuple, Dict[str, float]] = {}
+        self.started_at = datetime.now(timezone.utc).isoformat()
+
+    def record(self, record: Dict[str, Any]):
+        """Add a call record to the rolling window, lifetime totals and JSONL log."""
+        key = (record['route'], record['task'])
+
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = deque(maxlen=self.window_size)
+                self._totals[key] = {'calls': 0, 'errors': 0, 'cost_usd': 0.0}
+            window.append(record)
+
+            totals = self._totals[key]
+            totals['calls'] += 1
+            if record.get('error'):
+                totals['errors'] += 1
+            totals['cost_usd'] += record.get('cost_usd') or 0.0
+
+            if self.log_path:
+                try:
+                    with open(self.log_path, 'a') as f:
+                        f.write(json.dumps(record) + "\n")
+                except OSError as e:
+                    print(f"⚠️  Could not write LLM metrics log: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summarize each (route, task) group: rolling percentiles plus lifetime totals."""
+        with self._lock:
+            groups = {key: list(window) for key, window in self._windows.items()}
+            totals = {key: dict(t) for key, t in self._totals.items()}
+
+        summaries = []
+        for (route, task), records in groups.items():
+            latencies = sorted(r['latency_ms'] for r in records)
+            successes = [r for r in records if not r.get('error')]
+            cache_hits = sum(1 for r in successes if r.get('cache_read_tokens'))
+
+            summaries.append({
+                'route': route,
+                'task': task,
+                'models': sorted({r['model'] for r in records if r.get('model')}),
+                'window_calls': len(records),
+                'window_errors': len(records) - len(successes),
+                'latency_ms': {
+                    'p50': _percentile(latencies, 50),
+                    'p90': _percentile(latencies, 90),
+                    'p99': _percentile(latencies, 99),
+                    'max': latencies[-1] if latencies else None
+                },
+                'tokens': {
+                    'input_avg': _average(successes, 'input_tokens'),
+                    'output_avg': _average(successes, 'output_tokens'),
+                    'cache_read_total': sum(r.get('cache_read_tokens') or 0 for r in successes),
+                    'cache_write_total': sum(r.get('cache_write_tokens') or 0 for r in successes)
+                },
+                'cache_hit_rate': round(cache_hits / len(successes), 3) if successes else None,
+                'lifetime': {
+                    'calls': int(totals[(route, task)]['calls']),
+                    'errors': int(totals[(route, task)]['errors']),
+                    'cost_usd': round(totals[(route, task)]['cost_usd'], 4)
+                }
+            })
+
+        summaries.sort(key=lambda s: (s['route'], s['task']))
+        return {
+            'started_at': self.started_at,
+            'window_size': self.window_size,
+            'groups': summaries
+        }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[index], 1)
+
+
+def _average(records: List[Dict[str, Any]], field: str) -> Optional[float]:
+    values = [r[field] for r in records if r.get(field) is not None]
+    return round(sum(values) / len(values), 1) if values else None
+
+
+def current_route() -> str:
+    """Flask route of the current request, or 'cli' for scripts and background work."""
+    try:
+        from flask import has_request_context, request
+    except ImportError:
+        return 'cli'
+    if has_request_context():
+        return request.path
+    return 'cli'
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int,
+                  cache_write_tokens: int = 0, cache_read_tokens: int = 0) -> Optional[float]:
+    """Estimate the USD cost of a Claude call from its token usage."""
+    pricing = MODEL_PRICING.get(model)
+    if not pricing:
+        return None
+    input_price, output_price, write_price, read_price = pricing
+    cost = (
+        input_tokens * input_price
+        + output_tokens * output_price
+        + cache_write_tokens * write_price
+        + cache_read_tokens * read_price
+    ) / 1_000_000
+    return round(cost, 6)
+
+
+# Global metrics store shared by every wrapper call in this process
+metrics = LLMMetrics()
+
+
+def create_message(client, task: str, route: Optional[str] = None, **kwargs):
+    """
+    Instrumented replacement for client.messages.create().
+
+    Args:
+        client: Anthropic client
+        task: Short label for what the call does (e.g., "concept.extract_themes")
+        route: Route that triggered the call (defaults to the current Flask path)
+        **kwargs: Passed straight through to messages.create()
+
+    Returns:
+        The Anthropic Message response
+
+    Calls run through the shared AIMD concurrency gateway, which retries
+    429/529 responses after honouring retry-after, and connection errors,
+    timeouts, 408/409 and 5xx responses after a short backoff.
+    """
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'provider': 'anthropic',
+        'route': route or current_route(),
+        'task': task,
+        'model': kwargs.get('model'),
+        'error': None
+    }
+    attempts = []
+
+    def send():
+        # The gateway owns retries (throttling and transient errors), so disable the SDK's loop
+        api = client.with_options(max_retries=0) if hasattr(client, 'with_options') else client
+        attempts.append(time.perf_counter())
+        raw_create = getattr(api.messages, 'with_raw_response', None)
+        if raw_create is None:
+            return api.messages.create(**kwargs)
+        raw = raw_create.create(**kwargs)
+        anthropic_gateway.observe_headers(raw.headers)
+        return raw.parse()
+
+    start = time.perf_counter()
+
+    try:
+        response = anthropic_gateway.call(send)
+    except Exception as e:
+        record['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        record['attempts'] = len(attempts)
+        record['error'] = f"{type(e).__name__}: {str(e)[:200]}"
+        record['status_code'] = getattr(e, 'status_code', None)
+        metrics.record(record)
+        raise
+
+    end = time.perf_counter()
+    record['latency_ms'] = round((end - start) * 1000, 1)
+    record['queue_ms'] = round((attempts[0] - start) * 1000, 1) if attempts else 0.0
+    record['attempts'] = len(attempts)
+
+    usage = getattr(response, 'usage', None)
+    input_tokens = getattr(usage, 'input_tokens', 0) or 0
+    output_tokens = getattr(usage, 'output_tokens', 0) or 0
+    cache_write_tokens = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    cache_read_tokens = getattr(usage, 'cache_read_input_tokens', 0) or 0
+
+    record.update({
+        'input_tokens': input_tokens,
+        'output_tokens': output_tokens,
+        'cache_write_tokens': cache_write_tokens,
+        'cache_read_tokens': cache_read_tokens,
+        'stop_reason': getattr(response, 'stop_reason', None),
+        'cost_usd': estimate_cost(record['model'], input_tokens, output_tokens,
+                                  cache_write_tokens, cache_read_tokens)
+    })
+    metrics.record(record)
+
+    return response
+
+
+def transcribe_audio(client, task: str, route: Optional[str] = None, **kwargs):
+    """
+    Instrumented replacement for client.audio.transcriptions.create() (Whisper).
+
+    Args:
+        client: OpenAI client
+        task: Short label for what the call does (e.g., "real_talk.whisper")
+        route: Route that triggered the call (defaults to the current Flask path)
+        **kwargs: Passed straight through to audio.transcriptions.create()
+
+    Returns:
+        The transcription response
+    """
+    audio_bytes = None
+    audio_file = kwargs.get('file')
+    if hasattr(audio_file, 'fileno'):
+        try:
+            audio_bytes = os.fstat(audio_file.fileno()).st_size
+        except OSError:
+            pass
+
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'provider': 'openai',
+        'route': route or current_route(),
+        'task': task,
+        'model': kwargs.get('model'),
+        'audio_bytes': audio_bytes,
+        'error': None
+    }
+    start = time.perf_counter()
+
+    try:
+        response = client.audio.transcriptions.create(**kwargs)
+    except Exception as e:
+        record['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        record['error'] = f"{type(e).__name__}: {str(e)[:200]}"
+        record['status_code'] = getattr(e, 'status_code', None)
+        metrics.record(record)
+        raise
+
+    record['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    metrics.record(record)
+
+    return response
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Result cache for melody search.
+Users keep searching the same handful of progressions (I V vi IV) at
+nearby tempos, and every miss costs a multi-second Claude call. Results
+are cached under the canonical progression loop (so rotations and repeats
+share an entry), a BPM bucket, the time signature and the normalized
+filter set.
+
+Stale-while-revalidate: a fresh entry is served as is; a stale one is
+served immediately while a background refresh replaces it; only entries
+past the stale window (or never seen) make the request wait.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from progression_loops import canonical_loop, collapse_repeats
+
+# Seconds an entry is served without refreshing
+FRESH_TTL = int(os.getenv("MELODY_CACHE_TTL", "3600"))
+
+# Seconds after that an entry is still served while it refreshes
+STALE_TTL = int(os.getenv("MELODY_CACHE_STALE_TTL", "86400"))
+
+# Tempos within one bucket share results
+BPM_BUCKET = int(os.getenv("MELODY_CACHE_BPM_BUCKET", "5"))
+
+MAX_ENTRIES = 500
+
+REFRESH_WORKERS = 2
+
+
+def melody_cache_key(
+    numerals: List[str],
+    bpm: int,
+    bpm_tolerance: int,
+    time_signature: Optional[str],
+    genres: Optional[List[str]] = None,
+    year_start: Optional[int] = None,
+    year_end: Optional[int] = None,
+    chart_position: Optional[str] = None,
+    artist_style: Optional[str] = None
+) -> str:
+    """
+    Cache key for a search.
+
+    Args:
+        numerals: Query progression in the stored C major frame
+            (progression_index.to_c_frame)
+    """
+    progression = canonical_loop(numerals) or tuple(collapse_repeats(numerals, cyclic=False))
+    return json.dumps({
+        'progression': list(progression),
+        'bpm': round(int(bpm) / BPM_BUCKET),
+        'bpm_tolerance': int(bpm_tolerance),
+        'time_signature': time_signature or '',
+        'genres': sorted({g.strip().lower() for g in (genres or []) if g.strip()}),
+        'year_start': year_start or None,
+        'year_end': year_end or None,
+        'chart_position': (chart_position or '').strip().lower(),
+        'artist_style': ' '.join((artist_style or '').lower().split())
+    }, sort_keys=True)
+
+
+class StaleWhileRevalidateCache:
+    """Thread-safe LRU cache that refreshes stale entries in the background."""
+
+    def __init__(self, name: str, fresh_ttl: int = FRESH_TTL, stale_ttl: int = STALE_TTL,
+                 max_entries: int = MAX_ENTRIES):
+        self.name = name
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (stored_at, value)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix=f'{name}-refresh')
+        self._stats = {'fresh': 0, 'stale': 0, 'misses': 0, 'refreshed': 0, 'refresh_errors': 0}
+
+    def get(self, key: str, compute: Callable[[], Any],
+            should_cache: Callable[[Any], bool] = bool) -> Tuple[Any, str]:
+        """
+        Cached value for key, computing it when missing or expired.
+
+        Args:
+            compute: Produces the value (also used for background refreshes)
+            should_cache: Values it rejects (default: empty ones) are returned
+                but not stored
+
+        Returns:
+            (value, 'fresh' | 'stale' | 'miss')
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age <= self.fresh_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['fresh'] += 1
+                    return entry[1], 'fresh'
+                if age <= self.fresh_ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['stale'] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._executor.submit(self._refresh, key, compute, should_cache)
+                    return entry[1], 'stale'
+                del self._entries[key]
+            self._stats['misses'] += 1
+
+        value = compute()
+        if should_cache(value):
+            self._store(key, value)
+        return value, 'miss'
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'refreshing': len(self._refreshing),
+                'fresh_ttl': self.fresh_ttl,
+                'stale_ttl': self.stale_ttl,
+                **self._stats
+            }
+
+    def _store(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _refresh(self, key: str, compute: Callable[[], Any], should_cache: Callable[[Any], bool]):
+        try:
+            value = compute()
+            if should_cache(value):
+                self._store(key, value)
+                self._stats['refreshed'] += 1
+        except Exception as e:
+            print(f"⚠️  {self.name} cache refresh failed: {e}")
+            self._stats['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+# Shared melody search cache for the API server process
+melody_search_cache = StaleWhileRevalidateCache('melody-search')
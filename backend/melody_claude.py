@@ -8,10 +8,12 @@ Claude provides ALL song data - no external API needed for metadata.
 import os
 import json
 import re
+from collections import Counter
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, asdict
 from anthropic import Anthropic
 from dotenv import load_dotenv
+from llm_metrics import create_message
 
 load_dotenv()
 
@@ -20,7 +22,7 @@ anthropic = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
 @dataclass
 class MelodySong:
-    """A song found by Claude."""
+    """A song found by Claude or in our own chord data."""
     rank: int              # 1-10, Claude's match confidence ranking
     song_name: str
     artist_name: str
@@ -28,6 +30,9 @@ class MelodySong:
     bpm: int
     genre: str
     year: int
+    source: str = 'claude' # 'corpus' when matched in song_chords (verified)
+    section: str = ''      # Matched section for verified songs ("Chorus", "Verse 1", ...)
+    verified: bool = False # Chords and BPM come from song_chords, not Claude's claim
     
     def to_dict(self) -> dict:
         return asdict(self)
@@ -112,12 +117,52 @@ Return ONLY a JSON array, no other text:
     return prompt
 
 
+# Liked songs listed individually in the "more" prompt (the rest are summarized)
+LIKED_EXAMPLES = 5
+
+# Most recent seen songs listed in the "more" prompt; older ones are filtered
+# out locally after the response instead
+EXCLUSION_WINDOW = 30
+
+
+def summarize_liked_songs(liked_songs: List[MelodySong]) -> str:
+    """
+    Compact description of the liked songs: genre, BPM and year spread plus
+    a few examples, so the prompt stays the same size however many are liked.
+    """
+    genres = Counter(s.genre for s in liked_songs if s.genre)
+    bpms = [s.bpm for s in liked_songs if s.bpm]
+    years = [s.year for s in liked_songs if s.year]
+    artists = list(dict.fromkeys(s.artist_name for s in liked_songs if s.artist_name))
+    
+    lines = [f"- {len(liked_songs)} songs liked"]
+    if genres:
+        lines.append("- Genres: " + ', '.join(f"{genre} ({count})" for genre, count in genres.most_common(5)))
+    if bpms:
+        lines.append(f"- BPM: {min(bpms)}-{max(bpms)}")
+    if years:
+        lines.append(f"- Years: {min(years)}-{max(years)}")
+    if artists:
+        more = f" and {len(artists) - 10} more" if len(artists) > 10 else ""
+        lines.append(f"- Artists: {', '.join(artists[:10])}{more}")
+    lines.append("- Examples:")
+    for song in liked_songs[:LIKED_EXAMPLES]:
+        lines.append(f"  - {song.artist_name} - {song.song_name} (BPM: {song.bpm}, Genre: {song.genre}, Chords: {song.chorus_chords})")
+    return "\n".join(lines)
+
+
 def build_more_like_these_prompt(
     original_criteria: Dict[str, Any],
     liked_songs: List[MelodySong],
-    excluded_songs: List[str]  # List of "Artist - Title" strings
+    excluded_songs: List[str],  # List of "Artist - Title" strings, most recent last
+    excluded_total: Optional[int] = None
 ) -> str:
-    """Build prompt for finding more songs similar to liked ones."""
+    """
+    Build prompt for finding more songs similar to liked ones.
+    
+    Only the last EXCLUSION_WINDOW excluded songs are listed; excluded_total
+    (all songs seen so far) tells Claude how many more it has already given.
+    """
     
     # Format the original search criteria
     progression = ' → '.join(original_criteria.get('roman_numerals', []))
@@ -126,14 +171,15 @@ def build_more_like_these_prompt(
     bpm_tolerance = original_criteria.get('bpm_tolerance', 10)
     time_sig = original_criteria.get('time_signature', '4/4')
     
-    # Format liked songs
-    liked_lines = []
-    for song in liked_songs:
-        liked_lines.append(f"- {song.artist_name} - {song.song_name} (BPM: {song.bpm}, Genre: {song.genre}, Chords: {song.chorus_chords})")
-    liked_section = "\n".join(liked_lines)
+    # Summarize liked songs
+    liked_section = summarize_liked_songs(liked_songs)
     
-    # Format excluded songs
-    excluded_section = "\n".join(f"- {s}" for s in excluded_songs) if excluded_songs else "None"
+    # Format the most recent excluded songs
+    window = excluded_songs[-EXCLUSION_WINDOW:]
+    excluded_section = "\n".join(f"- {s}" for s in window) if window else "None"
+    earlier = (excluded_total or len(excluded_songs)) - len(window)
+    if earlier > 0:
+        excluded_section += f"\n(plus {earlier} earlier suggestions - prefer less obvious picks)"
     
     prompt = f"""Find 10 MORE songs similar to the user's selections.
 
@@ -215,11 +261,15 @@ def find_matching_songs(
     year_start: int = None,
     year_end: int = None,
     chart_position: str = None,
-    artist_style: str = None
+    artist_style: str = None,
+    route: str = None
 ) -> List[MelodySong]:
     """
     Use Claude to find songs with matching chorus progressions.
     
+    Args:
+        route: Route for call metrics (needed when called off the request thread)
+    
     Returns:
         List of MelodySong objects sorted by rank
     """
@@ -240,7 +290,10 @@ def find_matching_songs(
     print("🎵 Asking Claude for song suggestions...")
     
     try:
-        response = anthropic.messages.create(
+        response = create_message(
+            anthropic,
+            task="melody.search",
+            route=route,
             model="claude-sonnet-4-5-20250929",
             max_tokens=2000,
             messages=[{"role": "user", "content": prompt}]
@@ -260,7 +313,8 @@ def find_matching_songs(
 def find_more_like_these(
     original_criteria: Dict[str, Any],
     liked_songs: List[MelodySong],
-    excluded_songs: List[str]
+    excluded_songs: List[str],
+    excluded_total: Optional[int] = None
 ) -> List[MelodySong]:
     """
     Find more songs similar to the ones the user liked.
@@ -268,7 +322,9 @@ def find_more_like_these(
     Args:
         original_criteria: The original search parameters
         liked_songs: Songs the user wants more like
-        excluded_songs: List of "Artist - Title" strings to exclude
+        excluded_songs: "Artist - Title" strings to exclude, most recent last
+            (only the last EXCLUSION_WINDOW go into the prompt)
+        excluded_total: Number of songs seen so far, if more than listed
         
     Returns:
         List of new MelodySong suggestions
@@ -276,13 +332,16 @@ def find_more_like_these(
     prompt = build_more_like_these_prompt(
         original_criteria=original_criteria,
         liked_songs=liked_songs,
-        excluded_songs=excluded_songs
+        excluded_songs=excluded_songs,
+        excluded_total=excluded_total
     )
     
     print("🎵 Asking Claude for more songs like your selections...")
     
     try:
-        response = anthropic.messages.create(
+        response = create_message(
+            anthropic,
+            task="melody.more",
             model="claude-sonnet-4-5-20250929",
             max_tokens=2000,
             messages=[{"role": "user", "content": prompt}]
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Harmonic mixing index: "songs that mix with this".
+Groups songs by Camelot key, each group holding its songs sorted by BPM,
+so a query is a pair of binary searches per compatible key and tempo:
+
+- Compatible keys (Camelot wheel): same key, one step either way
+  (8A → 7A, 9A) and the relative major/minor (8A → 8B)
+- Tempos: the target BPM plus half and double time (a 70 BPM song
+  mixes with a 140 BPM one)
+
+Songs are keyed by GetSongBPM's camelot_key, which is stored in Open Key
+notation ("4m", "1d"); Camelot ("8A") and key names ("F#m") are also
+accepted, and songs without one fall back to musical_key.
+"""
+
+import os
+import re
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from chord_algebra import NOTE_INDEX, normalize_tonality
+
+load_dotenv()
+
+SONG_COLUMNS = (
+    'song_id, track_name, bpm, camelot_key, musical_key, danceability, acousticness, '
+    'chart_year, song_genres, artists(artist_name, artist_genres)'
+)
+
+PAGE_SIZE = 1000
+
+# Seconds before the index is rebuilt in the background
+REFRESH_INTERVAL = int(os.getenv("MIX_INDEX_REFRESH", "900"))
+
+# Key relations in result order
+KEY_RELATION_PRIORITY = {'same': 0, 'relative': 1, 'adjacent': 2}
+
+# Tempo multipliers tried against the target BPM, in result order
+TEMPO_RELATIONS = (('same', 1.0), ('double', 2.0), ('half', 0.5))
+
+CAMELOT_PATTERN = re.compile(r'^(1[0-2]|[1-9])\s*([ABDM])$', re.IGNORECASE)
+
+CamelotKey = Tuple[int, str]   # (1-12, 'A' minor | 'B' major)
+
+
+def key_to_camelot(key: Optional[str]) -> Optional[CamelotKey]:
+    """(8, 'B') for "C", (8, 'A') for "Am"; None for unknown keys."""
+    tonality = normalize_tonality(key)
+    if tonality is None:
+        return None
+    is_minor = tonality.endswith('m')
+    semitone = NOTE_INDEX[tonality[:-1] if is_minor else tonality]
+    # Minor keys sit on their relative major's number; each fifth is one step
+    major_semitone = (semitone + 3) % 12 if is_minor else semitone
+    return (major_semitone * 7 + 7) % 12 + 1, 'A' if is_minor else 'B'
+
+
+def parse_camelot(value: Optional[str]) -> Optional[CamelotKey]:
+    """
+    Camelot key from Camelot ("8A"), Open Key ("1m", "1d") or a key name
+    ("Am", "C major"). None when it can't be read.
+    """
+    text = str(value or '').strip()
+    match = CAMELOT_PATTERN.match(text)
+    if not match:
+        return key_to_camelot(text)
+    number, letter = int(match.group(1)), match.group(2).upper()
+    if letter in ('A', 'B'):
+        return number, letter
+    # Open Key 1d/1m is Camelot 8B/8A
+    return (number + 6) % 12 + 1, 'A' if letter == 'M' else 'B'
+
+
+def format_camelot(key: CamelotKey) -> str:
+    return f"{key[0]}{key[1]}"
+
+
+def compatible_keys(key: CamelotKey) -> List[Tuple[CamelotKey, str]]:
+    """Keys that mix with key, with their relation."""
+    number, letter = key
+    return [
+        (key, 'same'),
+        ((number, 'B' if letter == 'A' else 'A'), 'relative'),
+        ((number % 12 + 1, letter), 'adjacent'),
+        (((number - 2) % 12 + 1, letter), 'adjacent')
+    ]
+
+
+@dataclass
+class MixSong:
+    """One song's mixing data."""
+    song_id: Any
+    title: str
+    artist: str
+    bpm: float
+    camelot: CamelotKey
+    musical_key: Optional[str]
+    danceability: Optional[int]
+    acousticness: Optional[int]
+    year: Optional[int]
+    genres: Tuple[str, ...]
+
+
+def _song_from_row(row: Dict[str, Any]) -> Optional[MixSong]:
+    artist = row.get('artists') or {}
+    camelot = parse_camelot(row.get('camelot_key')) or key_to_camelot(row.get('musical_key'))
+    try:
+        bpm = float(row.get('bpm') or 0)
+    except (TypeError, ValueError):
+        bpm = 0
+    if camelot is None or bpm <= 0 or not row.get('track_name'):
+        return None
+    genres = tuple(g.lower() for g in (row.get('song_genres') or artist.get('artist_genres') or []) if g)
+    return MixSong(
+        song_id=row.get('song_id'),
+        title=row.get('track_name'),
+        artist=artist.get('artist_name') or '',
+        bpm=bpm,
+        camelot=camelot,
+        musical_key=row.get('musical_key'),
+        danceability=row.get('danceability'),
+        acousticness=row.get('acousticness'),
+        year=row.get('chart_year'),
+        genres=genres
+    )
+
+
+def _in_range(value: Optional[int], low: Optional[int], high: Optional[int]) -> bool:
+    if low is None and high is None:
+        return True
+    if value is None:
+        return False
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+class MixIndex:
+    """Per Camelot key: songs sorted by BPM with a parallel BPM array."""
+
+    def __init__(self, songs: List[MixSong]):
+        self.songs_by_id: Dict[Any, MixSong] = {song.song_id: song for song in songs}
+        self.by_key: Dict[CamelotKey, Tuple[List[float], List[MixSong]]] = {}
+        grouped: Dict[CamelotKey, List[MixSong]] = {}
+        for song in songs:
+            grouped.setdefault(song.camelot, []).append(song)
+        for key, key_songs in grouped.items():
+            key_songs.sort(key=lambda song: song.bpm)
+            self.by_key[key] = ([song.bpm for song in key_songs], key_songs)
+
+    def __len__(self) -> int:
+        return len(self.songs_by_id)
+
+    def bpm_range(self, key: CamelotKey, low: float, high: float) -> List[MixSong]:
+        """Songs in key with low <= BPM <= high."""
+        bpms, songs = self.by_key.get(key, ([], []))
+        return songs[bisect_left(bpms, low):bisect_right(bpms, high)]
+
+    def search(
+        self,
+        key: CamelotKey,
+        bpm: float,
+        bpm_tolerance: float = 3,
+        half_double: bool = True,
+        danceability: Tuple[Optional[int], Optional[int]] = (None, None),
+        acousticness: Tuple[Optional[int], Optional[int]] = (None, None),
+        genres: Optional[List[str]] = None,
+        exclude_song_id: Any = None,
+        limit: int = 25
+    ) -> List[Dict[str, Any]]:
+        """
+        Songs that mix with a key and tempo, best first: same key before
+        relative before adjacent, then closest tempo.
+
+        Args:
+            bpm_tolerance: Allowed BPM difference (after half/double time)
+            danceability, acousticness: (min, max) facet ranges, 0-100
+        """
+        wanted_genres = [g.lower() for g in genres or []]
+        tempos = TEMPO_RELATIONS if half_double else TEMPO_RELATIONS[:1]
+        best: Dict[Any, Tuple[tuple, Dict[str, Any]]] = {}
+
+        for candidate_key, key_relation in compatible_keys(key):
+            for tempo_relation, multiplier in tempos:
+                target = bpm * multiplier
+                for song in self.bpm_range(candidate_key, target - bpm_tolerance, target + bpm_tolerance):
+                    if song.song_id == exclude_song_id:
+                        continue
+                    if not _in_range(song.danceability, *danceability):
+                        continue
+                    if not _in_range(song.acousticness, *acousticness):
+                        continue
+                    if wanted_genres and not any(w in genre for w in wanted_genres for genre in song.genres):
+                        continue
+
+                    bpm_difference = abs(song.bpm - target)
+                    rank = (KEY_RELATION_PRIORITY[key_relation], bpm_difference, multiplier != 1.0)
+                    if song.song_id in best and best[song.song_id][0] <= rank:
+                        continue
+                    best[song.song_id] = (rank, {
+                        'song_id': song.song_id,
+                        'song_name': song.title,
+                        'artist_name': song.artist,
+                        'bpm': song.bpm,
+                        'camelot_key': format_camelot(song.camelot),
+                        'musical_key': song.musical_key,
+                        'danceability': song.danceability,
+                        'acousticness': song.acousticness,
+                        'year': song.year,
+                        'genres': list(song.genres),
+                        'key_relation': key_relation,
+                        'tempo_relation': tempo_relation,
+                        'bpm_difference': round(bpm_difference, 1)
+                    })
+
+        return [result for _, result in sorted(best.values(), key=lambda item: item[0])[:limit]]
+
+
+class MixIndexCache:
+    """Read-through index over songs, rebuilt in the background when stale."""
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._supabase = None
+        self._index: Optional[MixIndex] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            from supabase import create_client
+            self._supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        return self._supabase
+
+    def get_index(self) -> MixIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._build()
+        elif time.time() - self._built_at > self.refresh_interval and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, name='mix-index-refresh', daemon=True).start()
+        return self._index
+
+    def invalidate(self):
+        """Rebuild on the next request (the old index is served meanwhile)."""
+        self._built_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            'songs': len(index) if index is not None else 0,
+            'keys': len(index.by_key) if index is not None else 0,
+            'built_at': self._built_at or None,
+            'refresh_interval': self.refresh_interval
+        }
+
+    def _load_songs(self) -> List[MixSong]:
+        songs = []
+        offset = 0
+        while True:
+            result = self.supabase.table('songs').select(SONG_COLUMNS)\
+                .order('song_id').range(offset, offset + PAGE_SIZE - 1).execute()
+            page = result.data or []
+            songs.extend(s for s in (_song_from_row(row) for row in page) if s)
+            if len(page) < PAGE_SIZE:
+                return songs
+            offset += PAGE_SIZE
+
+    def _build(self):
+        start = time.time()
+        index = MixIndex(self._load_songs())
+        self._index, self._built_at = index, time.time()
+        print(f"🎧 Mix index built: {len(index)} songs in {len(index.by_key)} keys "
+              f"in {time.time() - start:.2f}s")
+
+    def _refresh(self):
+        try:
+            with self._lock:
+                self._build()
+        except Exception as e:
+            print(f"⚠️  Mix index refresh failed: {e}")
+        finally:
+            self._refreshing = False
+
+
+# Shared index for the API server process
+mix_index = MixIndexCache()
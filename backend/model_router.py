@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Model routing for short, structured Claude tasks.
+Theme extraction, title generation, figurative filtering, demographics and
+Real Talk scoring go to the fast model first. Each task has a validator
+for its output (JSON shape, item counts, values that must come from the
+input); when the fast model's output fails validation or the call errors,
+the same request is retried once on the full model. If the full model's
+output fails too, a lenient fallback parser (when the task has one) salvages
+what it can instead of failing the request.
+
+A task whose recent fast-model success rate drops too low is sent straight
+to the full model, with an occasional fast probe so it can recover.
+Per-task counters are served under /api/metrics for tuning.
+"""
+
+import os
+import re
+import json
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from llm_metrics import create_message
+
+FAST_MODEL = os.getenv("FAST_MODEL", "claude-haiku-4-5-20251001")
+FULL_MODEL = os.getenv("FULL_MODEL", "claude-sonnet-4-5-20250929")
+
+# Set MODEL_ROUTER_ENABLED=0 to send every routed task to the full model
+ROUTER_ENABLED = os.getenv("MODEL_ROUTER_ENABLED", "1") != "0"
+
+# Recent fast-model outcomes kept per task
+OUTCOME_WINDOW = 50
+
+# Below this fast success rate (with enough samples) a task skips the fast model...
+MIN_FAST_SUCCESS_RATE = 0.6
+MIN_SAMPLES = 10
+
+# ...except for one probe call in this many
+PROBE_EVERY = 10
+
+
+class OutputValidationError(ValueError):
+    """Model output that doesn't satisfy the task's validator."""
+
+
+def _strip_code_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('```')[1]
+        if text.startswith('json'):
+            text = text[4:]
+        text = text.strip()
+    return text
+
+
+def parse_json_array(text: str) -> List[Any]:
+    """The JSON array in a model response (code fences and chatter allowed)."""
+    match = re.search(r'\[.*\]', _strip_code_fence(text), re.DOTALL)
+    if not match:
+        raise OutputValidationError("no JSON array in response")
+    try:
+        value = json.loads(match.group())
+    except ValueError as e:
+        raise OutputValidationError(f"invalid JSON array: {e}")
+    if not isinstance(value, list):
+        raise OutputValidationError("expected a JSON array")
+    return value
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """The JSON object in a model response (code fences and chatter allowed)."""
+    match = re.search(r'\{.*\}', _strip_code_fence(text), re.DOTALL)
+    if not match:
+        raise OutputValidationError("no JSON object in response")
+    try:
+        value = json.loads(match.group())
+    except ValueError as e:
+        raise OutputValidationError(f"invalid JSON object: {e}")
+    if not isinstance(value, dict):
+        raise OutputValidationError("expected a JSON object")
+    return value
+
+
+def string_list(min_items: int = 1, max_items: Optional[int] = None) -> Callable[[str], List[str]]:
+    """
+    Validator: JSON array of non-empty strings with a bounded length.
+    Its .lenient fallback keeps the strings it finds, capped at max_items.
+    """
+    def validate(text: str) -> List[str]:
+        items = parse_json_array(text)
+        if not all(isinstance(item, str) and item.strip() for item in items):
+            raise OutputValidationError("expected only non-empty strings")
+        if len(items) < min_items or (max_items is not None and len(items) > max_items):
+            raise OutputValidationError(f"expected {min_items}-{max_items or 'any'} items, got {len(items)}")
+        return items
+
+    def lenient(text: str) -> List[str]:
+        items = [item for item in parse_json_array(text) if isinstance(item, str) and item.strip()]
+        return items[:max_items] if max_items is not None else items
+
+    validate.lenient = lenient
+    return validate
+
+
+def _valid_score(value: Any, low: float = 0, high: float = 10) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and low <= value <= high
+
+
+class ModelRouter:
+    """Chooses fast vs. full model per task and tracks how routing goes."""
+
+    def __init__(self, fast_model: str = FAST_MODEL, full_model: str = FULL_MODEL,
+                 enabled: bool = ROUTER_ENABLED):
+        self.fast_model = fast_model
+        self.full_model = full_model
+        self.enabled = enabled
+        self._outcomes: Dict[str, deque] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, client, task: str, validate: Callable[[str], Any],
+               route: Optional[str] = None, fallback: Optional[Callable[[str], Any]] = None,
+               **kwargs) -> Any:
+        """
+        Run a Claude call on the fast model, escalating on failure.
+
+        Args:
+            client: Anthropic client
+            task: Task label (also used for llm_metrics)
+            validate: Parses the response text; raises OutputValidationError
+                (or ValueError) when the output is unusable
+            route: Route for metrics (defaults to the current Flask path)
+            fallback: Best-effort parser for a full-model reply that fails
+                validate (defaults to validate.lenient, if it has one)
+            **kwargs: messages.create() arguments, without model
+
+        Returns:
+            The validated output from whichever model produced it, or the
+            fallback's parse of the full model's output
+        """
+        if self._use_fast(task):
+            try:
+                response = create_message(client, task=task, route=route, model=self.fast_model, **kwargs)
+                result = validate(response.content[0].text)
+                self._record(task, 'fast_ok', fast_ok=True)
+                return result
+            except ValueError as e:
+                print(f"⬆️  {task}: fast model output rejected ({e}), escalating")
+                self._record(task, 'escalated_invalid', fast_ok=False)
+            except Exception as e:
+                print(f"⬆️  {task}: fast model call failed ({type(e).__name__}), escalating")
+                self._record(task, 'escalated_error', fast_ok=False)
+        else:
+            self._record(task, 'full_direct')
+
+        response = create_message(client, task=task, route=route, model=self.full_model, **kwargs)
+        text = response.content[0].text
+        try:
+            return validate(text)
+        except ValueError as e:
+            self._record(task, 'full_invalid')
+            fallback = fallback or getattr(validate, 'lenient', None)
+            if fallback is None:
+                raise
+            print(f"⚠️  {task}: full model output rejected ({e}), using best-effort parse")
+            result = fallback(text)
+            self._record(task, 'full_lenient')
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tasks = {}
+            for task, counters in self._counters.items():
+                outcomes = self._outcomes.get(task) or ()
+                tasks[task] = {
+                    **counters,
+                    'recent_fast_success_rate': round(sum(outcomes) / len(outcomes), 3) if outcomes else None,
+                    'recent_fast_samples': len(outcomes)
+                }
+        return {
+            'enabled': self.enabled,
+            'fast_model': self.fast_model,
+            'full_model': self.full_model,
+            'tasks': tasks
+        }
+
+    def _use_fast(self, task: str) -> bool:
+        if not self.enabled:
+            return False
+        with self._lock:
+            outcomes = self._outcomes.get(task)
+            if not outcomes or len(outcomes) < MIN_SAMPLES:
+                return True
+            if sum(outcomes) / len(outcomes) >= MIN_FAST_SUCCESS_RATE:
+                return True
+            counters = self._counters.setdefault(task, {})
+            counters['skipped_fast'] = counters.get('skipped_fast', 0) + 1
+            return counters['skipped_fast'] % PROBE_EVERY == 0
+
+    def _record(self, task: str, counter: str, fast_ok: Optional[bool] = None):
+        with self._lock:
+            counters = self._counters.setdefault(task, {})
+            counters[counter] = counters.get(counter, 0) + 1
+            if fast_ok is not None:
+                self._outcomes.setdefault(task, deque(maxlen=OUTCOME_WINDOW)).append(1 if fast_ok else 0)
+
+
+# Shared router for the process
+model_router = ModelRouter()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Run independent data reads (Supabase queries, cache lookups) concurrently.
+Routes that need several unrelated reads before they can build a prompt
+wait for the slowest read instead of the sum of all of them.
+
+All reads share one timeout budget. A read that fails or is still running
+when the budget is spent falls back to its default, or raises if it has none.
+"""
+
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+# Shared pool for short blocking reads
+FETCH_WORKERS = 16
+
+# Seconds all reads of one fetch_parallel call may take together
+DEFAULT_TIMEOUT = 10.0
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='parallel-fetch')
+
+
+class FetchTimeout(TimeoutError):
+    """A read without a default didn't finish within the shared budget."""
+
+
+def fetch_parallel(
+    reads: Dict[str, Callable[[], Any]],
+    timeout: float = DEFAULT_TIMEOUT,
+    defaults: Optional[Dict[str, Any]] = None,
+    executor: Optional[Executor] = None
+) -> Dict[str, Any]:
+    """
+    Run reads concurrently and collect their results.
+
+    Args:
+        reads: {name: zero-argument function}
+        timeout: Seconds for all reads together
+        defaults: {name: value} used when that read fails or times out;
+            reads without a default re-raise their error (or FetchTimeout)
+        executor: Pool to run the reads on (default: the shared pool). Code
+            that may itself run inside a shared-pool read must use its own,
+            or nested reads can wait on workers that are all busy
+
+    Returns:
+        {name: result}
+    """
+    defaults = defaults or {}
+    futures = {name: (executor or _executor).submit(read) for name, read in reads.items()}
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            if name not in defaults:
+                raise FetchTimeout(f"{name} did not finish within {timeout}s")
+            print(f"⏱️  {name} timed out after {timeout}s, using default")
+            results[name] = defaults[name]
+            continue
+
+        error = future.exception()
+        if error is not None:
+            if name not in defaults:
+                raise error
+            print(f"⚠️  {name} failed, using default: {error}")
+            results[name] = defaults[name]
+        else:
+            results[name] = future.result()
+
+    return results
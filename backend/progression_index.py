@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Chord progression index for melody search.
+Indexes every song_chords section by the n-grams of its simplified Roman
+numerals (chords_roman_simplified), with section type, BPM, key and chart
+data attached, so a progression search is answered from our own scraped
+songs in milliseconds. Claude is only asked to extend these results.
+
+Stored numerals are in the C major frame (minor-key songs are transposed
+to A minor, so their tonic is vi), which makes matching key-independent.
+Queries are converted into the same frame before searching. Sections are
+also indexed by the loops they play (progression_loops), so a looping query
+matches every rotation and repetition with one lookup.
+"""
+
+import os
+import re
+import time
+import difflib
+import hashlib
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple, Any
+
+from dotenv import load_dotenv
+
+from chord_algebra import simplify_chord, transpose_to_c, convert_to_roman, normalize_tonality, parse_chord_list
+from progression_loops import canonical_loop, section_loops, collapse_repeats
+from progression_similarity import BKTree, max_distance_for, similarity, window_distance
+
+load_dotenv()
+
+# song_chords columns loaded for the index (song fields come from the v2 songs table)
+SECTION_COLUMNS = (
+    'song_id, section_name, chords_original_simplified, chords_roman_simplified, '
+    'songs(track_name, bpm, time_signature, musical_key, chart_year, peak_position, song_genres, '
+    'artists(artist_name, artist_genres))'
+)
+
+PAGE_SIZE = 1000
+
+# Seconds before the index is rebuilt in the background
+REFRESH_INTERVAL = int(os.getenv("PROGRESSION_INDEX_REFRESH", "900"))
+
+# Section types in result order (chorus matches first)
+SECTION_PRIORITY = {'chorus': 0, 'post-chorus': 1, 'pre-chorus': 2, 'verse': 3, 'bridge': 4, 'other': 5}
+
+# Sections sharing fewer than this share of the query's bigrams are not candidates
+MIN_BIGRAM_OVERLAP = 0.5
+
+# Match kinds in result order: contains the progression, plays it as a loop
+# (any rotation or repetition), shares enough bigrams, is a near match by
+# harmonic edit distance
+MATCH_PRIORITY = {'exact': 0, 'loop': 1, 'partial': 2, 'similar': 3}
+
+# Sections longer than this (after collapsing held chords) are only fuzzy-matched by their loops
+MAX_FUZZY_LENGTH = 16
+
+# Near-match sequences fetched per requested result (some fail the filters)
+FUZZY_OVERFETCH = 5
+
+# difflib ratio needed to treat two artist or title spellings as the same
+FUZZY_NAME_CUTOFF = 0.85
+
+# Verified suggestions below this progression similarity rank after unverified ones
+MIN_VERIFIED_SIMILARITY = 0.6
+
+# Degree shift from a minor-key numbering (i = tonic) into the C major frame (vi = tonic)
+MINOR_DEGREES = ['I', 'II', 'III', 'IV', 'V', 'VI', 'VII']
+
+
+def section_type(section_name: str) -> str:
+    """Normalize a section label ("Chorus 2", "Pre-Chorus", "Hook") to its type."""
+    name = (section_name or '').lower()
+    if 'pre' in name and 'chorus' in name:
+        return 'pre-chorus'
+    if 'post' in name and 'chorus' in name:
+        return 'post-chorus'
+    if 'chorus' in name or 'hook' in name or 'refrain' in name:
+        return 'chorus'
+    if 'verse' in name:
+        return 'verse'
+    if 'bridge' in name:
+        return 'bridge'
+    return 'other'
+
+
+def to_c_frame(roman_numerals: List[str], original_chords: List[str], key: Optional[str]) -> List[str]:
+    """
+    Express a query progression in the stored frame (simplified numerals in C major).
+
+    Args:
+        roman_numerals: chord_converter numerals (used when the input was numerals)
+        original_chords: The chords as entered
+        key: chord_converter key string ("A minor", "Unknown major", ...)
+    """
+    tonality = normalize_tonality(key)
+    if tonality:
+        return [convert_to_roman(transpose_to_c(tonality, simplify_chord(chord))) for chord in original_chords]
+
+    # Numerals entered directly; a lowercase "i" tonic means minor-key numbering.
+    # Anything that isn't a scale degree once stripped ("", "IIII") is skipped
+    numerals = [re.sub(r'[^IViv]', '', numeral) for numeral in roman_numerals]
+    numerals = [numeral for numeral in numerals if numeral.upper() in MINOR_DEGREES]
+    if numerals and numerals[0] == 'i':
+        shifted = []
+        for numeral in numerals:
+            degree = MINOR_DEGREES.index(numeral.upper())
+            target = MINOR_DEGREES[(degree + 5) % 7]
+            shifted.append(target.lower() if numeral.islower() else target)
+        numerals = shifted
+    return numerals
+
+
+def _bigrams(chords: Tuple[str, ...]) -> List[Tuple[str, str]]:
+    return list(zip(chords, chords[1:]))
+
+
+def _contains(sequence: Tuple[str, ...], query: Tuple[str, ...]) -> bool:
+    """True if query appears contiguously in sequence."""
+    n = len(query)
+    return any(sequence[i:i + n] == query for i in range(len(sequence) - n + 1))
+
+
+@dataclass
+class SectionProgression:
+    """One song section's chords plus the song data search filters on."""
+    song_id: Any
+    title: str
+    artist: str
+    section_name: str
+    section_type: str
+    numerals: Tuple[str, ...]
+    chords: Tuple[str, ...]
+    bpm: Optional[int]
+    time_signature: Optional[str]
+    musical_key: Optional[str]
+    year: Optional[int]
+    peak_position: Optional[int]
+    genres: Tuple[str, ...]
+
+
+def _section_from_row(row: Dict[str, Any]) -> Optional[SectionProgression]:
+    song = row.get('songs') or {}
+    artist = song.get('artists') or {}
+    numerals = tuple(parse_chord_list(row.get('chords_roman_simplified')))
+    if len(numerals) < 2 or not song.get('track_name'):
+        return None
+    genres = tuple(g.lower() for g in (song.get('song_genres') or artist.get('artist_genres') or []) if g)
+    return SectionProgression(
+        song_id=row.get('song_id'),
+        title=song.get('track_name'),
+        artist=artist.get('artist_name') or '',
+        section_name=row.get('section_name') or '',
+        section_type=section_type(row.get('section_name')),
+        numerals=numerals,
+        chords=tuple(parse_chord_list(row.get('chords_original_simplified'))),
+        bpm=song.get('bpm'),
+        time_signature=song.get('time_signature'),
+        musical_key=song.get('musical_key'),
+        year=song.get('chart_year'),
+        peak_position=song.get('peak_position'),
+        genres=genres
+    )
+
+
+def _normalize_name(text: str) -> str:
+    text = (text or '').lower().replace('&', ' and ')
+    text = re.sub(r'[\(\[].*?[\)\]]', ' ', text)                  # (feat. X), [Remix]
+    text = re.sub(r'\s(feat|ft|featuring|with)\b.*$', ' ', text)     # trailing features
+    text = re.sub(r'[^a-z0-9]+', ' ', text).strip()
+    return re.sub(r'^the ', '', text)
+
+
+def song_identity(artist: str, title: str) -> Tuple[str, str]:
+    """
+    Normalized (primary artist, title) for joining and de-duplicating songs:
+    case, punctuation, featured artists, bracketed versions and a leading
+    "The" are ignored.
+    """
+    primary = re.split(r',|\s(?:x|&|and|feat\.?|ft\.?|featuring|with)\s', artist or '', flags=re.IGNORECASE)[0]
+    return _normalize_name(primary), _normalize_name(title)
+
+
+def song_hash(artist: str, title: str) -> int:
+    """64-bit hash of song_identity, for compact seen-sets."""
+    digest = hashlib.blake2b('\x1f'.join(song_identity(artist, title)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def chart_limit(chart_position: Optional[str]) -> Optional[int]:
+    """"Top 20" → 20."""
+    match = re.search(r'\d+', chart_position or '')
+    return int(match.group()) if match else None
+
+
+class ProgressionIndex:
+    """Bigram and canonical-loop postings over section numerals, plus
+    BK-trees of section loops and sequences for near matches."""
+
+    def __init__(self, sections: List[SectionProgression]):
+        self.sections = sections
+        self.postings: Dict[Tuple[str, str], List[int]] = {}
+        self.loop_postings: Dict[Tuple[str, ...], List[int]] = {}
+        # Loops are matched against every rotation of the query, whole sections only as entered
+        self.loop_tree = BKTree()
+        self.sequence_tree = BKTree()
+        for i, section in enumerate(sections):
+            for bigram in set(_bigrams(section.numerals)):
+                self.postings.setdefault(bigram, []).append(i)
+            for loop in section_loops(section.numerals):
+                self.loop_postings.setdefault(loop, []).append(i)
+                self.loop_tree.add(loop, i)
+            collapsed = tuple(collapse_repeats(section.numerals, cyclic=False))
+            if len(collapsed) <= MAX_FUZZY_LENGTH:
+                self.sequence_tree.add(collapsed, i)
+        self.song_count = len(set(section.song_id for section in sections))
+
+        # Song lookup for verifying Claude suggestions
+        self.sections_by_song: Dict[Tuple[str, str], List[int]] = {}
+        self.titles_by_artist: Dict[str, List[str]] = {}
+        for i, section in enumerate(sections):
+            identity = song_identity(section.artist, section.title)
+            if identity not in self.sections_by_song:
+                self.titles_by_artist.setdefault(identity[0], []).append(identity[1])
+            self.sections_by_song.setdefault(identity, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def find_song(self, artist: str, title: str) -> List[SectionProgression]:
+        """
+        Sections of a song by artist and title, matched fuzzily (normalized
+        names, then close spellings of the artist and title). Empty if we
+        don't have it.
+        """
+        artist_key, title_key = song_identity(artist, title)
+        if artist_key not in self.titles_by_artist:
+            close = difflib.get_close_matches(artist_key, self.titles_by_artist.keys(), n=1, cutoff=FUZZY_NAME_CUTOFF)
+            if not close:
+                return []
+            artist_key = close[0]
+        if (artist_key, title_key) not in self.sections_by_song:
+            close = difflib.get_close_matches(title_key, self.titles_by_artist[artist_key], n=1,
+                                              cutoff=FUZZY_NAME_CUTOFF)
+            if not close:
+                return []
+            title_key = close[0]
+        return [self.sections[i] for i in self.sections_by_song[(artist_key, title_key)]]
+
+    def _passes(self, section: SectionProgression, bpm: Optional[int], bpm_tolerance: int,
+                time_signature: Optional[str], genres: Optional[List[str]], year_start: Optional[int],
+                year_end: Optional[int], max_position: Optional[int]) -> bool:
+        if bpm and section.bpm and abs(section.bpm - bpm) > bpm_tolerance:
+            return False
+        if time_signature and section.time_signature and section.time_signature != time_signature:
+            return False
+        if year_start and (not section.year or section.year < year_start):
+            return False
+        if year_end and (not section.year or section.year > year_end):
+            return False
+        if max_position and (not section.peak_position or section.peak_position > max_position):
+            return False
+        if genres:
+            wanted = [g.lower() for g in genres]
+            if not any(w in genre for w in wanted for genre in section.genres):
+                return False
+        return True
+
+    def search(
+        self,
+        numerals: List[str],
+        bpm: Optional[int] = None,
+        bpm_tolerance: int = 10,
+        time_signature: Optional[str] = None,
+        genres: Optional[List[str]] = None,
+        year_start: Optional[int] = None,
+        year_end: Optional[int] = None,
+        chart_position: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Best matching sections, one per song.
+
+        Order: sections containing the whole progression first, then
+        sections playing it as a loop (any rotation, held chords or repeats),
+        then partial bigram matches; within each, chorus before other
+        sections, then bigram overlap, BPM distance and chart position.
+        When that leaves fewer than `limit` songs, near matches by harmonic
+        edit distance fill the rest, closest first. Songs with unknown BPM
+        pass the BPM filter but sort after songs with a known, matching BPM.
+
+        Returns:
+            [{'section': SectionProgression, 'match': 'exact'|'loop'|'partial'|'similar',
+              'exact': bool, 'overlap': float, 'similarity': float}, ...]
+        """
+        query = tuple(numerals)
+        query_bigrams = set(_bigrams(query))
+        if not query_bigrams:
+            return []
+
+        hits = Counter()
+        for bigram in query_bigrams:
+            hits.update(self.postings.get(bigram, ()))
+
+        loop = canonical_loop(query)
+        loop_hits = set(self.loop_postings.get(loop, ())) if loop else set()
+
+        max_position = chart_limit(chart_position)
+        min_hits = max(1, int(len(query_bigrams) * MIN_BIGRAM_OVERLAP + 0.5))
+        best_by_song: Dict[Any, Tuple[tuple, Dict[str, Any]]] = {}
+
+        for i in loop_hits.union(hits):
+            count = hits.get(i, 0)
+            if count < min_hits and i not in loop_hits:
+                continue
+            section = self.sections[i]
+            if not self._passes(section, bpm, bpm_tolerance, time_signature, genres,
+                                year_start, year_end, max_position):
+                continue
+
+            exact = _contains(section.numerals, query)
+            if exact:
+                match = 'exact'
+            elif i in loop_hits:
+                match = 'loop'
+            else:
+                match = 'partial'
+            overlap = count / len(query_bigrams)
+            bpm_distance = abs(section.bpm - bpm) if bpm and section.bpm else bpm_tolerance + 1
+            sort_key = (
+                MATCH_PRIORITY[match],
+                SECTION_PRIORITY[section.section_type],
+                -overlap,
+                bpm_distance,
+                section.peak_position or 999
+            )
+            current = best_by_song.get(section.song_id)
+            if current is None or sort_key < current[0]:
+                best_by_song[section.song_id] = (sort_key, {
+                    'section': section, 'match': match, 'exact': exact, 'overlap': overlap,
+                    'similarity': 1.0 if exact or match == 'loop' else overlap
+                })
+
+        if len(best_by_song) < limit:
+            self._add_near_matches(query, loop, best_by_song, limit, bpm, bpm_tolerance, time_signature,
+                                   genres, year_start, year_end, max_position)
+
+        ranked = sorted(best_by_song.values(), key=lambda item: item[0])
+        return [match for _, match in ranked[:limit]]
+
+
+    def _add_near_matches(self, query: Tuple[str, ...], loop: Optional[Tuple[str, ...]],
+                          best_by_song: Dict[Any, Tuple[tuple, Dict[str, Any]]], limit: int,
+                          bpm: Optional[int], bpm_tolerance: int, time_signature: Optional[str],
+                          genres: Optional[List[str]], year_start: Optional[int],
+                          year_end: Optional[int], max_position: Optional[int]):
+        """Fill best_by_song with BK-tree near matches for songs not matched yet."""
+        k = limit * FUZZY_OVERFETCH
+        max_distance = max_distance_for(query)
+        nearest = self.sequence_tree.nearest([tuple(collapse_repeats(query, cyclic=False))], k, max_distance)
+        if loop:
+            rotations = [loop[i:] + loop[:i] for i in range(len(loop))]
+            nearest += self.loop_tree.nearest(rotations, k, max_distance)
+        nearest.sort(key=lambda item: item[0])
+
+        for distance, sequence, section_ids in nearest:
+            for i in section_ids:
+                section = self.sections[i]
+                if section.song_id in best_by_song:
+                    continue
+                if not self._passes(section, bpm, bpm_tolerance, time_signature, genres,
+                                    year_start, year_end, max_position):
+                    continue
+                bpm_distance = abs(section.bpm - bpm) if bpm and section.bpm else bpm_tolerance + 1
+                sort_key = (
+                    MATCH_PRIORITY['similar'],
+                    distance,
+                    SECTION_PRIORITY[section.section_type],
+                    bpm_distance,
+                    section.peak_position or 999
+                )
+                best_by_song[section.song_id] = (sort_key, {
+                    'section': section, 'match': 'similar', 'exact': False, 'overlap': 0.0,
+                    'similarity': similarity(distance, query, sequence)
+                })
+
+
+class ProgressionIndexCache:
+    """Read-through index over song_chords, rebuilt in the background when stale."""
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._supabase = None
+        self._index: Optional[ProgressionIndex] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            from supabase import create_client
+            self._supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        return self._supabase
+
+    def get_index(self) -> ProgressionIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._build()
+        elif time.time() - self._built_at > self.refresh_interval and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, name='progression-index-refresh', daemon=True).start()
+        return self._index
+
+    def invalidate(self):
+        """Rebuild on the next request (the old index is served meanwhile)."""
+        self._built_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            'sections': len(index) if index is not None else 0,
+            'songs': index.song_count if index is not None else 0,
+            'loops': len(index.loop_postings) if index is not None else 0,
+            'fuzzy_sequences': index.loop_tree.size + index.sequence_tree.size if index is not None else 0,
+            'built_at': self._built_at or None,
+            'refresh_interval': self.refresh_interval
+        }
+
+    def _load_sections(self) -> List[SectionProgression]:
+        sections = []
+        offset = 0
+        while True:
+            result = self.supabase.table('song_chords').select(SECTION_COLUMNS)\
+                .order('chord_id').range(offset, offset + PAGE_SIZE - 1).execute()
+            page = result.data or []
+            sections.extend(s for s in (_section_from_row(row) for row in page) if s)
+            if len(page) < PAGE_SIZE:
+                return sections
+            offset += PAGE_SIZE
+
+    def _build(self):
+        start = time.time()
+        index = ProgressionIndex(self._load_sections())
+        self._index, self._built_at = index, time.time()
+        print(f"🎼 Progression index built: {len(index)} sections from {index.song_count} songs "
+              f"in {time.time() - start:.2f}s")
+
+    def _refresh(self):
+        try:
+            with self._lock:
+                self._build()
+        except Exception as e:
+            print(f"⚠️  Progression index refresh failed: {e}")
+        finally:
+            self._refreshing = False
+
+
+# Shared index for the API server process
+progression_index = ProgressionIndexCache()
+
+
+def find_corpus_songs(
+    roman_numerals: List[str],
+    original_chords: List[str],
+    key: str,
+    bpm: Optional[int],
+    bpm_tolerance: int = 10,
+    time_signature: Optional[str] = None,
+    genres: Optional[List[str]] = None,
+    year_start: Optional[int] = None,
+    year_end: Optional[int] = None,
+    chart_position: Optional[str] = None,
+    limit: int = 10
+) -> list:
+    """
+    Songs from our chord data whose sections use the progression.
+
+    Returns:
+        List of MelodySong (source='corpus') in match order
+    """
+    from melody_claude import MelodySong
+
+    numerals = to_c_frame(roman_numerals, original_chords, key)
+    start = time.time()
+    matches = progression_index.get_index().search(
+        numerals, bpm=bpm, bpm_tolerance=bpm_tolerance, time_signature=time_signature,
+        genres=genres, year_start=year_start, year_end=year_end,
+        chart_position=chart_position, limit=limit
+    )
+    print(f"🎼 {len(matches)} corpus matches for {' '.join(numerals)} in {(time.time() - start) * 1000:.1f}ms")
+
+    songs = []
+    for rank, match in enumerate(matches, 1):
+        section = match['section']
+        songs.append(MelodySong(
+            rank=rank,
+            song_name=section.title,
+            artist_name=section.artist,
+            chorus_chords=' '.join(section.chords),
+            bpm=section.bpm or 0,
+            genre=section.genres[0].title() if section.genres else '',
+            year=section.year or 0,
+            source='corpus',
+            section=section.section_name,
+            verified=True
+        ))
+    return songs
+
+
+def verify_suggestions(songs: list, numerals: List[str]) -> list:
+    """
+    Check Claude's suggestions against our chord data and rerank them.
+
+    Songs we have scraped get their real chords, BPM and best-matching
+    section in place of what Claude claimed, and are marked verified. Order:
+    verified songs whose progression matches the query (most similar
+    first), then unverified songs in Claude's order, then verified songs
+    whose chords turned out not to match.
+
+    Args:
+        songs: MelodySong suggestions
+        numerals: Query progression in the stored C major frame (to_c_frame)
+
+    Returns:
+        Re-ranked list of MelodySong
+    """
+    from dataclasses import replace
+
+    index = progression_index.get_index()
+    query = tuple(collapse_repeats(numerals, cyclic=False))
+    matching, unverified, mismatched = [], [], []
+
+    for song in songs:
+        sections = index.find_song(song.artist_name, song.song_name)
+        if not sections or not query:
+            unverified.append(song)
+            continue
+        distance, best = min(
+            ((window_distance(query, collapse_repeats(section.numerals, cyclic=False)), section)
+             for section in sections),
+            key=lambda item: (item[0], SECTION_PRIORITY[item[1].section_type])
+        )
+        score = similarity(distance, query, query)
+        checked = replace(
+            song,
+            chorus_chords=' '.join(best.chords) or song.chorus_chords,
+            bpm=best.bpm or song.bpm,
+            section=best.section_name,
+            verified=True
+        )
+        (matching if score >= MIN_VERIFIED_SIMILARITY else mismatched).append((score, checked))
+
+    matching.sort(key=lambda item: -item[0])
+    ordered = [song for _, song in matching] + unverified + [song for _, song in mismatched]
+    print(f"🔎 Verified {len(matching) + len(mismatched)}/{len(songs)} suggestions against song_chords "
+          f"({len(mismatched)} don't match the progression)")
+    return [replace(song, rank=rank) for rank, song in enumerate(ordered, 1)]
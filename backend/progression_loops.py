@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Loop canonicalization for chord progressions.
+Pop sections cycle one short progression: "vi IV I V" and "I V vi IV" are
+the same loop entered at a different chord, and "I I V V vi vi IV IV" or
+"I V vi IV I V vi IV" are that loop with held chords or played twice.
+
+canonical_loop() maps all of these to one key:
+1. Collapse held chords, including the wrap from last chord to first
+2. Reduce to the minimal repeating period
+3. Take the lexicographically smallest rotation
+
+so a looping query matches every rotation and repetition with a single
+hash lookup.
+"""
+
+from typing import List, Optional, Sequence, Set, Tuple
+
+# Longest loop (in distinct chord changes) extracted from a section
+MAX_LOOP_LENGTH = 8
+
+Loop = Tuple[str, ...]
+
+
+def collapse_repeats(numerals: Sequence[str], cyclic: bool = True) -> List[str]:
+    """Drop held chords (I I V → I V); with cyclic, also a last chord equal to the first."""
+    collapsed = []
+    for numeral in numerals:
+        if not collapsed or collapsed[-1] != numeral:
+            collapsed.append(numeral)
+    while cyclic and len(collapsed) > 1 and collapsed[-1] == collapsed[0]:
+        collapsed.pop()
+    return collapsed
+
+
+def minimal_period(numerals: Sequence[str]) -> List[str]:
+    """Shortest pattern the sequence is a whole number of repeats of (I V I V → I V)."""
+    n = len(numerals)
+    for period in range(1, n // 2 + 1):
+        if n % period == 0 and all(numerals[i] == numerals[i % period] for i in range(n)):
+            return list(numerals[:period])
+    return list(numerals)
+
+
+def minimal_rotation(numerals: Sequence[str]) -> Loop:
+    """Lexicographically smallest rotation."""
+    if not numerals:
+        return ()
+    return min(tuple(numerals[i:]) + tuple(numerals[:i]) for i in range(len(numerals)))
+
+
+def canonical_loop(numerals: Sequence[str]) -> Optional[Loop]:
+    """
+    Rotation- and repetition-invariant key for a looping progression.
+
+    Returns:
+        Canonical tuple, or None when fewer than two distinct chord changes remain
+    """
+    loop = minimal_period(collapse_repeats(numerals))
+    if len(loop) < 2:
+        return None
+    return minimal_rotation(loop)
+
+
+def section_loops(numerals: Sequence[str], max_length: int = MAX_LOOP_LENGTH) -> Set[Loop]:
+    """
+    Canonical loops a section plays: every pattern of up to max_length chords
+    that is immediately repeated, plus the whole section taken as one cycle.
+    """
+    chords = collapse_repeats(numerals, cyclic=False)
+    loops = set()
+
+    whole = canonical_loop(chords)
+    if whole and len(whole) <= max_length:
+        loops.add(whole)
+
+    n = len(chords)
+    for length in range(2, min(max_length, n // 2) + 1):
+        for start in range(n - 2 * length + 1):
+            if chords[start:start + length] == chords[start + length:start + 2 * length]:
+                loop = canonical_loop(chords[start:start + length])
+                if loop:
+                    loops.add(loop)
+    return loops
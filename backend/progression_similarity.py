@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Fuzzy chord progression similarity.
+Weighted edit distance over simplified Roman numerals (C major frame), where
+substituting a chord costs less when it keeps the harmonic function:
+ii for IV (both subdominant) or iii for I (both tonic) is a near match,
+V for IV is not.
+
+All costs are integers and form a metric, so a BK-tree can prune the
+search: top-k near matches come back without comparing the query against
+every section.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Edit costs
+SAME_CHORD = 0
+SAME_DEGREE = 1        # IV ↔ iv, I ↔ I+ (quality change on the same root)
+SAME_FUNCTION = 2      # ii ↔ IV, I ↔ vi, V ↔ vii°
+OTHER_SUBSTITUTION = 4
+INSERT_DELETE = 3
+
+# Harmonic function of each scale degree in the C major frame
+DEGREE_FUNCTIONS = {
+    'I': 'tonic', 'III': 'tonic', 'VI': 'tonic',
+    'II': 'subdominant', 'IV': 'subdominant',
+    'V': 'dominant', 'VII': 'dominant',
+    # Non-diatonic chords stay as note names (convert_to_roman leaves them);
+    # the common borrowed ones are bVI and bVII, both subdominant colour
+    'G#': 'subdominant', 'A#': 'subdominant', 'Ab': 'subdominant', 'Bb': 'subdominant',
+}
+
+NUMERAL_PATTERN = re.compile(r'^(VII|VI|V|IV|III|II|I)', re.IGNORECASE)
+NOTE_PATTERN = re.compile(r'^[A-G][#b]?')
+
+
+def chord_degree(numeral: str) -> str:
+    """Scale degree ("IV" for IV, iv, IV7) or note name for non-diatonic chords."""
+    match = NUMERAL_PATTERN.match(numeral)
+    if match:
+        return match.group().upper()
+    match = NOTE_PATTERN.match(numeral)
+    return match.group() if match else numeral
+
+
+def chord_function(numeral: str) -> str:
+    return DEGREE_FUNCTIONS.get(chord_degree(numeral), 'other')
+
+
+@lru_cache(maxsize=4096)
+def substitution_cost(a: str, b: str) -> int:
+    if a == b:
+        return SAME_CHORD
+    if chord_degree(a) == chord_degree(b):
+        return SAME_DEGREE
+    function = chord_function(a)
+    if function != 'other' and function == chord_function(b):
+        return SAME_FUNCTION
+    return OTHER_SUBSTITUTION
+
+
+def progression_distance(a: Sequence[str], b: Sequence[str], limit: Optional[int] = None) -> int:
+    """
+    Weighted edit distance between two numeral sequences.
+
+    Args:
+        limit: Stop early once the distance is known to exceed this;
+            the result is then limit + 1
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and (len(a) - len(b)) * INSERT_DELETE > limit:
+        return limit + 1
+    previous = [j * INSERT_DELETE for j in range(len(b) + 1)]
+    for i, chord_a in enumerate(a, 1):
+        current = [i * INSERT_DELETE]
+        for j, chord_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + INSERT_DELETE,
+                current[j - 1] + INSERT_DELETE,
+                previous[j - 1] + substitution_cost(chord_a, chord_b)
+            ))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    if limit is not None and previous[-1] > limit:
+        return limit + 1
+    return previous[-1]
+
+
+def window_distance(query: Sequence[str], sequence: Sequence[str]) -> int:
+    """
+    Smallest distance between the query and any stretch of the sequence of
+    the same length, wrapping around the end (sections loop).
+    """
+    n = len(query)
+    if len(sequence) < n:
+        return progression_distance(query, sequence)
+    cycle = list(sequence) + list(sequence[:n - 1])
+    return min(progression_distance(query, cycle[i:i + n]) for i in range(len(sequence)))
+
+
+def max_distance_for(query: Sequence[str]) -> int:
+    """Default search radius: about one unrelated substitution per four chords."""
+    return max(OTHER_SUBSTITUTION, OTHER_SUBSTITUTION * len(query) // 4)
+
+
+def similarity(distance: int, a: Sequence[str], b: Sequence[str]) -> float:
+    """0-1 score from a distance (1.0 = identical)."""
+    worst = INSERT_DELETE * max(len(a), len(b)) or 1
+    return round(max(0.0, 1 - distance / worst), 3)
+
+
+class BKTree:
+    """Burkhard-Keller tree over numeral sequences, each with a payload list."""
+
+    def __init__(self):
+        self._root: Optional[list] = None   # [sequence, payloads, {distance: child}]
+        self.size = 0
+
+    def add(self, sequence: Tuple[str, ...], payload: Any):
+        if self._root is None:
+            self._root = [sequence, [payload], {}]
+            self.size = 1
+            return
+        node = self._root
+        while True:
+            distance = progression_distance(sequence, node[0])
+            if distance == 0:
+                node[1].append(payload)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [sequence, [payload], {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, query: Sequence[str], max_distance: int) -> List[Tuple[int, Tuple[str, ...], List[Any]]]:
+        """All sequences within max_distance of query: [(distance, sequence, payloads)]."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            sequence, payloads, children = stack.pop()
+            # Beyond max_distance + the longest edge no child can be in range,
+            # so the exact distance is not needed
+            bound = max_distance + max(children, default=0)
+            distance = progression_distance(query, sequence, limit=bound)
+            if distance <= max_distance:
+                found.append((distance, sequence, payloads))
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return found
+
+    def nearest(self, queries: Sequence[Sequence[str]], k: int,
+                max_distance: int) -> List[Tuple[int, Tuple[str, ...], List[Any]]]:
+        """
+        Top-k sequences closest to any of the queries (e.g. every rotation of
+        a loop), best distance per sequence.
+        """
+        best: Dict[Tuple[str, ...], Tuple[int, Tuple[str, ...], List[Any]]] = {}
+        for query in queries:
+            for distance, sequence, payloads in self.search(query, max_distance):
+                if sequence not in best or distance < best[sequence][0]:
+                    best[sequence] = (distance, sequence, payloads)
+        return sorted(best.values(), key=lambda item: (item[0], item[1]))[:k]
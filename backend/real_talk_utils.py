@@ -4,87 +4,368 @@ Shared utilities for Real Talk feature.
 """
 
 import os
-import re
-import json
-from typing import List, Dict, Any
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from anthropic import Anthropic
 from dotenv import load_dotenv
+from llm_metrics import current_route
+from model_router import model_router, parse_json_array, OutputValidationError
+from bm25_index import rank_entries, best_excerpt, sync_sources
 
 load_dotenv()
 
 # Initialize Claude client
 anthropic = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
+# Candidate pool for intelligent search (served from the in-process entry cache)
+SEARCH_PAGE_SIZE = 1000
+MAX_SEARCH_CANDIDATES = 5000
+
+# Seconds between entry cache watermark checks
+ENTRY_REFRESH_INTERVAL = int(os.getenv("REAL_TALK_REFRESH_INTERVAL", "60"))
+
+# Map-reduce reranking: the shortlist is scored by Claude in concurrent chunks
+RERANK_CHUNK_SIZE = 25
+RERANK_MAX_TOKENS = 1500
+RERANK_ANCHORS = 2          # Top BM25 entries scored in every chunk for calibration
+MAX_CHUNK_OFFSET = 2.0      # Largest score shift applied to a chunk
+RELEVANCE_THRESHOLD = 6
+MIN_SCORED_FRACTION = 0.8   # A chunk reply must score at least this share of its entries
+
+
+class RealTalkEntryCache:
+    """
+    In-process copy of real_talk_entries for intelligent search, kept in
+    sync with the per-source BM25 indexes.
+
+    Loaded on first use; a background thread polls a cheap watermark (row
+    count and latest created/processed timestamps) and reloads only when it
+    changes, so searches filter and rank in memory without querying the table.
+    """
+
+    def __init__(self, refresh_interval: int = ENTRY_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._supabase = None
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        self._watermark: Optional[Tuple] = None
+        self._load_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._invalidated = False
+        self._refresher: Optional[threading.Thread] = None
+        self._stats = {'loads': 0, 'last_load_seconds': None, 'loaded_at': None, 'invalidations': 0}
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            from supabase import create_client
+            self._supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        return self._supabase
+
+    def get_entries(self) -> List[Dict[str, Any]]:
+        """Every entry, newest first (loads them on first use)."""
+        if self._entries is None:
+            with self._load_lock:
+                if self._entries is None:
+                    self._reload()
+                    self._start_refresher()
+        return self._entries
+
+    def invalidate(self):
+        """Reload on the next refresh cycle, which starts immediately."""
+        self._invalidated = True
+        self._stats['invalidations'] += 1
+        self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries) if self._entries is not None else 0,
+            'watermark': list(self._watermark) if self._watermark else None,
+            'refresh_interval': self.refresh_interval,
+            **self._stats
+        }
+
+    def _current_watermark(self) -> Tuple:
+        def latest(column):
+            result = self.supabase.table('real_talk_entries').select(column)\
+                .order(column, desc=True, nullsfirst=False).limit(1).execute()
+            return (result.data or [{}])[0].get(column)
+        count = self.supabase.table('real_talk_entries').select('id', count='exact').limit(1).execute().count
+        return (count, latest('created_at'), latest('processed_at'))
+
+    def _load_entries(self) -> List[Dict[str, Any]]:
+        entries = []
+        offset = 0
+        while True:
+            result = self.supabase.table('real_talk_entries').select(
+                '*, real_talk_sources(display_name, source_identifier)'
+            ).order('id').range(offset, offset + SEARCH_PAGE_SIZE - 1).execute()
+            page = result.data or []
+            entries.extend(page)
+            if len(page) < SEARCH_PAGE_SIZE:
+                return entries
+            offset += SEARCH_PAGE_SIZE
+
+    def _reload(self):
+        start = time.time()
+        watermark = self._current_watermark()
+        entries = self._load_entries()
+        sync_sources(entries)
+        # Newest first; entries without a date last
+        entries.sort(key=lambda entry: entry.get('posted_at') or '', reverse=True)
+
+        self._entries, self._watermark = entries, watermark
+        self._stats['loads'] += 1
+        self._stats['last_load_seconds'] = round(time.time() - start, 2)
+        self._stats['loaded_at'] = time.time()
+        print(f"💬 Real Talk entries loaded: {len(entries)} in {self._stats['last_load_seconds']}s")
+
+    def _start_refresher(self):
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, name='real-talk-refresh', daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            try:
+                invalidated, self._invalidated = self._invalidated, False
+                if invalidated or self._current_watermark() != self._watermark:
+                    with self._load_lock:
+                        self._reload()
+            except Exception as e:
+                print(f"⚠️  Real Talk entry refresh failed: {e}")
+
+
+# Shared entry cache for the API server process
+real_talk_entries = RealTalkEntryCache()
+
+
+def _matches_filters(entry: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """In-memory version of the /api/real-talk/entries filters."""
+    def as_list(value):
+        return value.split(',') if isinstance(value, str) else list(value)
+    
+    def year(entry):
+        posted_at = entry.get('posted_at') or ''
+        return int(posted_at[:4]) if posted_at[:4].isdigit() else None
+    
+    if filters.get('situations') and not set(as_list(filters['situations'])) & set(entry.get('situation_tags') or []):
+        return False
+    if filters.get('emotions') and not set(as_list(filters['emotions'])) & set(entry.get('emotional_tags') or []):
+        return False
+    if filters.get('source_id') and str(entry.get('source_id')) != str(filters['source_id']):
+        return False
+    if filters.get('age_min') and (entry.get('poster_age') is None or entry['poster_age'] < int(filters['age_min'])):
+        return False
+    if filters.get('age_max') and (entry.get('poster_age') is None or entry['poster_age'] > int(filters['age_max'])):
+        return False
+    if filters.get('gender') and entry.get('poster_gender') != filters['gender']:
+        return False
+    if filters.get('year_min') and (year(entry) is None or year(entry) < int(filters['year_min'])):
+        return False
+    if filters.get('year_max') and (year(entry) is None or year(entry) > int(filters['year_max'])):
+        return False
+    return True
+
+
+def load_search_candidates(filters: Dict[str, Any], max_candidates: int = MAX_SEARCH_CANDIDATES) -> List[Dict[str, Any]]:
+    """
+    Entries matching the Real Talk filters for lexical ranking, served from
+    the in-process entry cache (no table query per search).
+    
+    Args:
+        filters: Same keys as /api/real-talk/entries (situations, emotions,
+                 source_id, age_min, age_max, gender, year_min, year_max);
+                 tag filters may be lists or comma-separated strings
+        max_candidates: Most recent entries to consider
+        
+    Returns:
+        Entries (newest first) with their source info
+    """
+    candidates = []
+    for entry in real_talk_entries.get_entries():
+        if _matches_filters(entry, filters):
+            candidates.append(entry)
+            if len(candidates) >= max_candidates:
+                break
+    return candidates
+
 
 def intelligent_search(query: str, entries: List[Dict[str, Any]], limit: int = 50) -> List[Dict[str, Any]]:
     """
     Use Claude to rank entries by relevance to a semantic query.
     
+    Entries are first ranked locally with BM25 (title, tags and raw text), and
+    only the top `limit` are sent to Claude to rerank, in concurrent chunks.
+    
     Args:
         query: What the user is looking for (e.g., "moment of realization")
-        entries: List of entries to rank
-        limit: Max entries to analyze
+        entries: List of entries to rank (any number)
+        limit: Max entries Claude analyzes
         
     Returns:
         Entries with relevance scores, sorted by relevance
     """
+    results = []
+    for update in intelligent_search_iter(query, entries, limit):
+        results = update['results']
+    return results
+
+
+def intelligent_search_iter(query: str, entries: List[Dict[str, Any]], limit: int = 50,
+                            chunk_size: int = RERANK_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Map-reduce version of intelligent_search that yields partial results.
+    
+    The BM25 shortlist is split into chunks scored by concurrent Claude calls
+    (the shared Anthropic gateway bounds real concurrency). The top BM25
+    entries are scored in every chunk as anchors, and each chunk's scores are
+    shifted so the anchors agree, making scores comparable across chunks.
+    
+    Args:
+        query: What the user is looking for
+        entries: List of entries to rank (any number)
+        limit: Max entries Claude analyzes
+        chunk_size: Entries per Claude call
+        
+    Yields:
+        {'results': [...], 'chunks_done': n, 'chunks_total': m, 'done': bool}
+        after each chunk finishes; results are the merged ranking so far.
+    """
     if not entries:
-        return []
+        yield {'results': [], 'chunks_done': 0, 'chunks_total': 0, 'done': True}
+        return
+    
+    # Lexical shortlist so Claude sees the best candidates, not the first ones
+    shortlist = [entry for _, entry in rank_entries(query, entries)[:limit]]
+    
+    chunks = [list(range(start, min(start + chunk_size, len(shortlist))))
+              for start in range(0, len(shortlist), chunk_size)]
+    anchor_count = min(RERANK_ANCHORS, len(shortlist)) if len(chunks) > 1 else 0
     
-    # Limit entries for API efficiency
-    entries_to_analyze = entries[:limit]
+    # Worker threads have no request context, so pass the route explicitly
+    route = current_route()
     
-    # Build prompt with entries
+    chunk_scores = []
+    with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+        futures = {}
+        for positions in chunks:
+            positions = positions + [a for a in range(anchor_count) if a not in positions]
+            batch = [shortlist[position] for position in positions]
+            futures[pool.submit(_score_chunk, query, batch, route)] = positions
+        
+        for future in as_completed(futures):
+            positions = futures[future]
+            try:
+                scores = future.result()
+            except Exception as e:
+                print(f"⚠️  Intelligent search chunk failed: {e}")
+                scores = {}
+            
+            chunk_scores.append({
+                positions[index]: score
+                for index, score in scores.items()
+                if 0 <= index < len(positions)
+            })
+            yield {
+                'results': _merge_chunk_scores(shortlist, chunk_scores, anchor_count),
+                'chunks_done': len(chunk_scores),
+                'chunks_total': len(chunks),
+                'done': len(chunk_scores) == len(chunks)
+            }
+
+
+def _score_chunk(query: str, batch: List[Dict[str, Any]], route: str = None) -> Dict[int, Tuple[float, str]]:
+    """Score one chunk with Claude: {batch index: (score, reason)}."""
     entries_text = ""
-    for i, entry in enumerate(entries_to_analyze):
-        excerpt = entry.get('raw_text', '')[:500]
+    for i, entry in enumerate(batch):
+        excerpt = best_excerpt(entry.get('raw_text', ''), query)
         entries_text += f"\n[{i}] Title: {entry.get('title', 'Untitled')}\nExcerpt: {excerpt}\n"
     
     prompt = f"""I'm looking for conversations about: "{query}"
 
-Score each of these conversations from 1-10 based on relevance to my query.
-Only return entries scoring 6 or higher.
+Score EVERY one of these conversations from 1-10 based on relevance to my query.
+Give a brief reason only for scores of {RELEVANCE_THRESHOLD} or higher (use "" otherwise).
 
 CONVERSATIONS:
 {entries_text}
 
 Respond with JSON array only:
-[{{"index": 0, "score": 8, "reason": "brief reason"}}, ...]
+[{{"index": 0, "score": 8, "reason": "brief reason"}}, {{"index": 1, "score": 2, "reason": ""}}, ...]
 
-Be selective - only high-relevance matches."""
+Be strict - reserve high scores for strong matches."""
 
+    def parse_scores(text: str) -> Dict[int, Tuple[float, str]]:
+        scores = {}
+        for result in parse_json_array(text):
+            try:
+                index = int(result.get('index'))
+                score = float(result.get('score', 0))
+            except (AttributeError, TypeError, ValueError):
+                continue
+            if 0 <= index < len(batch) and 0 <= score <= 10:
+                scores[index] = (score, result.get('reason', '') or '')
+        return scores
+    
+    def validate(text: str) -> Dict[int, Tuple[float, str]]:
+        scores = parse_scores(text)
+        if len(scores) < MIN_SCORED_FRACTION * len(batch):
+            raise OutputValidationError(f"scored {len(scores)} of {len(batch)} entries")
+        return scores
+    
     try:
-        response = anthropic.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=1000,
+        return model_router.create(
+            anthropic,
+            task="real_talk.intelligent_search",
+            validate=validate,
+            fallback=parse_scores,
+            route=route,
+            max_tokens=RERANK_MAX_TOKENS,
             messages=[{"role": "user", "content": prompt}]
         )
-        
-        text = response.content[0].text.strip()
-        json_match = re.search(r'\[.*\]', text, re.DOTALL)
-        
-        if json_match:
-            results = json.loads(json_match.group())
-            
-            # Add scores to entries
-            scored_entries = []
-            for result in results:
-                idx = result.get('index', 0)
-                if idx < len(entries_to_analyze):
-                    entry = entries_to_analyze[idx].copy()
-                    entry['relevance_score'] = result.get('score', 0)
-                    entry['relevance_reason'] = result.get('reason', '')
-                    scored_entries.append(entry)
-            
-            # Sort by score descending
-            scored_entries.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
-            return scored_entries
-            
-    except Exception as e:
-        print(f"⚠️  Intelligent search failed: {e}")
-    
-    return []
-
-
+    except OutputValidationError as e:
+        print(f"⚠️  Chunk scoring unusable: {e}")
+        return {}
 
 
+def _merge_chunk_scores(shortlist: List[Dict[str, Any]], chunk_scores: List[Dict[int, Tuple[float, str]]],
+                        anchor_count: int) -> List[Dict[str, Any]]:
+    """
+    Normalize and merge chunk scores into one ranked list.
+    
+    Each chunk is shifted so its anchor scores match the anchors' average
+    across all chunks (bounded by MAX_CHUNK_OFFSET). Entries scored more than
+    once (the anchors) get the mean of their normalized scores.
+    """
+    anchor_means = {}
+    for anchor in range(anchor_count):
+        values = [scores[anchor][0] for scores in chunk_scores if anchor in scores]
+        if values:
+            anchor_means[anchor] = sum(values) / len(values)
+    
+    combined: Dict[int, List[Tuple[float, str]]] = {}
+    for scores in chunk_scores:
+        shared = [anchor for anchor in anchor_means if anchor in scores]
+        offset = 0.0
+        if shared:
+            offset = sum(anchor_means[a] - scores[a][0] for a in shared) / len(shared)
+            offset = max(-MAX_CHUNK_OFFSET, min(MAX_CHUNK_OFFSET, offset))
+        for position, (score, reason) in scores.items():
+            combined.setdefault(position, []).append((score + offset, reason))
+    
+    scored_entries = []
+    for position, values in combined.items():
+        score = sum(value for value, _ in values) / len(values)
+        if score < RELEVANCE_THRESHOLD:
+            continue
+        entry = shortlist[position].copy()
+        entry['relevance_score'] = round(max(1.0, min(10.0, score)), 1)
+        entry['relevance_reason'] = next((reason for _, reason in values if reason), '')
+        scored_entries.append(entry)
+    
+    # Sort by score descending
+    scored_entries.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+    return scored_entries
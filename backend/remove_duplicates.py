@@ -7,6 +7,7 @@ Keeps the first occurrence of each song (by title + artist).
 import os
 from dotenv import load_dotenv
 from supabase import create_client
+from corpus_cache import notify_corpus_changed
 
 load_dotenv()
 
@@ -57,6 +58,7 @@ def remove_duplicates():
                 print(f"  Progress: {deleted_count}/{len(songs_to_delete)} deleted...")
         
         print(f"\n✅ Removed {len(songs_to_delete)} duplicate songs!")
+        notify_corpus_changed()
         
         # Show final count
         final_result = supabase.table('songs').select('id').execute()
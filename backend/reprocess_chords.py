@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Recompute the derived chord columns of every song_chords row.
+When the chord rules change (e.g. flat roots, which transpose_to_c used to
+leave untransposed), the five columns derived from chords_original go
+stale. This job rebuilds them from chords_original and the song's key
+without rescraping Ultimate Guitar:
+
+- Streams song_chords in pages (with each song's key)
+- Recomputes pages in a process pool (chord_algebra.process_chords)
+- Upserts only rows whose derived columns changed, in bulk
+
+Usage:
+    python reprocess_chords.py              # recompute and write changes
+    python reprocess_chords.py --dry-run    # report what would change, write nothing
+"""
+
+import os
+import sys
+import json
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+from chord_algebra import normalize_tonality, parse_chord_list, process_chords
+from corpus_cache import notify_corpus_changed
+
+load_dotenv()
+
+PAGE_SIZE = 1000
+
+# Rows per upsert request
+UPSERT_BATCH_SIZE = 500
+
+# Pages being recomputed at once
+WORKERS = int(os.getenv("REPROCESS_WORKERS", str(os.cpu_count() or 4)))
+
+# Changed rows printed in the dry-run report
+DIFF_SAMPLES = 20
+
+# song_chords column for each process_chords version
+DERIVED_COLUMNS = {
+    'chords_original_simplified': 'original_simple',
+    'chords_transposed_c': 'in_c',
+    'chords_transposed_c_simplified': 'in_c_simple',
+    'chords_roman': 'roman',
+    'chords_roman_simplified': 'roman_simple'
+}
+
+
+def stream_sections(supabase) -> Iterator[List[Dict[str, Any]]]:
+    """song_chords rows page by page, each with its song's musical_key."""
+    offset = 0
+    while True:
+        result = supabase.table('song_chords').select('*, songs(musical_key)')\
+            .order('chord_id').range(offset, offset + PAGE_SIZE - 1).execute()
+        page = result.data or []
+        if page:
+            yield page
+        if len(page) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
+
+def row_tonality(row: Dict[str, Any]) -> str:
+    """Key the row's chords were transposed from: its UG tonality, else the song's key."""
+    song = row.get('songs') or {}
+    return normalize_tonality(row.get('tonality')) or normalize_tonality(song.get('musical_key')) or 'Unknown'
+
+
+def _stored_like(original: Any, chords: List[str]) -> Any:
+    """Write chords back in the column's stored shape (array or JSON text)."""
+    return chords if isinstance(original, list) or original is None else json.dumps(chords)
+
+
+def recompute_page(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Recompute one page (runs in a worker process).
+
+    Returns:
+        {'rows': int, 'changes': [{'row': upsert row, 'diff': {column: (old, new)}}]}
+    """
+    changes = []
+    for row in rows:
+        chords = parse_chord_list(row.get('chords_original'))
+        if not chords:
+            continue
+        tonality = row_tonality(row)
+        versions = process_chords(tonality, chords)
+
+        diff = {}
+        for column, version in DERIVED_COLUMNS.items():
+            old = parse_chord_list(row.get(column))
+            if old != versions[version]:
+                diff[column] = (old, versions[version])
+        if not diff:
+            continue
+
+        update = {
+            'chord_id': row['chord_id'],
+            'song_id': row['song_id'],
+            'section_name': row['section_name']
+        }
+        for column, version in DERIVED_COLUMNS.items():
+            update[column] = _stored_like(row.get(column), versions[version])
+        changes.append({'row': update, 'diff': diff, 'tonality': tonality})
+    return {'rows': len(rows), 'changes': changes}
+
+
+def _pipelined(executor: ProcessPoolExecutor, pages: Iterator[List[Dict]]) -> Iterator[Dict[str, Any]]:
+    """Results in page order, keeping at most 2 pages per worker in flight."""
+    pending = deque()
+    for page in pages:
+        pending.append(executor.submit(recompute_page, page))
+        if len(pending) >= WORKERS * 2:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def save_changes(supabase, rows: List[Dict[str, Any]]):
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        supabase.table('song_chords').upsert(rows[start:start + UPSERT_BATCH_SIZE], on_conflict='chord_id').execute()
+
+
+def print_diff(change: Dict[str, Any]):
+    row = change['row']
+    print(f"  chord_id {row['chord_id']} (song {row['song_id']}, {row['section_name']}, key {change['tonality']}):")
+    for column, (old, new) in change['diff'].items():
+        print(f"    {column}: {' '.join(old)}  →  {' '.join(new)}")
+
+
+def reprocess_chords(dry_run: bool = False) -> Dict[str, int]:
+    supabase = create_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_KEY")
+    )
+
+    totals = Counter()
+    pending_writes: List[Dict[str, Any]] = []
+    samples = []
+
+    print(f"🎸 Reprocessing song_chords with {WORKERS} workers{' (dry run)' if dry_run else ''}...")
+    with ProcessPoolExecutor(max_workers=WORKERS) as executor:
+        for result in _pipelined(executor, stream_sections(supabase)):
+            totals['rows'] += result['rows']
+            totals['changed'] += len(result['changes'])
+            for change in result['changes']:
+                totals.update(change['diff'].keys())
+                if len(samples) < DIFF_SAMPLES:
+                    samples.append(change)
+
+            if not dry_run:
+                pending_writes.extend(change['row'] for change in result['changes'])
+                if len(pending_writes) >= UPSERT_BATCH_SIZE:
+                    save_changes(supabase, pending_writes)
+                    pending_writes = []
+            print(f"  {totals['rows']} rows scanned, {totals['changed']} changed")
+
+    if not dry_run and pending_writes:
+        save_changes(supabase, pending_writes)
+
+    print(f"\n📊 {totals['changed']} of {totals['rows']} rows {'would change' if dry_run else 'updated'}")
+    for column in DERIVED_COLUMNS:
+        if totals[column]:
+            print(f"  {column}: {totals[column]}")
+    if samples:
+        print("\nSample changes:")
+        for change in samples:
+            print_diff(change)
+
+    if not dry_run and totals['changed']:
+        notify_corpus_changed()
+        print("✅ Chords reprocessed!")
+    return dict(totals)
+
+
+if __name__ == "__main__":
+    reprocess_chords(dry_run='--dry-run' in sys.argv)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Local rhyme detector for the song analysis pre-pass.
+Finds perfect and multi-syllable rhymes from spelling alone, so Claude only
+has to look for the fuzzy types (slant, assonance, consonance, compound,
+embedded).
+
+Detection is deliberately conservative: endings whose pronunciation can't be
+told from spelling (love/move, bread/bead, now/know), vowel pairs that may be
+two syllables (li-on, o-cean, ru-in) and irregular words (been, what) are
+skipped and left to Claude rather than guessed.
+
+Line numbers are 1-based positions in the raw lyrics (section markers and
+blank lines count), the numbering the analysis prompts use.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+
+# Section marker lines like [Chorus] carry no lyrics
+SECTION_MARKER = re.compile(r'^\s*\[.*\]\s*$')
+
+WORD_PATTERN = re.compile(r"[A-Za-z']+")
+
+VOWELS = set('aeiouy')
+
+# Different spellings of the same stressed rime → canonical key
+RIME_EQUIVALENTS = {
+    'ight': 'ight', 'ite': 'ight', 'yte': 'ight',
+    'y': 'igh', 'igh': 'igh', 'ie': 'igh', 'ye': 'igh', 'uy': 'igh', 'eye': 'igh',
+    'ine': 'ine', 'ign': 'ine', 'yne': 'ine',
+    'ime': 'ime', 'yme': 'ime',
+    'ide': 'ide', 'yde': 'ide',
+    'ize': 'ize', 'yze': 'ize',
+    'ire': 'ire', 'yre': 'ire',
+    'ay': 'ay', 'eigh': 'ay',
+    'ain': 'ain', 'ane': 'ain',
+    'ate': 'ate', 'ait': 'ate', 'eight': 'ate',
+    'ame': 'ame', 'aim': 'ame',
+    'ace': 'ace',
+    'ake': 'ake',
+    'e': 'ee', 'ee': 'ee', 'ea': 'ee',
+    'eed': 'eed', 'ede': 'eed',
+    'eet': 'eet', 'ete': 'eet',
+    'eel': 'eel', 'eal': 'eel',
+    'een': 'een', 'ean': 'een', 'ene': 'een',
+    'eem': 'eem', 'eam': 'eem', 'eme': 'eem',
+    'eep': 'eep', 'eap': 'eep',
+    'ore': 'ore', 'oar': 'ore', 'or': 'ore',
+    'ole': 'ole', 'oal': 'ole',
+    'ote': 'ote', 'oat': 'ote',
+    'ude': 'ude', 'ued': 'ude',
+    'ue': 'ew', 'ew': 'ew',
+}
+
+# Spellings that are usually unstressed at the end of a longer word
+# (happy, coffee, doctor, mountain, palace, favorite)
+UNSTRESSED_ENDINGS = {'y', 'e', 'ee', 'ea', 'ie', 'ye', 'uy', 'or', 'ain', 'ane', 'ace', 'ite', 'yte'}
+
+# Rimes whose sound can't be told from spelling (love/move, bread/bead, ...)
+AMBIGUOUS_RIMES = {
+    'ove', 'ome', 'one', 'ose', 'ost', 'oth', 'ork', 'orm', 'ord', 'orth',
+    'oll', 'ull', 'ush', 'ut', 'ear', 'ere', 'ead', 'eak', 'eat', 'ealth',
+    'ive', 'int', 'ind', 'ild', 'ey', 'ier', 'ie', 'aid', 'ase', 'as', 'o',
+    'ough', 'ought', 'ould', 'ise', 'ies', 'ied', 'oe', 'ow', 'own', 'owl',
+}
+
+# Rime prefixes that are always ambiguous (out/you, food/good/blood, how/show)
+AMBIGUOUS_PREFIXES = ('ou', 'ow', 'oo')
+
+# Vowel pairs often sounded as two syllables (li-on, di-al, ru-in, qui-et, vi-deo)
+HIATUS_PAIRS = ('ia', 'io', 'iu', 'eo', 'ua', 'uo', 'ui')
+
+# ...and these too, unless the word has a single vowel group (clean, coin vs o-cean, i-dea)
+POLYSYLLABLE_HIATUS_PAIRS = ('ea', 'oi')
+
+# Words spelled like a rhyme they don't make (been/seen, what/that, have/gave)
+IRREGULAR_WORDS = {
+    'been', 'are', 'have', 'what', 'says', 'want', 'war', 'wars', 'warm', 'water',
+    'watch', 'wash', 'was', 'does', 'gone', 'done', 'one', 'once', 'eye', 'eyes',
+}
+
+# Function words never keyed, even at the end of a line (the/me, and/hand)
+FUNCTION_WORDS = {
+    'a', 'an', 'the', 'and', 'or', 'nor', 'of', 'to', 'in', 'on', 'at', 'is', 'it',
+    'as', 'but', 'if', 'for', 'from', 'with', 'its', 'than', 'then', 'that', 'this',
+}
+
+# Function words only considered at the end of a line
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'at', 'is', 'it',
+    'as', 'but', 'if', 'was', 'for', 'i', 'im', 'its', 'be', 'we', 'he', 'my',
+}
+
+# Internal (mid-line) rhymes only count this many lines apart
+INTERNAL_RHYME_SPAN = 1
+
+
+@dataclass
+class WordOccurrence:
+    word: str
+    line: int           # 1-based line number in the raw lyrics
+    line_final: bool
+
+
+def _vowel_groups(word: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) of each vowel run; 'y' is a consonant at the start of a word.
+    The 'i' of an -ing ending is its own syllable (go-ing, play-ing).
+    """
+    groups = []
+    i = 0
+    while i < len(word):
+        if word[i] in VOWELS and not (i == 0 and word[i] == 'y'):
+            start = i
+            while i < len(word) and word[i] in VOWELS:
+                i += 1
+            groups.append((start, i))
+        else:
+            i += 1
+    ing = len(word) - 3
+    if word.endswith('ing') and groups and groups[-1] == (groups[-1][0], ing + 1) and groups[-1][0] < ing:
+        groups[-1:] = [(groups[-1][0], ing), (ing, ing + 1)]
+    return groups
+
+
+def _syllable_starts(word: str) -> List[int]:
+    """Start index of each sounded vowel group (drops a silent final 'e')."""
+    groups = _vowel_groups(word)
+    if len(groups) > 1 and groups[-1] == (len(word) - 1, len(word)) and word[-1] == 'e':
+        groups = groups[:-1]
+    return [start for start, _ in groups]
+
+
+def _is_ambiguous(rime: str) -> bool:
+    return rime in AMBIGUOUS_RIMES or rime.startswith(AMBIGUOUS_PREFIXES)
+
+
+def _has_hiatus(vowels: str, polysyllable: bool) -> bool:
+    """True if a vowel run may be two syllables."""
+    pairs = HIATUS_PAIRS + POLYSYLLABLE_HIATUS_PAIRS if polysyllable else HIATUS_PAIRS
+    return any(pair in vowels for pair in pairs)
+
+
+def rhyme_key(word: str) -> Optional[Tuple[str, str]]:
+    """
+    Spelling-based rhyme key for a word.
+
+    Monosyllables and words ending in a clearly stressed rime (tonight, away)
+    get a 'perfect' key from their last syllable. Other polysyllables get a
+    'multi' key from their last two syllables, since an unstressed ending
+    (-ing, -er, -y) alone doesn't make a perfect rhyme.
+
+    Args:
+        word: Lowercase word with apostrophes removed
+
+    Returns:
+        (rhyme_type, key) or None when the ending is ambiguous
+    """
+    if word in FUNCTION_WORDS or word in IRREGULAR_WORDS:
+        return None
+    groups = _vowel_groups(word)
+    starts = _syllable_starts(word)
+    if not starts:
+        return None
+
+    vowel_runs = {start: word[start:end] for start, end in groups}
+    polysyllable = len(groups) > 1
+    if _has_hiatus(vowel_runs[starts[-1]], polysyllable):
+        return None
+
+    last_rime = word[starts[-1]:]
+    if _is_ambiguous(last_rime):
+        return None
+
+    canonical = RIME_EQUIVALENTS.get(last_rime)
+    if len(starts) == 1:
+        return ('perfect', canonical or last_rime)
+    if canonical and last_rime not in UNSTRESSED_ENDINGS:
+        return ('perfect', canonical)
+
+    multi_rime = word[starts[-2]:]
+    if _has_hiatus(vowel_runs[starts[-2]], polysyllable):
+        return None
+    if _is_ambiguous(word[starts[-2]:starts[-1]]) or _is_ambiguous(multi_rime[:3]):
+        return None
+    # A lone 'e' after vowel + consonant is usually silent (lately, homeless)
+    penult = starts[-2]
+    if word[penult:starts[-1]].startswith('e') and word[penult + 1] not in VOWELS and \
+            penult >= 2 and word[penult - 1] not in VOWELS and word[penult - 2] in VOWELS:
+        return None
+    return ('multi', multi_rime)
+
+
+def _occurrences(lyrics: str) -> List[WordOccurrence]:
+    """Candidate rhyme words with raw line numbers (line ends plus content words)."""
+    occurrences = []
+
+    for line_number, line in enumerate(lyrics.split('\n'), 1):
+        if SECTION_MARKER.match(line):
+            continue
+        words = [w.replace("'", '').lower() for w in WORD_PATTERN.findall(line)]
+        words = [w for w in words if w]
+
+        for i, word in enumerate(words):
+            line_final = i == len(words) - 1
+            if not line_final and (word in STOPWORDS or len(word) < 3):
+                continue
+            occurrences.append(WordOccurrence(word, line_number, line_final))
+
+    return occurrences
+
+
+def find_rhymes(lyrics: str) -> List[Dict]:
+    """
+    Find perfect and multi-syllable rhyme pairs in raw lyrics.
+
+    Pairs are unique by (unordered) word pair and use the first occurrence,
+    matching the analysis prompt rules. End-of-line words are paired across
+    the whole song; mid-line words only with words on nearby lines.
+
+    Args:
+        lyrics: Raw lyrics (section markers allowed)
+
+    Returns:
+        List of pairs in the analysis JSON format:
+        [{"w": "time", "r": "crime", "t": "perfect", "wl": 3, "rl": 5}, ...]
+    """
+    if not lyrics:
+        return []
+
+    groups: Dict[Tuple[str, str], List[WordOccurrence]] = {}
+    for occurrence in _occurrences(lyrics):
+        key = rhyme_key(occurrence.word)
+        if key:
+            groups.setdefault(key, []).append(occurrence)
+
+    pairs = []
+    seen = set()
+
+    for (rhyme_type, _), occurrences in groups.items():
+        for i, first in enumerate(occurrences):
+            for second in occurrences[i + 1:]:
+                if first.word == second.word:
+                    continue
+                if not (first.line_final or second.line_final) and \
+                        abs(first.line - second.line) > INTERNAL_RHYME_SPAN:
+                    continue
+                pair_key = frozenset((first.word, second.word))
+                if pair_key in seen:
+                    continue
+                seen.add(pair_key)
+                pairs.append({
+                    'w': first.word,
+                    'r': second.word,
+                    't': rhyme_type,
+                    'wl': first.line,
+                    'rl': second.line
+                })
+
+    pairs.sort(key=lambda p: (p['wl'], p['rl']))
+    return pairs
+
+
+if __name__ == "__main__":
+    test_lyrics = """[Verse 1]
+It can't be said I'm an early bird
+It's ten o'clock before I say a word
+Tonight I'm falling, hear me calling
+Turn out the light, hold me tight
+I keep on running till the morning
+Give me the time, it's not a crime"""
+
+    for pair in find_rhymes(test_lyrics):
+        print(f"{pair['w']:>10} / {pair['r']:<10} {pair['t']:<8} L{pair['wl']}-L{pair['rl']}")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+In-memory session store for multi-step flows in the API server.
+A session holds server-side state (extracted themes, ranked candidates,
+the generated concept, ...) so follow-up requests can send a session id
+instead of making the server recompute it.
+
+Sessions expire after a period of inactivity, and the least recently used
+ones are evicted when the store is full. State lives in the API server
+process only; an expired or unknown id just means recomputing.
+"""
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+# Seconds of inactivity before a session expires
+SESSION_TTL = int(os.getenv("SESSION_TTL", "1800"))
+
+# Sessions kept per store before the least recently used are evicted
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1000"))
+
+
+class SessionStore:
+    """Thread-safe TTL + LRU store of session dicts."""
+
+    def __init__(self, name: str, ttl: int = SESSION_TTL, max_sessions: int = MAX_SESSIONS):
+        self.name = name
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()   # id -> (expires_at, data)
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'hits': 0, 'misses': 0, 'evicted': 0}
+
+    def create(self, data: Dict[str, Any]) -> str:
+        """Store a new session and return its id."""
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._purge_expired()
+            self._sessions[session_id] = (time.time() + self.ttl, dict(data))
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats['evicted'] += 1
+            self._stats['created'] += 1
+        return session_id
+
+    def get(self, session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Session data (and extend its lifetime), or None if unknown or expired."""
+        if not session_id:
+            return None
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[0] < time.time():
+                self._sessions.pop(session_id, None)
+                self._stats['misses'] += 1
+                return None
+            self._sessions[session_id] = (time.time() + self.ttl, entry[1])
+            self._sessions.move_to_end(session_id)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def update(self, session_id: Optional[str], **fields) -> bool:
+        """Merge fields into a live session. Returns False if it is gone."""
+        with self._lock:
+            entry = self._sessions.get(session_id) if session_id else None
+            if entry is None or entry[0] < time.time():
+                return False
+            entry[1].update(fields)
+            self._sessions[session_id] = (time.time() + self.ttl, entry[1])
+            self._sessions.move_to_end(session_id)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'active': len(self._sessions), 'ttl': self.ttl, **self._stats}
+
+    def _purge_expired(self):
+        now = time.time()
+        # Oldest-touched first, so stop at the first live session
+        while self._sessions:
+            session_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at >= now:
+                break
+            del self._sessions[session_id]
+
+
+# Concept pipeline sessions: themes and ranked candidates from find-matching-songs
+concept_sessions = SessionStore('concept')
+
+# Melody "more like these" sessions: search criteria and songs already shown
+melody_sessions = SessionStore('melody')
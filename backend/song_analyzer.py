@@ -8,48 +8,17 @@ import os
 import json
 import re
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 from anthropic import Anthropic
+from llm_metrics import create_message, current_route
+from rhyme_detector import SECTION_MARKER, find_rhymes
 
 load_dotenv()
 
-
-@dataclass
-class RhymePair:
-    word: str
-    rhymes_with: str
-    rhyme_type: str
-    word_line: int
-    rhymes_with_line: int
-
-
-@dataclass
-class SongAnalysisResult:
-    concept_summary: str
-    section_breakdown: List[str]
-    themes: List[str]
-    imagery: List[str]
-    tone: str
-    universal_scenarios: List[str]
-    alternative_titles: List[str]
-    thematic_vocabulary: List[str]
-    rhyme_pairs: List[RhymePair]
-
-
-class SongAnalyzer:
-    """Analyzes song lyrics using Claude Sonnet 4.5."""
-    
-    def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        self.model = "claude-sonnet-4-5-20250929"
-        self.max_tokens = 20000
-        
-        # System prompt for caching
-        self.ANALYSIS_PROMPT_SYSTEM = [
-            {
-                "type": "text",
-                "text": """Analyze lyrics for ALL rhymes. Output JSON array of unique rhyme pairs.
+# Rhyme detection rules (shared by whole-song and chunked analysis)
+RHYME_INSTRUCTIONS = """Analyze lyrics for ALL rhymes. Output JSON array of unique rhyme pairs.
 
 ## RULES
 1. Different words only - never word with itself
@@ -95,11 +64,23 @@ Fields:
 Compound: "door hinge" / "orange" → compound
 "above us" / "enough love" → compound
 
-Embedded: "apologize" / "lies" → embedded
+Embedded: "apologize" / "lies" → embedded"""
 
----
+# Pre-pass mode: perfect/multi rhymes are found locally and sent as already found
+PREPASS_INSTRUCTIONS = """## ALREADY FOUND
+The user message includes an ALREADY FOUND list of perfect and multi rhymes that
+were detected mechanically ("word/rhymes_with (L4, L6)"). Do NOT repeat those pairs.
+Focus on slant, assonance, consonance, compound and embedded rhymes, and only add
+perfect or multi pairs that are missing from the list."""
 
-## CONCEPT ANALYSIS
+# Whole-song mode: lyric lines carry the numbers the local pre-pass uses
+NUMBERED_LYRICS_FORMAT = """## LINE NUMBERS
+Every lyric line is prefixed with its line number (e.g. "L12: ..."). Section
+markers and blank lines are not shown with a number but still count, so numbers
+can skip. Use those numbers for wl and rl."""
+
+# Concept analysis instructions and combined output format
+CONCEPT_INSTRUCTIONS = """## CONCEPT ANALYSIS
 
 Also provide:
 1. Concept summary (3-4 sentences about the song's core idea)
@@ -122,7 +103,111 @@ Output format:
   "universal_scenarios": [...],
   "alternative_titles": [...],
   "thematic_vocabulary": [...]
-}""",
+}"""
+
+# Output format for one window of a chunked analysis (rhymes only)
+CHUNK_RHYME_FORMAT = """## CHUNKED MODE
+You are analyzing one window of a longer song. Every line is prefixed with its
+line number in the full song (e.g. "L12: ..."). Use those numbers for wl and rl.
+
+Output format:
+{
+  "rhyme_pairs": [...]
+}"""
+
+# Concept-only instructions, run alongside the chunked rhyme windows
+CONCEPT_ONLY_INSTRUCTIONS = """Analyze the song's concept. Rhymes are analyzed separately - do not list them.
+
+Provide:
+1. Concept summary (3-4 sentences about the song's core idea)
+2. Section breakdown (describe what happens in each section)
+3. Themes (key themes present)
+4. Imagery (notable imagery)
+5. Tone (overall emotional tone)
+6. Universal scenarios (when might someone relate to this?)
+7. Alternative titles (10 alternative song titles)
+8. Thematic vocabulary (key words that capture the vibe)
+
+Output format:
+{
+  "concept_summary": "...",
+  "section_breakdown": [...],
+  "themes": [...],
+  "imagery": [...],
+  "tone": "...",
+  "universal_scenarios": [...],
+  "alternative_titles": [...],
+  "thematic_vocabulary": [...]
+}"""
+
+
+@dataclass
+class RhymePair:
+    word: str
+    rhymes_with: str
+    rhyme_type: str
+    word_line: int
+    rhymes_with_line: int
+
+
+@dataclass
+class SongAnalysisResult:
+    concept_summary: str
+    section_breakdown: List[str]
+    themes: List[str]
+    imagery: List[str]
+    tone: str
+    universal_scenarios: List[str]
+    alternative_titles: List[str]
+    thematic_vocabulary: List[str]
+    rhyme_pairs: List[RhymePair]
+
+
+class SongAnalyzer:
+    """Analyzes song lyrics using Claude Sonnet 4.5."""
+    
+    def __init__(self, chunked: bool = False, prepass: bool = True):
+        """
+        Args:
+            chunked: Split long lyrics into section windows analyzed in parallel
+            prepass: Find perfect/multi rhymes locally and ask Claude only for the rest
+        """
+        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.model = "claude-sonnet-4-5-20250929"
+        self.max_tokens = 20000
+        
+        self.prepass = prepass
+        rhyme_rules = RHYME_INSTRUCTIONS
+        if prepass:
+            rhyme_rules += "\n\n---\n\n" + PREPASS_INSTRUCTIONS
+        
+        # System prompt for caching
+        self.ANALYSIS_PROMPT_SYSTEM = [
+            {
+                "type": "text",
+                "text": rhyme_rules + "\n\n---\n\n" + NUMBERED_LYRICS_FORMAT + "\n\n---\n\n" + CONCEPT_INSTRUCTIONS,
+                "cache_control": {"type": "ephemeral"}
+            }
+        ]
+        
+        # Chunked mode: rhymes per section window, concept on the full lyrics
+        self.chunked = chunked
+        self.chunk_min_lines = 40       # Shorter songs are analyzed in one call
+        self.cross_section_span = 2     # Each section is also paired with the next N (as performed)
+        self.window_attempts = 2        # Tries per rhyme window before it is dropped
+        self.chunk_max_tokens = 8000
+        self.concept_max_tokens = 4000
+        self.CHUNK_RHYME_PROMPT_SYSTEM = [
+            {
+                "type": "text",
+                "text": rhyme_rules + "\n\n---\n\n" + CHUNK_RHYME_FORMAT,
+                "cache_control": {"type": "ephemeral"}
+            }
+        ]
+        self.CONCEPT_PROMPT_SYSTEM = [
+            {
+                "type": "text",
+                "text": CONCEPT_ONLY_INSTRUCTIONS,
                 "cache_control": {"type": "ephemeral"}
             }
         ]
@@ -139,17 +224,28 @@ Output format:
         Returns:
             SongAnalysisResult or None if analysis fails
         """
+        if self.chunked:
+            return self.analyze_chunked(lyrics, title, artist)
+        return self._analyze_whole_song(lyrics, title, artist)
+    
+    def _analyze_whole_song(self, lyrics: str, title: str, artist: str) -> Optional[SongAnalysisResult]:
+        """Analyze rhymes and concept in a single call over the full lyrics."""
         try:
+            found_pairs = self._find_local_rhymes(lyrics)
+            body, line_text = self._numbered_lyrics(lyrics)
+            
             # User prompt with just the lyrics (system has the instructions)
             user_prompt = f"""SONG: {title} by {artist}
-
+{self._already_found_block(found_pairs)}
 LYRICS:
-{lyrics}
+{body}
 
 Output JSON only."""
             
             # Call Claude with system message for prompt caching
-            message = self.client.messages.create(
+            message = create_message(
+                self.client,
+                task="song_analysis",
                 model=self.model,
                 max_tokens=self.max_tokens,
                 system=self.ANALYSIS_PROMPT_SYSTEM,
@@ -165,12 +261,334 @@ Output JSON only."""
                 return None
             
             # Parse and transform
-            return self._transform_response(json_str, title, artist)
+            result = self._transform_response(json_str, title, artist)
+            if result:
+                result.rhyme_pairs = self._merge_rhyme_pairs(
+                    [self._resolve_pair_lines(result.rhyme_pairs, line_text)], found=found_pairs
+                )
+            return result
             
         except Exception as e:
             print(f"❌ Error analyzing {title}: {str(e)}")
             return None
     
+    def analyze_chunked(self, lyrics: str, title: str, artist: str) -> Optional[SongAnalysisResult]:
+        """
+        Analyze long lyrics section by section in parallel.
+        
+        Rhymes are found in concurrent windows - each section on its own, plus
+        each section paired with the next few sections for cross-section rhymes -
+        while the concept analysis runs alongside on the full lyrics. Repeated
+        sections (choruses) are analyzed once, but neighbours are taken from
+        the song as performed, so a chorus is also paired with whatever comes
+        around each of its repeats (e.g. the bridge before the last chorus).
+        Sections never within cross_section_span of each other are not
+        compared, so rhymes between distant sections are missed.
+        
+        Pairs are merged, deduplicated and checked against global line numbers,
+        so latency approaches that of the longest window rather than the whole
+        song. A window that fails or can't be parsed is retried, then dropped;
+        the song keeps the rhymes of every other window.
+        
+        Args:
+            lyrics: The song lyrics (with [Section] markers)
+            title: Song title
+            artist: Artist name
+            
+        Returns:
+            SongAnalysisResult or None if analysis fails
+        """
+        from genius_scrape.parse_lyrics import split_sections
+        
+        sections, order = self._unique_sections(split_sections(lyrics))
+        line_count = sum(len(section['lines']) for section in sections)
+        
+        if len(sections) < 2 or line_count < self.chunk_min_lines:
+            return self._analyze_whole_song(lyrics, title, artist)
+        
+        found_pairs = self._find_local_rhymes(lyrics)
+        
+        windows = [[section] for section in sections]
+        cross_pairs = set()
+        for position, i in enumerate(order):
+            for j in order[position + 1:position + 1 + self.cross_section_span]:
+                pair = (min(i, j), max(i, j))
+                if i != j and pair not in cross_pairs:
+                    cross_pairs.add(pair)
+                    windows.append([sections[pair[0]], sections[pair[1]]])
+        
+        print(f"🧩 {title}: {len(sections)} sections → {len(windows)} rhyme windows + concept")
+        
+        # Worker threads have no request context, so pass the route explicitly
+        route = current_route()
+        
+        try:
+            # Actual concurrency is bounded by the shared Anthropic gateway
+            with ThreadPoolExecutor(max_workers=len(windows) + 1) as pool:
+                concept_future = pool.submit(self._analyze_concept, lyrics, title, artist, route)
+                window_futures = [
+                    pool.submit(self._analyze_window_with_retry, window, title, artist, found_pairs, route)
+                    for window in windows
+                ]
+                pair_lists = [future.result() for future in window_futures]
+                concept = concept_future.result()
+        except Exception as e:
+            print(f"❌ Error analyzing {title} (chunked): {str(e)}")
+            return None
+        
+        return SongAnalysisResult(
+            concept_summary=concept.get("concept_summary", ""),
+            section_breakdown=concept.get("section_breakdown", []),
+            themes=concept.get("themes", []),
+            imagery=concept.get("imagery", []),
+            tone=concept.get("tone", ""),
+            universal_scenarios=concept.get("universal_scenarios", []),
+            alternative_titles=concept.get("alternative_titles", []),
+            thematic_vocabulary=concept.get("thematic_vocabulary", []),
+            rhyme_pairs=self._merge_rhyme_pairs(pair_lists, found=found_pairs)
+        )
+    
+    def _unique_sections(self, sections: List[Dict]) -> Tuple[List[Dict], List[int]]:
+        """
+        Drop blank lines, empty sections and repeats of an earlier section's text.
+        
+        Returns:
+            (unique sections, index into them of every section as performed)
+        """
+        unique = []
+        order = []
+        seen = {}
+        
+        for section in sections:
+            lines = [(n, text.strip()) for n, text in section['lines'] if text.strip()]
+            if not lines:
+                continue
+            
+            fingerprint = '\n'.join(re.sub(r'[^a-z0-9 ]', '', text.lower()) for _, text in lines)
+            if fingerprint not in seen:
+                seen[fingerprint] = len(unique)
+                unique.append({'section_name': section['section_name'] or 'Intro', 'lines': lines})
+            order.append(seen[fingerprint])
+        
+        return unique, order
+    
+    def _analyze_window_with_retry(self, window: List[Dict], title: str, artist: str,
+                                   found_pairs: List[RhymePair] = (), route: str = None) -> List[RhymePair]:
+        """_analyze_window, retrying failed or unparseable responses; [] if every attempt fails."""
+        names = ' + '.join(section['section_name'] for section in window)
+        for attempt in range(1, self.window_attempts + 1):
+            try:
+                return self._analyze_window(window, title, artist, found_pairs, route)
+            except Exception as e:
+                print(f"⚠️  {title}: rhyme window {names} failed (attempt {attempt}): {e}")
+        print(f"⚠️  {title}: dropping rhyme window {names}")
+        return []
+    
+    def _analyze_window(self, window: List[Dict], title: str, artist: str,
+                        found_pairs: List[RhymePair] = (), route: str = None) -> List[RhymePair]:
+        """Find rhyme pairs in one section, or between two sections."""
+        def numbered(section):
+            return '\n'.join(f"L{n}: {text}" for n, text in section['lines'])
+        
+        line_text = {n: text.lower() for section in window for n, text in section['lines']}
+        first_section_lines = {n for n, _ in window[0]['lines']}
+        
+        def in_scope(word_line, rhymes_with_line):
+            if word_line not in line_text or rhymes_with_line not in line_text:
+                return False
+            # Cross windows only cover pairs that span both sections
+            return len(window) == 1 or \
+                (word_line in first_section_lines) != (rhymes_with_line in first_section_lines)
+        
+        window_found = [p for p in found_pairs if in_scope(p.word_line, p.rhymes_with_line)]
+        
+        if len(window) == 1:
+            scope = f"Find all rhymes within this {window[0]['section_name']} section."
+            body = numbered(window[0])
+        else:
+            first, second = window
+            scope = ("Find ONLY rhymes between SECTION A and SECTION B - one word from each. "
+                     "Rhymes inside a single section are analyzed separately.")
+            body = (f"SECTION A ({first['section_name']}):\n{numbered(first)}\n\n"
+                    f"SECTION B ({second['section_name']}):\n{numbered(second)}")
+        
+        user_prompt = f"""SONG: {title} by {artist}
+
+{scope}
+{self._already_found_block(window_found)}
+LYRICS:
+{body}
+
+Output JSON only."""
+        
+        message = create_message(
+            self.client,
+            task="song_analysis.rhyme_window",
+            route=route,
+            model=self.model,
+            max_tokens=self.chunk_max_tokens,
+            system=self.CHUNK_RHYME_PROMPT_SYSTEM,
+            messages=[{"role": "user", "content": user_prompt}]
+        )
+        
+        if message.stop_reason == "max_tokens":
+            names = ' + '.join(section['section_name'] for section in window)
+            print(f"⚠️  {title}: rhyme window {names} hit max_tokens, pairs may be incomplete")
+        
+        json_str = self._extract_json(message.content[0].text)
+        data = json.loads(json_str)
+        if isinstance(data, list):
+            data = {"rhyme_pairs": data}
+        
+        pairs = []
+        for pair in data.get("rhyme_pairs", []):
+            try:
+                word, rhymes_with, rhyme_type = pair["w"], pair["r"], pair["t"]
+            except (KeyError, TypeError):
+                continue
+            
+            word_line = self._resolve_line(word, pair.get("wl"), line_text)
+            rhymes_with_line = self._resolve_line(rhymes_with, pair.get("rl"), line_text)
+            if word_line is None or rhymes_with_line is None:
+                continue
+            
+            if not in_scope(word_line, rhymes_with_line):
+                continue
+            
+            pairs.append(RhymePair(
+                word=word,
+                rhymes_with=rhymes_with,
+                rhyme_type=rhyme_type,
+                word_line=word_line,
+                rhymes_with_line=rhymes_with_line
+            ))
+        
+        return pairs
+    
+    def _numbered_lyrics(self, lyrics: str) -> Tuple[str, Dict[int, str]]:
+        """
+        Lyrics with each line prefixed by its raw line number ("L12: ..."),
+        the numbering rhyme_detector uses; section markers are kept unnumbered
+        and blank lines dropped.
+        
+        Returns:
+            (prompt text, {line number: lowercase line text})
+        """
+        body = []
+        line_text = {}
+        for n, line in enumerate(lyrics.split('\n'), 1):
+            text = line.strip()
+            if not text:
+                continue
+            if SECTION_MARKER.match(text):
+                body.append(text)
+                continue
+            body.append(f"L{n}: {text}")
+            line_text[n] = text.lower()
+        return '\n'.join(body), line_text
+    
+    def _resolve_pair_lines(self, pairs: List[RhymePair], line_text: Dict[int, str]) -> List[RhymePair]:
+        """Pairs with their lines checked against the numbered lyrics (unplaceable pairs dropped)."""
+        resolved = []
+        for pair in pairs:
+            word_line = self._resolve_line(pair.word, pair.word_line, line_text)
+            rhymes_with_line = self._resolve_line(pair.rhymes_with, pair.rhymes_with_line, line_text)
+            if word_line is None or rhymes_with_line is None:
+                continue
+            pair.word_line, pair.rhymes_with_line = word_line, rhymes_with_line
+            resolved.append(pair)
+        return resolved
+    
+    def _resolve_line(self, word: str, reported, line_text: Dict[int, str]) -> Optional[int]:
+        """
+        Check a reported line number against the window's lines.
+        
+        Returns the reported line if the word is on it, otherwise the first line
+        in the window containing the word, otherwise the reported line if it is
+        in the window at all (for embedded/compound rhymes), else None.
+        """
+        try:
+            reported = int(reported)
+        except (TypeError, ValueError):
+            reported = None
+        
+        needle = str(word).lower()
+        if reported in line_text and needle in line_text[reported]:
+            return reported
+        
+        for n in sorted(line_text):
+            if needle in line_text[n]:
+                return n
+        
+        return reported if reported in line_text else None
+    
+    def _merge_rhyme_pairs(self, pair_lists: List[List[RhymePair]],
+                           found: List[RhymePair] = ()) -> List[RhymePair]:
+        """
+        Merge rhyme results: one pair per unordered word pair, ordered by line.
+        Locally found pairs win; otherwise the earliest occurrence is kept.
+        """
+        def by_line(p):
+            return (min(p.word_line, p.rhymes_with_line), max(p.word_line, p.rhymes_with_line))
+        
+        claude_pairs = sorted((pair for pairs in pair_lists for pair in pairs), key=by_line)
+        
+        merged = []
+        seen = set()
+        for pair in list(found) + claude_pairs:
+            key = frozenset((pair.word.lower(), pair.rhymes_with.lower()))
+            if len(key) < 2 or key in seen:
+                continue
+            seen.add(key)
+            merged.append(pair)
+        
+        merged.sort(key=by_line)
+        return merged
+    
+    def _find_local_rhymes(self, lyrics: str) -> List[RhymePair]:
+        """Perfect and multi rhymes found without Claude (empty when prepass is off)."""
+        if not self.prepass:
+            return []
+        return [
+            RhymePair(
+                word=pair["w"],
+                rhymes_with=pair["r"],
+                rhyme_type=pair["t"],
+                word_line=pair["wl"],
+                rhymes_with_line=pair["rl"]
+            )
+            for pair in find_rhymes(lyrics)
+        ]
+    
+    def _already_found_block(self, found_pairs: List[RhymePair]) -> str:
+        """User-prompt list of locally found pairs Claude should not repeat."""
+        if not self.prepass:
+            return ""
+        lines = [f"{p.word}/{p.rhymes_with} (L{p.word_line}, L{p.rhymes_with_line})" for p in found_pairs]
+        return "\nALREADY FOUND (perfect/multi - do not repeat):\n" + ("\n".join(lines) or "(none)") + "\n"
+    
+    def _analyze_concept(self, lyrics: str, title: str, artist: str, route: str = None) -> Dict:
+        """Concept-only analysis of the full lyrics (used by chunked mode)."""
+        user_prompt = f"""SONG: {title} by {artist}
+
+LYRICS:
+{lyrics}
+
+Output JSON only."""
+        
+        message = create_message(
+            self.client,
+            task="song_analysis.concept",
+            route=route,
+            model=self.model,
+            max_tokens=self.concept_max_tokens,
+            system=self.CONCEPT_PROMPT_SYSTEM,
+            messages=[{"role": "user", "content": user_prompt}]
+        )
+        
+        json_str = self._extract_json(message.content[0].text)
+        return json.loads(json_str)
+    
     def _extract_json(self, text: str) -> Optional[str]:
         """Extract JSON from Claude's response."""
         try:
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for key estimation from chords (key_inference) and the chord
+parsing it relies on. No database needed.
+
+    python -m pytest test_key_inference.py
+    python test_key_inference.py
+"""
+
+from chord_algebra import parse_chord, simplify_chord, convert_to_roman
+from chord_converter import infer_key
+from key_inference import chord_shape, estimate_key, estimate_song_keys
+
+
+def test_maj7_is_a_major_chord():
+    chord = parse_chord('Cmaj7')
+    assert (chord.root, chord.quality, chord.suffix) == ('C', '', 'maj7')
+    assert simplify_chord('Gmaj7') == 'G'
+    assert convert_to_roman('Fmaj7') == 'IVmaj7'
+    assert parse_chord('Am7').quality == 'm'
+    assert parse_chord('Cm(maj7)').quality == 'm'
+    assert convert_to_roman('Bdim') == 'vii°'
+
+
+def test_sus_and_power_chords_have_no_third():
+    assert chord_shape('Dsus4') == (2, (0, 5, 7), None)
+    assert chord_shape('Asus2') == (9, (0, 2, 7), None)
+    assert chord_shape('E5') == (4, (0, 7), None)
+    assert chord_shape('Em7') == (4, (0, 3, 7), 16)
+    assert chord_shape('N.C.') is None
+
+
+def test_maj7_progressions_stay_major():
+    assert estimate_key(['Gmaj7', 'Cmaj7', 'D', 'Em']).key == 'G'
+    assert estimate_key(['Bbmaj7', 'F', 'Gm', 'Eb']).key == 'A#'
+    assert infer_key(['Gmaj7', 'Cmaj7', 'D', 'Em']) == ('G', True)
+    # The root keeps the chords' spelling
+    assert infer_key(['Bbmaj7', 'F', 'Gm', 'Eb']) == ('Bb', True)
+
+
+def test_m7_progressions():
+    assert estimate_key(['Am7', 'Dm7', 'E7', 'Am7']).key == 'Am'
+    assert estimate_key(['Dm7', 'G7', 'Cmaj7', 'Cmaj7']).key == 'C'
+
+
+def test_sus_progressions():
+    assert estimate_key(['Dsus4', 'D', 'G', 'Csus2', 'C']).key == 'G'
+    assert estimate_key(['Asus2', 'A', 'E', 'D']).key == 'A'
+
+
+def test_plain_triads():
+    assert estimate_key(['C', 'G', 'Am', 'F']).key == 'C'
+    estimate = estimate_key(['Am', 'F', 'C', 'G'])
+    # Relative major/minor ambiguity: the opening chord decides, with less confidence
+    assert estimate.key == 'Am' and estimate.runner_up == 'C'
+    assert estimate.confidence < estimate_key(['C', 'G', 'Am', 'F']).confidence
+
+
+def test_unparseable_chords():
+    assert estimate_key([]) is None
+    assert estimate_key(['N.C.', 'x']) is None
+
+
+def test_song_keys_match_single_estimates_without_opening_hint():
+    songs = {
+        1: ['G', 'C', 'D', 'G', 'Em', 'C', 'D', 'G'],
+        2: ['Am', 'Dm', 'E', 'Am', 'F', 'E'],
+        3: ['N.C.']
+    }
+    keys = estimate_song_keys(songs)
+    assert set(keys) == {1, 2}
+    assert keys[1].key == 'G' and keys[2].key == 'Am'
+    assert all(0 < estimate.confidence <= 1 for estimate in keys.values())
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the harmonic mixing index (mix_index): Camelot key parsing,
+compatible keys and BPM search. Songs are built directly, no database needed.
+
+    python -m pytest test_mix_index.py
+    python test_mix_index.py
+"""
+
+from mix_index import MixIndex, MixSong, compatible_keys, format_camelot, key_to_camelot, parse_camelot
+
+
+def make_song(song_id, camelot, bpm, danceability=None, acousticness=None, genres=()):
+    return MixSong(
+        song_id=song_id,
+        title=f"Song {song_id}",
+        artist=f"Artist {song_id}",
+        bpm=bpm,
+        camelot=parse_camelot(camelot),
+        musical_key=None,
+        danceability=danceability,
+        acousticness=acousticness,
+        year=None,
+        genres=tuple(genres)
+    )
+
+
+def song_ids(results):
+    return [result['song_id'] for result in results]
+
+
+def test_key_to_camelot():
+    assert key_to_camelot('C') == (8, 'B')
+    assert key_to_camelot('Am') == (8, 'A')
+    assert key_to_camelot('G') == (9, 'B')
+    assert key_to_camelot('F#m') == (11, 'A')
+    assert key_to_camelot('Bb') == (6, 'B')
+    assert key_to_camelot('Unknown') is None
+
+
+def test_parse_camelot_notations():
+    assert parse_camelot('8A') == (8, 'A')
+    assert parse_camelot('12b') == (12, 'B')
+    # Open Key: 1d/1m is Camelot 8B/8A
+    assert parse_camelot('1d') == (8, 'B')
+    assert parse_camelot('1m') == (8, 'A')
+    assert parse_camelot('6m') == (1, 'A')
+    assert parse_camelot('A minor') == (8, 'A')
+    assert parse_camelot('13A') is None
+    assert parse_camelot(None) is None
+    assert format_camelot((8, 'A')) == '8A'
+
+
+def test_compatible_keys_wrap_around_the_wheel():
+    assert compatible_keys((12, 'A')) == [
+        ((12, 'A'), 'same'), ((12, 'B'), 'relative'), ((1, 'A'), 'adjacent'), ((11, 'A'), 'adjacent')
+    ]
+    assert ((12, 'B'), 'adjacent') in compatible_keys((1, 'B'))
+
+
+def test_bpm_range():
+    index = MixIndex([make_song(i, '8A', bpm) for i, bpm in enumerate([90, 100, 110, 120])])
+    assert [song.bpm for song in index.bpm_range((8, 'A'), 100, 110)] == [100, 110]
+    assert index.bpm_range((3, 'B'), 0, 999) == []
+
+
+def test_search_orders_by_key_relation_then_tempo():
+    index = MixIndex([
+        make_song('adjacent', '9A', 120),
+        make_song('relative', '8B', 120),
+        make_song('same far', '8A', 122),
+        make_song('same near', '8A', 120.5),
+        make_song('clash', '3B', 120)
+    ])
+    results = index.search((8, 'A'), 120)
+    assert song_ids(results) == ['same near', 'same far', 'relative', 'adjacent']
+    assert [r['key_relation'] for r in results] == ['same', 'same', 'relative', 'adjacent']
+    assert results[0]['bpm_difference'] == 0.5
+
+
+def test_search_half_and_double_time():
+    index = MixIndex([make_song('half', '8A', 60), make_song('double', '8A', 241), make_song('off', '8A', 90)])
+    results = index.search((8, 'A'), 120)
+    assert song_ids(results) == ['half', 'double']
+    assert [r['tempo_relation'] for r in results] == ['half', 'double']
+    assert index.search((8, 'A'), 120, half_double=False) == []
+
+
+def test_search_tolerance_and_filters():
+    index = MixIndex([
+        make_song('dance', '8A', 123.5, danceability=80, acousticness=10, genres=('dance pop',)),
+        make_song('acoustic', '8A', 122, danceability=30, acousticness=90, genres=('folk',)),
+        make_song('too fast', '8A', 130)
+    ])
+    assert song_ids(index.search((8, 'A'), 123, bpm_tolerance=2)) == ['dance', 'acoustic']
+    assert song_ids(index.search((8, 'A'), 123, danceability=(60, None))) == ['dance']
+    assert song_ids(index.search((8, 'A'), 123, acousticness=(None, 50))) == ['dance']
+    assert song_ids(index.search((8, 'A'), 123, genres=['Pop'])) == ['dance']
+    assert song_ids(index.search((8, 'A'), 123, exclude_song_id='dance')) == ['acoustic']
+    assert song_ids(index.search((8, 'A'), 123, limit=1)) == ['dance']
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
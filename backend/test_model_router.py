@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for fast/full model routing (model_router): output validators,
+escalation, the best-effort fallback and skipping a failing fast model.
+Uses a scripted client, no API calls.
+
+    python -m pytest test_model_router.py
+    python test_model_router.py
+"""
+
+from types import SimpleNamespace
+
+from llm_metrics import metrics
+from model_router import (
+    MIN_SAMPLES, PROBE_EVERY, ModelRouter, OutputValidationError,
+    parse_json_array, parse_json_object, string_list
+)
+
+# Keep test calls out of the metrics log
+metrics.log_path = None
+
+
+class BadRequest(Exception):
+    """A non-retryable API error."""
+
+
+class ScriptedClient:
+    """Answers messages.create() per model from a list of texts (or exceptions)."""
+
+    def __init__(self, **replies):
+        self.replies = {model: list(texts) for model, texts in replies.items()}
+        self.calls = []
+        self.messages = self
+
+    def create(self, model, **kwargs):
+        self.calls.append(model)
+        reply = self.replies[model].pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(content=[SimpleNamespace(text=reply)], usage=None, stop_reason='end_turn')
+
+
+def make_router(**kwargs):
+    return ModelRouter(fast_model='fast', full_model='full', **kwargs)
+
+
+def route(router, client, validate=string_list(2, 3), **kwargs):
+    return router.create(client, task='test.titles', validate=validate, route='/test',
+                         max_tokens=100, messages=[], **kwargs)
+
+
+def test_parsers_accept_fences_and_chatter():
+    assert parse_json_array('```json\n["a", "b"]\n```') == ['a', 'b']
+    assert parse_json_array('Here you go: ["a"] hope it helps') == ['a']
+    assert parse_json_object('{"score": 7}') == {'score': 7}
+    for parse, bad in ((parse_json_array, 'no json here'), (parse_json_array, '[1, 2'),
+                       (parse_json_object, '{"a": }')):
+        try:
+            parse(bad)
+        except OutputValidationError:
+            continue
+        raise AssertionError(bad)
+
+
+def test_string_list_validator():
+    validate = string_list(2, 3)
+    assert validate('["a", "b"]') == ['a', 'b']
+    for bad in ('["a"]', '["a", "b", "c", "d"]', '["a", ""]', '["a", 2]'):
+        try:
+            validate(bad)
+        except OutputValidationError:
+            continue
+        raise AssertionError(bad)
+    assert validate.lenient('["a", "", 2, "b", "c", "d"]') == ['a', 'b', 'c']
+
+
+def test_fast_model_answer_is_used():
+    router = make_router()
+    client = ScriptedClient(fast=['["a", "b"]'])
+    assert route(router, client) == ['a', 'b']
+    assert client.calls == ['fast']
+    assert router.stats()['tasks']['test.titles']['fast_ok'] == 1
+
+
+def test_invalid_fast_output_escalates():
+    router = make_router()
+    client = ScriptedClient(fast=['["only one"]'], full=['["a", "b"]'])
+    assert route(router, client) == ['a', 'b']
+    assert client.calls == ['fast', 'full']
+    assert router.stats()['tasks']['test.titles']['escalated_invalid'] == 1
+
+
+def test_fast_model_error_escalates():
+    router = make_router()
+    client = ScriptedClient(fast=[BadRequest('boom')], full=['["a", "b"]'])
+    assert route(router, client) == ['a', 'b']
+    assert router.stats()['tasks']['test.titles']['escalated_error'] == 1
+
+
+def test_invalid_full_output_uses_lenient_parse():
+    router = make_router()
+    client = ScriptedClient(fast=['nope'], full=['["a", "b", "c", "d"]'])
+    assert route(router, client) == ['a', 'b', 'c']
+    counters = router.stats()['tasks']['test.titles']
+    assert counters['full_invalid'] == 1 and counters['full_lenient'] == 1
+
+
+def test_explicit_fallback_wins_and_missing_fallback_raises():
+    router = make_router()
+    client = ScriptedClient(fast=['nope'], full=['["x"]'])
+    assert route(router, client, fallback=lambda text: ['fallback']) == ['fallback']
+
+    def strict(text):
+        raise OutputValidationError('never valid')
+
+    client = ScriptedClient(fast=['nope'], full=['["x"]'])
+    try:
+        route(router, client, validate=strict)
+    except OutputValidationError:
+        pass
+    else:
+        raise AssertionError('expected OutputValidationError')
+
+
+def test_disabled_router_goes_straight_to_full_model():
+    router = make_router(enabled=False)
+    client = ScriptedClient(full=['["a", "b"]'])
+    assert route(router, client) == ['a', 'b']
+    assert client.calls == ['full']
+    assert router.stats()['tasks']['test.titles']['full_direct'] == 1
+
+
+def test_failing_fast_model_is_skipped_with_probes():
+    router = make_router()
+    client = ScriptedClient(fast=['nope'] * MIN_SAMPLES, full=['["a", "b"]'] * (MIN_SAMPLES + PROBE_EVERY))
+    for _ in range(MIN_SAMPLES):
+        route(router, client)
+    assert client.calls.count('fast') == MIN_SAMPLES
+
+    # Below the success rate: only every PROBE_EVERY-th call tries the fast model
+    client.calls.clear()
+    client.replies['fast'] = ['["a", "b"]']
+    for _ in range(PROBE_EVERY):
+        route(router, client)
+    assert client.calls.count('fast') == 1
+    assert client.calls.count('full') == PROBE_EVERY - 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the local chord-progression index behind melody search: query
+conversion into the C major frame, filters and result ordering. Sections
+are built directly, no database needed.
+
+    python -m pytest test_progression_index.py
+    python test_progression_index.py
+"""
+
+from progression_index import ProgressionIndex, SectionProgression, chart_limit, section_type, to_c_frame
+
+
+def make_section(song_id, numerals, section_name='Chorus', **fields):
+    song = dict(bpm=None, time_signature=None, musical_key=None, year=None, peak_position=None, genres=())
+    song.update(fields)
+    return SectionProgression(
+        song_id=song_id,
+        title=f"Song {song_id}",
+        artist=f"Artist {song_id}",
+        section_name=section_name,
+        section_type=section_type(section_name),
+        numerals=tuple(numerals.split()),
+        chords=(),
+        **song
+    )
+
+
+def song_ids(results):
+    return [result['section'].song_id for result in results]
+
+
+def test_to_c_frame_from_chords():
+    assert to_c_frame(['I', 'V', 'vi', 'IV'], ['G', 'D', 'Em', 'C'], 'G major') == ['I', 'V', 'vi', 'IV']
+    # Minor keys map onto A minor, so the tonic is vi
+    assert to_c_frame(['i', 'VI', 'III', 'VII'], ['Em', 'C', 'G', 'D'], 'E minor') == ['vi', 'IV', 'I', 'V']
+    # Embellishments are dropped
+    assert to_c_frame([], ['Gmaj7', 'Cadd9', 'D/F#'], 'G major') == ['I', 'IV', 'V']
+
+
+def test_to_c_frame_from_numerals():
+    assert to_c_frame(['I', 'V', 'vi', 'IV'], [], 'Unknown major') == ['I', 'V', 'vi', 'IV']
+    assert to_c_frame(['i', 'VI', 'III', 'VII'], [], None) == ['vi', 'IV', 'I', 'V']
+    assert to_c_frame(['i', 'iv7', 'v'], [], None) == ['vi', 'ii', 'iii']
+
+
+def test_to_c_frame_skips_invalid_numerals():
+    assert to_c_frame(['i', '', 'IIII', 'iv'], [], None) == ['vi', 'ii']
+    assert to_c_frame(['', '?'], [], None) == []
+
+
+def test_section_type_and_chart_limit():
+    assert section_type('Pre-Chorus') == 'pre-chorus'
+    assert section_type('Chorus 2') == 'chorus'
+    assert section_type('Hook') == 'chorus'
+    assert section_type('Verse 1') == 'verse'
+    assert section_type('Outro') == 'other'
+    assert chart_limit('Top 20') == 20
+    assert chart_limit(None) is None
+
+
+def test_exact_before_partial_and_chorus_first():
+    index = ProgressionIndex([
+        make_section('partial', 'I V vi ii'),
+        make_section('verse', 'I V vi IV', 'Verse'),
+        make_section('chorus', 'I V vi IV'),
+        make_section('unrelated', 'ii iii ii iii')
+    ])
+    results = index.search(['I', 'V', 'vi', 'IV'], limit=3)
+    assert song_ids(results) == ['chorus', 'verse', 'partial']
+    assert [r['match'] for r in results] == ['exact', 'exact', 'partial']
+    assert results[2]['overlap'] == 2 / 3
+
+
+def test_search_keeps_best_section_per_song():
+    index = ProgressionIndex([
+        make_section(1, 'I V vi ii', 'Verse'),
+        make_section(1, 'I V vi IV', 'Chorus'),
+        make_section(2, 'I V vi IV', 'Verse')
+    ])
+    results = index.search(['I', 'V', 'vi', 'IV'])
+    assert song_ids(results) == [1, 2]
+    assert results[0]['section'].section_name == 'Chorus'
+
+
+def test_search_filters():
+    index = ProgressionIndex([
+        make_section('fast', 'I V vi IV', bpm=150, genres=('pop',), peak_position=5, year=2015),
+        make_section('slow', 'I V vi IV', bpm=80, genres=('country',), peak_position=50, year=1995),
+        make_section('unknown bpm', 'I V vi IV')
+    ])
+    query = ['I', 'V', 'vi', 'IV']
+    # Unknown BPM passes the filter but sorts after a known match
+    assert song_ids(index.search(query, bpm=82)) == ['slow', 'unknown bpm']
+    assert song_ids(index.search(query, genres=['Pop'])) == ['fast']
+    assert song_ids(index.search(query, chart_position='Top 10')) == ['fast']
+    assert song_ids(index.search(query, year_start=2000, year_end=2020)) == ['fast']
+
+
+def test_search_needs_two_chords():
+    index = ProgressionIndex([make_section(1, 'I V vi IV')])
+    assert index.search(['I']) == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for loop canonicalization (progression_loops) and loop matching in
+the progression index. No database needed.
+
+    python -m pytest test_progression_loops.py
+    python test_progression_loops.py
+"""
+
+from progression_loops import canonical_loop, collapse_repeats, minimal_period, section_loops
+from test_progression_index import make_section, song_ids
+from progression_index import ProgressionIndex
+
+
+def test_collapse_repeats_and_minimal_period():
+    assert collapse_repeats('I I V V vi IV I'.split()) == ['I', 'V', 'vi', 'IV']
+    assert collapse_repeats('I I V I'.split(), cyclic=False) == ['I', 'V', 'I']
+    assert minimal_period('I V I V'.split()) == ['I', 'V']
+    assert minimal_period('I V vi'.split()) == ['I', 'V', 'vi']
+
+
+def test_canonical_loop_rotations():
+    """Every rotation of a loop has the same key."""
+    loop = ['I', 'V', 'vi', 'IV']
+    keys = {canonical_loop(loop[i:] + loop[:i]) for i in range(len(loop))}
+    assert len(keys) == 1
+    assert canonical_loop(['I', 'V', 'vi', 'ii']) not in keys
+
+
+def test_canonical_loop_held_chords_and_repeats():
+    """Held chords, the wrap-around and playing the loop twice don't change the key."""
+    key = canonical_loop(['I', 'V', 'vi', 'IV'])
+    assert canonical_loop('I I V V vi vi IV IV'.split()) == key
+    assert canonical_loop('I V vi IV I V vi IV'.split()) == key
+    assert canonical_loop('I V vi IV I'.split()) == key
+    assert canonical_loop(['I', 'I', 'I']) is None
+    assert canonical_loop([]) is None
+
+
+def test_section_loops():
+    loops = section_loops('vi IV I V vi IV I V ii'.split())
+    assert canonical_loop(['I', 'V', 'vi', 'IV']) in loops
+    # The whole section also counts as one cycle
+    assert section_loops('I IV V'.split()) == {canonical_loop(['I', 'IV', 'V'])}
+
+
+def test_loop_matches_rank_between_exact_and_partial():
+    index = ProgressionIndex([
+        make_section('partial', 'I V vi ii'),
+        make_section('loop', 'vi vi IV IV I I V V'),
+        make_section('exact', 'I V vi IV I V vi IV')
+    ])
+    results = index.search(['I', 'V', 'vi', 'IV'], limit=3)
+    assert song_ids(results) == ['exact', 'loop', 'partial']
+    assert [r['match'] for r in results] == ['exact', 'loop', 'partial']
+    assert results[1]['similarity'] == 1.0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for the harmonic edit distance and its BK-tree (progression_similarity)
+and the near matches they add to melody search. No database needed.
+
+    python -m pytest test_progression_similarity.py
+    python test_progression_similarity.py
+"""
+
+import random
+
+from progression_similarity import (
+    BKTree, INSERT_DELETE, OTHER_SUBSTITUTION, SAME_DEGREE, SAME_FUNCTION,
+    progression_distance, similarity, substitution_cost, window_distance
+)
+from test_progression_index import make_section, song_ids
+from progression_index import ProgressionIndex
+
+NUMERALS = ['I', 'ii', 'iii', 'IV', 'V', 'vi', 'vii°', 'iv', 'II', 'Bb']
+
+
+def test_substitution_costs_follow_harmonic_function():
+    assert substitution_cost('IV', 'IV') == 0
+    assert substitution_cost('IV', 'iv') == SAME_DEGREE
+    assert substitution_cost('ii', 'IV') == SAME_FUNCTION
+    assert substitution_cost('I', 'vi') == SAME_FUNCTION
+    assert substitution_cost('V', 'IV') == OTHER_SUBSTITUTION
+
+
+def test_progression_distance():
+    assert progression_distance(['I', 'V', 'vi', 'IV'], ['I', 'V', 'vi', 'ii']) == SAME_FUNCTION
+    assert progression_distance(['I', 'V'], ['I', 'V', 'IV']) == INSERT_DELETE
+    # limit stops early and reports limit + 1
+    assert progression_distance(['I'] * 6, ['V'] * 6, limit=5) == 6
+
+
+def test_progression_distance_is_a_metric():
+    """Identity, symmetry and the triangle inequality the BK-tree relies on."""
+    rng = random.Random(7)
+    sequences = [tuple(rng.choice(NUMERALS) for _ in range(rng.randint(0, 6))) for _ in range(40)]
+    for a in sequences:
+        assert progression_distance(a, a) == 0
+        for b in sequences:
+            ab = progression_distance(a, b)
+            assert ab == progression_distance(b, a)
+            for c in sequences[:15]:
+                assert ab <= progression_distance(a, c) + progression_distance(c, b)
+
+
+def test_window_distance_wraps_around():
+    assert window_distance(['IV', 'I'], ['I', 'V', 'vi', 'IV']) == 0
+    assert window_distance(['I', 'V', 'vi'], ['I', 'V']) == INSERT_DELETE
+
+
+def test_similarity():
+    assert similarity(0, ['I', 'V'], ['I', 'V']) == 1.0
+    assert 0 < similarity(2, ['I', 'V', 'vi', 'IV'], ['I', 'V', 'vi', 'ii']) < 1
+
+
+def test_bk_tree_search_matches_brute_force():
+    rng = random.Random(11)
+    tree = BKTree()
+    sequences = {}
+    for i in range(300):
+        sequence = tuple(rng.choice(NUMERALS) for _ in range(rng.randint(2, 8)))
+        tree.add(sequence, i)
+        sequences.setdefault(sequence, []).append(i)
+    assert tree.size == len(sequences)
+
+    for _ in range(25):
+        query = tuple(rng.choice(NUMERALS) for _ in range(rng.randint(2, 8)))
+        for max_distance in (0, 4, 8):
+            expected = {
+                sequence: (progression_distance(query, sequence), payloads)
+                for sequence, payloads in sequences.items()
+                if progression_distance(query, sequence) <= max_distance
+            }
+            found = {sequence: (distance, payloads) for distance, sequence, payloads in tree.search(query, max_distance)}
+            assert found == expected
+
+
+def test_bk_tree_nearest():
+    tree = BKTree()
+    for i, sequence in enumerate([('I', 'V'), ('I', 'IV'), ('I', 'vii°'), ('vi', 'iii')]):
+        tree.add(sequence, i)
+    nearest = tree.nearest([('I', 'V')], k=2, max_distance=4)
+    assert [sequence for _, sequence, _ in nearest] == [('I', 'V'), ('I', 'vii°')]
+
+
+def test_search_orders_match_kinds():
+    """exact before loop before partial before similar."""
+    index = ProgressionIndex([
+        make_section('similar', 'iii V vi ii'),
+        make_section('partial', 'I V vi ii'),
+        make_section('loop', 'vi IV I V'),
+        make_section('exact', 'I V vi IV I V vi IV'),
+        make_section('unrelated', 'ii iii ii iii')
+    ])
+    results = index.search(['I', 'V', 'vi', 'IV'])
+    assert song_ids(results) == ['exact', 'loop', 'partial', 'similar']
+    assert [r['match'] for r in results] == ['exact', 'loop', 'partial', 'similar']
+    assert results[0]['exact'] and results[0]['similarity'] == 1.0
+    assert 0 < results[-1]['similarity'] < 1
+
+
+def test_near_matches_only_fill_up_to_limit():
+    index = ProgressionIndex([
+        make_section('exact', 'I V vi IV'),
+        make_section('similar', 'iii V vi ii')
+    ])
+    assert song_ids(index.search(['I', 'V', 'vi', 'IV'], limit=1)) == ['exact']
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the local rhyme pre-pass (rhyme_detector): rhyme keys for single
+words and the pairs found in lyrics. No API calls.
+
+    python -m pytest test_rhyme_detector.py
+    python test_rhyme_detector.py
+"""
+
+from rhyme_detector import rhyme_key, find_rhymes
+
+
+def rhymes(a, b):
+    key = rhyme_key(a)
+    return key is not None and key == rhyme_key(b)
+
+
+def pair_words(pairs):
+    return {frozenset((pair['w'], pair['r'])) for pair in pairs}
+
+
+def test_perfect_rhymes():
+    assert rhyme_key('time') == ('perfect', 'ime')
+    for a, b in [('time', 'crime'), ('light', 'tonight'), ('night', 'bite'), ('away', 'today'),
+                 ('clean', 'mean'), ('dream', 'seem'), ('me', 'free'), ('coin', 'join')]:
+        assert rhymes(a, b), (a, b)
+
+
+def test_multi_rhymes():
+    assert rhyme_key('happy') == ('multi', 'appy')
+    for a, b in [('happy', 'snappy'), ('calling', 'falling'), ('playing', 'saying'), ('dying', 'lying')]:
+        assert rhymes(a, b), (a, b)
+
+
+def test_unstressed_endings_are_not_perfect_rhymes():
+    assert not rhymes('happy', 'me')
+    assert not rhymes('morning', 'calling')
+    assert rhyme_key('morning')[0] == 'multi'
+
+
+def test_hiatus_vowels_are_left_to_claude():
+    """Vowel pairs that may be two syllables are never keyed."""
+    for word in ('going', 'doing', 'ocean', 'lion', 'quiet', 'ruin', 'idea', 'people'):
+        assert rhyme_key(word) is None, word
+    assert not rhymes('going', 'doing')
+    assert not rhymes('ocean', 'clean')
+
+
+def test_ambiguous_and_irregular_words_are_skipped():
+    for word in ('love', 'move', 'now', 'know', 'bread', 'been', 'what', 'have', 'are'):
+        assert rhyme_key(word) is None, word
+    assert not rhymes('been', 'clean')
+    assert not rhymes('what', 'that')
+
+
+def test_function_words_are_never_keyed():
+    for word in ('the', 'and', 'of', 'a', 'to', 'that'):
+        assert rhyme_key(word) is None, word
+
+
+def test_find_rhymes_pairs_and_line_numbers():
+    lyrics = "[Verse 1]\nGive me the time\nIt's not a crime\n\n[Chorus]\nTurn out the light\nHold me tight"
+    pairs = find_rhymes(lyrics)
+    assert pair_words(pairs) == {frozenset(('time', 'crime')), frozenset(('light', 'tight'))}
+    # Raw line numbers: section markers and blank lines count
+    time_crime = next(p for p in pairs if p['w'] == 'time')
+    assert (time_crime['wl'], time_crime['rl'], time_crime['t']) == (2, 3, 'perfect')
+    light_tight = next(p for p in pairs if p['w'] == 'light')
+    assert (light_tight['wl'], light_tight['rl']) == (6, 7)
+
+
+def test_find_rhymes_negative_pairs():
+    lyrics = "I keep on going\nWhat are you doing\nOut on the ocean\nThe water is clean\nWhere have you been"
+    assert find_rhymes(lyrics) == []
+    # "the" ends a line but never rhymes with "me"
+    assert find_rhymes("Come and sing with me\nHold on to the") == []
+
+
+def test_find_rhymes_first_occurrence_and_no_self_pairs():
+    lyrics = "Give me the time\nGive me the time\nIt's not a crime\nIt's not a crime"
+    pairs = find_rhymes(lyrics)
+    assert len(pairs) == 1
+    assert (pairs[0]['wl'], pairs[0]['rl']) == (1, 3)
+
+
+def test_internal_rhymes_only_on_nearby_lines():
+    near = find_rhymes("The night is young\nWe fight it out all along")
+    assert frozenset(('night', 'fight')) in pair_words(near)
+    far = find_rhymes("The night is young\nsong\nsong\nWe fight it out all along")
+    assert frozenset(('night', 'fight')) not in pair_words(far)
+
+
+def test_empty_lyrics():
+    assert find_rhymes('') == []
+    assert find_rhymes('[Intro]') == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for theme normalization (theme_normalizer) and stable canonical ids
+in the offline clustering (build_theme_clusters). No database needed.
+
+    python -m pytest test_theme_normalizer.py
+    python test_theme_normalizer.py
+"""
+
+from collections import Counter
+
+from theme_normalizer import ThemeNormalizer, lemma_key, lemmatize
+from build_theme_clusters import build_clusters
+
+
+def test_lemmatize():
+    assert lemmatize('hearts') == 'heart'
+    assert lemmatize('memories') == 'memory'
+    assert lemmatize('broken') == 'break'
+    assert lemmatize('dancing') == lemmatize('dance') == lemmatize('danced')
+    assert lemmatize('running') == 'run'
+    assert lemmatize('loss') == 'lose'
+    assert lemmatize('kiss') == 'kiss'
+
+
+def test_lemma_key_equivalent_spellings():
+    assert lemma_key('Heartbreak') == lemma_key('broken hearts') == lemma_key('a broken heart') == 'break heart'
+    assert lemma_key('letting go') == lemma_key('Moving on')
+    assert lemma_key('self-love') == lemma_key('self worth')
+    assert lemma_key('lost love') == lemma_key('love lost')
+
+
+def test_lemma_key_keeps_different_themes_apart():
+    assert lemma_key('heartbreak') != lemma_key('heart')
+    assert lemma_key('new love') != lemma_key('lost love')
+    assert lemma_key('the') == ''
+    assert lemma_key('') == ''
+
+
+def test_resolve_stored_ids_and_lemma_keys():
+    normalizer = ThemeNormalizer({'heartbreak': 7, 'nostalgia': 12})
+    assert normalizer.resolve('Heartbreak') == 7
+    assert normalizer.resolve('broken hearts') == 7
+    assert normalizer.resolve('nostalgic') == 12
+    assert normalizer.resolve_all(['heartbreak', '', 'the']) == [7, None, None]
+
+
+def test_unknown_themes_get_stable_negative_ids():
+    normalizer = ThemeNormalizer({'heartbreak': 7})
+    first = normalizer.resolve('summer road trip')
+    assert first < 0
+    assert normalizer.resolve('summer road trips') == first
+    second = normalizer.resolve('city lights')
+    assert second < 0 and second != first
+
+
+def test_cluster_ids_survive_rebuilds():
+    counts = Counter({'heartbreak': 5, 'broken heart': 3, 'nostalgia': 4, 'party': 2})
+    first = build_clusters(counts)
+    assert first['heartbreak']['canonical_id'] == first['broken heart']['canonical_id']
+    existing = {theme: entry['canonical_id'] for theme, entry in first.items()}
+
+    # New themes, changed counts and a reworded theme keep the existing ids
+    counts.update({'party': 20, 'summer': 3, 'broken hearts': 1})
+    second = build_clusters(counts, existing=existing)
+    for theme in ('heartbreak', 'broken heart', 'nostalgia', 'party'):
+        assert second[theme]['canonical_id'] == first[theme]['canonical_id']
+    assert second['broken hearts']['canonical_id'] == first['heartbreak']['canonical_id']
+    assert second['summer']['canonical_id'] == max(existing.values()) + 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Precomputed theme index for find_matching_songs.
+Holds every analyzed song once, with its themes as a sparse song × theme
+matrix, so matching a concept is a sparse matrix product plus a top-k
+selection instead of nested Python loops over the whole table.
+
+An extracted theme matches a song theme when either one contains the
+other (case-insensitive), or when both resolve to the same canonical theme
+id (theme_normalizer), so "heartbreak" also finds "broken hearts". Each
+extracted theme counts at most once per song.
+
+Indexes are built by corpus_cache, which owns loading and refreshing.
+"""
+
+import threading
+from typing import List, Dict, Optional, Any
+
+import numpy as np
+from scipy import sparse
+
+from theme_normalizer import ThemeNormalizer
+
+# Songs without a Billboard rank sort after ranked ones
+UNRANKED = 999
+
+
+class ThemeIndex:
+    """Sparse theme matrix, filter columns and rank array for all analyzed songs."""
+
+    def __init__(self, rows: List[Any], normalizer: Optional[ThemeNormalizer] = None):
+        """
+        Args:
+            rows: corpus_cache.CorpusRow records
+            normalizer: Canonical theme ids (lemma keys only when omitted)
+        """
+        # Songs without themes can never match, so they are not indexed
+        self.rows = [row for row in rows if row.themes]
+
+        vocab_ids: Dict[str, int] = {}
+        row_indices, col_indices = [], []
+        for i, row in enumerate(self.rows):
+            for theme in set(t.lower() for t in row.themes):
+                col = vocab_ids.setdefault(theme, len(vocab_ids))
+                row_indices.append(i)
+                col_indices.append(col)
+
+        self.vocab = list(vocab_ids)
+
+        # Canonical theme id → vocabulary columns in that cluster
+        self.normalizer = normalizer or ThemeNormalizer()
+        self.canonical_columns: Dict[int, List[int]] = {}
+        for col, theme in enumerate(self.vocab):
+            canonical_id = self.normalizer.resolve(theme)
+            if canonical_id is not None:
+                self.canonical_columns.setdefault(canonical_id, []).append(col)
+        # Column-compressed so each theme's songs are one contiguous slice
+        self.matrix = sparse.csc_matrix(
+            (np.ones(len(row_indices), dtype=np.int32), (row_indices, col_indices)),
+            shape=(len(self.rows), len(self.vocab))
+        )
+
+        self.song_ids = [row.song_id for row in self.rows]
+        self.ranks = np.array([row.billboard_rank or UNRANKED for row in self.rows], dtype=np.int64)
+        self.years = np.array([row.year or 0 for row in self.rows], dtype=np.int64)
+        self.artists = np.array([row.artist or '' for row in self.rows], dtype=object)
+
+        genre_ids: Dict[str, int] = {}
+        self.genre_codes = np.array(
+            [genre_ids.setdefault((row.genre or '').lower(), len(genre_ids)) for row in self.rows],
+            dtype=np.int64
+        )
+        self.genres = list(genre_ids)
+
+        # Song id → group code (the table has duplicate analyses of some songs)
+        group_ids: Dict[Any, int] = {}
+        self.song_groups = np.array(
+            [group_ids.setdefault(song_id, len(group_ids)) for song_id in self.song_ids],
+            dtype=np.int64
+        )
+        self.group_count = len(group_ids)
+        self.has_duplicates = self.group_count < len(self.rows)
+
+        self._theme_columns: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _theme_columns_for(self, theme: str) -> np.ndarray:
+        """Vocabulary columns matching one extracted theme (the nonzeros of its indicator x)."""
+        theme = theme.lower()
+        with self._lock:
+            columns = self._theme_columns.get(theme)
+        if columns is None:
+            columns = set(col for col, v in enumerate(self.vocab) if theme in v or v in theme)
+            columns.update(self.canonical_columns.get(self.normalizer.resolve(theme), ()))
+            columns = np.array(sorted(columns), dtype=np.int64)
+            with self._lock:
+                self._theme_columns[theme] = columns
+        return columns
+
+    def filter_mask(self, filters: Optional[Dict] = None) -> np.ndarray:
+        """Boolean mask of rows passing the concept filters."""
+        filters = filters or {}
+        mask = np.ones(len(self.rows), dtype=bool)
+
+        if filters.get('years'):
+            mask &= np.isin(self.years, [int(y) for y in filters['years']])
+
+        if filters.get('minRank') and filters.get('maxRank'):
+            mask &= (self.ranks >= int(filters['minRank'])) & (self.ranks <= int(filters['maxRank']))
+
+        if filters.get('artists'):
+            mask &= np.isin(self.artists, list(filters['artists']))
+
+        if filters.get('genres'):
+            # Case-insensitive partial matching, resolved once per distinct genre
+            wanted = [g.lower() for g in filters['genres']]
+            matching_codes = [
+                code for code, genre in enumerate(self.genres)
+                if genre and any(w in genre for w in wanted)
+            ]
+            mask &= np.isin(self.genre_codes, matching_codes)
+
+        return mask
+
+    def scores(self, themes: List[str]) -> np.ndarray:
+        """
+        Per-row count of extracted themes that match at least one song theme.
+
+        Equivalent to sum over themes of (M @ x_theme > 0): the support of
+        M @ x is the union of the row slices of x's nonzero columns, which the
+        CSC layout gives directly without a dense product.
+        """
+        counts = np.zeros(len(self.rows), dtype=np.int64)
+        if not self.vocab:
+            return counts
+
+        indptr, indices = self.matrix.indptr, self.matrix.indices
+        for theme in dict.fromkeys(t.lower() for t in themes):
+            columns = self._theme_columns_for(theme)
+            if columns.size == 0:
+                continue
+            if columns.size == 1:
+                rows = indices[indptr[columns[0]]:indptr[columns[0] + 1]]
+            else:
+                rows = np.unique(np.concatenate([indices[indptr[c]:indptr[c + 1]] for c in columns]))
+            counts[rows] += 1
+        return counts
+
+    def top_songs(self, themes: List[str], num_songs: int = 10,
+                  filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Best matching songs: overlap score desc, then Billboard rank asc,
+        one entry per song id.
+
+        Returns:
+            [{'song': row, 'score': int, 'billboard_rank': int}, ...]
+        """
+        if not self.rows or num_songs <= 0:
+            return []
+
+        scores = self.scores(themes)
+        candidates = np.flatnonzero(self.filter_mask(filters))
+        if candidates.size == 0:
+            return []
+
+        # One unique key per row, higher is better: score, then lower rank,
+        # then earlier row
+        row_count = len(self.rows)
+        keys = scores[candidates] * (UNRANKED + 1) + (UNRANKED - np.minimum(self.ranks[candidates], UNRANKED))
+        keys = keys * (row_count + 1) + (row_count - candidates)
+
+        # Keep each song's best row only
+        if self.has_duplicates:
+            groups = self.song_groups[candidates]
+            best = np.full(self.group_count, -1, dtype=np.int64)
+            np.maximum.at(best, groups, keys)
+            keep = keys == best[groups]
+            candidates, keys = candidates[keep], keys[keep]
+
+        k = min(num_songs, candidates.size)
+        top = np.argpartition(-keys, k - 1)[:k] if k < candidates.size else np.arange(candidates.size)
+        top = top[np.argsort(-keys[top])]
+
+        return [
+            {
+                'song': self.rows[row_index].to_dict(),
+                'score': int(scores[row_index]),
+                'billboard_rank': int(self.ranks[row_index])
+            }
+            for row_index in candidates[top]
+            if self.song_ids[row_index]
+        ]
+
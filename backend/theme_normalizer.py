@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Theme normalization for concept matching.
+Maps free-text themes ("heartbreak", "Broken hearts", "a broken heart") to
+canonical theme ids, so song themes and extracted themes can be compared
+as integers instead of substrings.
+
+Two layers:
+- lemma_key(): deterministic key from compound splitting, a synonym table,
+  light lemmatization and word order normalization
+- theme_canonical table: offline clusters built by build_theme_clusters.py
+  (lemma keys, optionally merged further by one Claude pass)
+"""
+
+import re
+import threading
+from typing import Dict, Optional, Iterable, List
+
+WORD_PATTERN = re.compile(r"[a-z]+")
+
+# Words that never change a theme's meaning
+STOPWORDS = {'a', 'an', 'the', 'of', 'and', 'in', 'to', 'for', 'with', 'being', 'one', 'ones', 'your', 'my', 'our', 'their'}
+
+# Closed compounds split into their parts
+COMPOUNDS = {
+    'heartbreak': 'heart break',
+    'heartbroken': 'heart broken',
+    'heartache': 'heart ache',
+    'breakup': 'break up',
+    'selflove': 'self love',
+    'selfworth': 'self worth',
+    'lovesick': 'love sick',
+    'nightlife': 'night life',
+    'homesick': 'home sick',
+    'homesickness': 'home sick',
+    'daydream': 'day dream',
+    'daydreaming': 'day dream',
+}
+
+# Irregular forms → base word
+IRREGULAR_LEMMAS = {
+    'broken': 'break', 'broke': 'break',
+    'lost': 'lose', 'loss': 'lose', 'losing': 'lose',
+    'fell': 'fall', 'fallen': 'fall',
+    'gone': 'go', 'went': 'go',
+    'felt': 'feel', 'feelings': 'feel',
+    'hurt': 'hurt', 'hurting': 'hurt',
+    'men': 'man', 'women': 'woman', 'children': 'child',
+    'lonely': 'lone', 'loneliness': 'lone', 'alone': 'lone',
+    'betrayal': 'betray',
+    'jealousy': 'jealous',
+    'freedom': 'free',
+    'youth': 'young',
+    'nostalgic': 'nostalgia',
+    'romantic': 'romance',
+    'sadness': 'sad',
+    'happiness': 'happy',
+}
+
+# Whole-phrase synonyms (after lowercasing) → representative phrase
+PHRASE_SYNONYMS = {
+    'letting go': 'moving on',
+    'move on': 'moving on',
+    'getting over someone': 'moving on',
+    'split': 'break up',
+    'splitting up': 'break up',
+    'unrequited love': 'one-sided love',
+    'self-love': 'self worth',
+    'self-acceptance': 'self worth',
+    'self-confidence': 'self worth',
+    'partying': 'party',
+    'night out': 'party',
+    'clubbing': 'party',
+    'infidelity': 'cheating',
+    'unfaithfulness': 'cheating',
+    'growing up': 'coming of age',
+    'adolescence': 'coming of age',
+    'grief': 'mourning',
+    'bereavement': 'mourning',
+    'wanderlust': 'travel',
+    'yearning': 'longing',
+    'desire': 'longing',
+}
+
+# Suffix rules applied in order, first match wins: (suffix, replacement)
+SUFFIX_RULES = [
+    ('iness', 'y'), ('ies', 'y'), ('ness', ''), ('ment', ''),
+    ('ing', ''), ('ed', ''), ('es', ''), ('s', ''),
+]
+
+
+def lemmatize(word: str) -> str:
+    """Light rule-based lemma; only needs to be consistent, not pretty."""
+    if word in IRREGULAR_LEMMAS:
+        return IRREGULAR_LEMMAS[word]
+
+    for suffix, replacement in SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith('ss'):
+            word = word[:-len(suffix)] + replacement
+            break
+
+    # dancing/dance/danced → danc, running → run
+    if len(word) > 3 and word.endswith('e'):
+        word = word[:-1]
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'aeiouls':
+        word = word[:-1]
+    return word
+
+
+def lemma_key(theme: str) -> str:
+    """
+    Deterministic normalized key for a theme string.
+    "Heartbreak", "broken hearts" and "a broken heart" all give "break heart".
+    """
+    text = (theme or '').lower().strip()
+    text = PHRASE_SYNONYMS.get(text, text)
+    text = text.replace('-', ' ').replace('/', ' ')
+
+    words = []
+    for word in WORD_PATTERN.findall(text):
+        word = COMPOUNDS.get(word, word)
+        words.extend(word.split())
+
+    lemmas = {lemmatize(word) for word in words if word not in STOPWORDS}
+    return ' '.join(sorted(lemmas))
+
+
+class ThemeNormalizer:
+    """Resolves theme strings to canonical integer ids."""
+
+    def __init__(self, mapping: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            mapping: theme_canonical rows as {lowercased theme text: canonical id}
+        """
+        self._by_text: Dict[str, int] = dict(mapping or {})
+        self._by_key: Dict[str, int] = {}
+        for text, canonical_id in self._by_text.items():
+            self._by_key.setdefault(lemma_key(text), canonical_id)
+        # Keys not in the table get negative ids so they never collide with stored ones
+        self._next_local_id = -1
+        self._lock = threading.Lock()
+
+    def resolve(self, theme: str) -> Optional[int]:
+        """Canonical id for a theme (exact text, then lemma key, then a new local id)."""
+        text = (theme or '').lower().strip()
+        if not text:
+            return None
+        if text in self._by_text:
+            return self._by_text[text]
+
+        key = lemma_key(text)
+        if not key:
+            return None
+        with self._lock:
+            canonical_id = self._by_key.get(key)
+            if canonical_id is None:
+                canonical_id = self._by_key[key] = self._next_local_id
+                self._next_local_id -= 1
+        return canonical_id
+
+    def resolve_all(self, themes: Iterable[str]) -> List[Optional[int]]:
+        return [self.resolve(theme) for theme in themes]
+
+
+def load_theme_mapping(supabase, page_size: int = 1000) -> Dict[str, int]:
+    """
+    Read the offline theme_canonical table as {theme text: canonical id}.
+    Returns an empty mapping when the table does not exist yet.
+    """
+    mapping = {}
+    offset = 0
+    try:
+        while True:
+            result = supabase.table('theme_canonical').select('theme_text, canonical_id')\
+                .order('theme_text').range(offset, offset + page_size - 1).execute()
+            page = result.data or []
+            mapping.update((row['theme_text'], row['canonical_id']) for row in page)
+            if len(page) < page_size:
+                return mapping
+            offset += page_size
+    except Exception as e:
+        print(f"⚠️  theme_canonical not available, using lemma keys only: {e}")
+        return {}
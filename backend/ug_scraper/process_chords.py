@@ -10,14 +10,13 @@ Takes a list of chords and the key, returns:
 - Roman numerals simplified
 """
 
-from .simplify_chord import simplify_chord
-from .transpose_to_c import transpose_to_c
-from .convert_to_roman import convert_to_roman
+import chord_algebra
 
 
 def process_chords(tonality, chords_original):
     """
     Process chords into all 6 versions for storage.
+    Each distinct (key, chord) pair is only computed once per process.
     
     Args:
         tonality: The original key (e.g., "G", "Am")
@@ -34,42 +33,4 @@ def process_chords(tonality, chords_original):
             'roman_simple': ["I", "V", "vi", "IV"]
         }
     """
-    
-    # Initialize all 6 lists
-    result = {
-        'original': [],
-        'original_simple': [],
-        'in_c': [],
-        'in_c_simple': [],
-        'roman': [],
-        'roman_simple': []
-    }
-    
-    # Process each chord
-    for chord in chords_original:
-        
-        # 1. Original (already have it)
-        result['original'].append(chord)
-        
-        # 2. Original simplified
-        simple = simplify_chord(chord)
-        result['original_simple'].append(simple)
-        
-        # 3. Transpose to C (full chord)
-        in_c = transpose_to_c(tonality, chord)
-        result['in_c'].append(in_c)
-        
-        # 4. Transpose to C (simplified) - more efficient!
-        in_c_simple = transpose_to_c(tonality, simple)
-        result['in_c_simple'].append(in_c_simple)
-        
-        # 5. Roman numeral (full)
-        roman = convert_to_roman(in_c)
-        result['roman'].append(roman)
-        
-        # 6. Roman numeral (simplified)
-        roman_simple = convert_to_roman(in_c_simple)
-        result['roman_simple'].append(roman_simple)
-    
-    return result
-
+    return chord_algebra.process_chords(tonality, chords_original)
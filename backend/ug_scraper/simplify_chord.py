@@ -3,6 +3,8 @@ SIMPLIFY CHORD: Strip embellishments from a chord
 Keeps only root note and basic quality (major, minor, diminished, augmented).
 """
 
+import chord_algebra
+
 
 def simplify_chord(chord):
     """
@@ -14,15 +16,4 @@ def simplify_chord(chord):
     Returns:
         Simplified chord (e.g., "C", "G", "A")
     """
-    import re
-    
-    # Extract root note and basic quality
-    match = re.match(r'^([A-G][#b]?)(m|dim|aug)?', chord)
-    
-    if match:
-        root = match.group(1)
-        quality = match.group(2) or ''  # m, dim, or aug
-        return root + quality
-    else:
-        return chord  # Return as-is if we can't parse it
-
+    return chord_algebra.simplify_chord(chord)
@@ -7,6 +7,8 @@ This function transposes the shapes up by the capo amount.
 Example: Capo 5, shape "Dm" → actual sound "Gm"
 """
 
+import chord_algebra
+
 
 def transpose_by_capo(chord, capo_fret):
     """
@@ -20,49 +22,7 @@ def transpose_by_capo(chord, capo_fret):
     Returns:
         Actual sounding chord (e.g., "Gm", "Fadd9", "G/B")
     """
-    if capo_fret == 0:
-        return chord  # No capo, return as-is
-    
-    # Check for slash chord (e.g., D/F#)
-    import re
-    if '/' in chord:
-        parts = chord.split('/')
-        if len(parts) == 2:
-            # Transpose both the chord and the bass note
-            transposed_chord = transpose_by_capo(parts[0], capo_fret)
-            transposed_bass = transpose_by_capo(parts[1], capo_fret)
-            return f"{transposed_chord}/{transposed_bass}"
-    
-    # Chromatic scale
-    notes = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    
-    # Also support flat notation
-    flats_to_sharps = {
-        'Db': 'C#', 'Eb': 'D#', 'Gb': 'F#', 'Ab': 'G#', 'Bb': 'A#'
-    }
-    
-    # Extract root note from chord
-    match = re.match(r'^([A-G][#b]?)', chord)
-    if not match:
-        return chord  # Can't parse, return as-is
-    
-    root = match.group(1)
-    suffix = chord[len(root):]  # Everything after root (m, 7, add9, etc.)
-    
-    # Convert flats to sharps for consistency
-    if root in flats_to_sharps:
-        root = flats_to_sharps[root]
-    
-    # Transpose up by capo amount
-    try:
-        root_index = notes.index(root)
-        new_index = (root_index + capo_fret) % 12
-        new_root = notes[new_index]
-        
-        return new_root + suffix
-    
-    except (ValueError, IndexError):
-        return chord  # If anything fails, return original
+    return chord_algebra.transpose_by_capo(chord, capo_fret)
 
 
 def transpose_chord_list(chords, capo_fret):
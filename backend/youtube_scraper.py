@@ -19,6 +19,9 @@ import scrapetube
 from anthropic import Anthropic
 from dotenv import load_dotenv
 from supabase import create_client
+from llm_metrics import create_message, transcribe_audio
+from model_router import model_router, parse_json_object, OutputValidationError
+from parallel_fetch import fetch_parallel
 
 load_dotenv()
 
@@ -56,6 +59,39 @@ class Demographics:
     confidence: str = "low"
 
 
+def validate_demographics(text: str) -> Dict[str, Any]:
+    """Demographics JSON with plausible ages, known genders and a confidence level."""
+    data = parse_json_object(text)
+    for key in ('poster_age', 'other_party_age'):
+        age = data.get(key)
+        if age is not None and not (isinstance(age, int) and 5 <= age <= 110):
+            raise OutputValidationError(f"implausible {key}: {age!r}")
+    for key in ('poster_gender', 'other_party_gender'):
+        if data.get(key) not in (None, 'M', 'F', 'Other'):
+            raise OutputValidationError(f"unknown {key}: {data.get(key)!r}")
+    if data.get('confidence', 'low') not in ('high', 'medium', 'low'):
+        raise OutputValidationError(f"unknown confidence: {data.get('confidence')!r}")
+    return data
+
+
+def lenient_demographics(text: str) -> Dict[str, Any]:
+    """Demographics JSON with implausible or unknown values replaced by null / 'low'."""
+    data = parse_json_object(text)
+    for key in ('poster_age', 'other_party_age'):
+        age = data.get(key)
+        if not (isinstance(age, int) and 5 <= age <= 110):
+            data[key] = None
+    for key in ('poster_gender', 'other_party_gender'):
+        if data.get(key) not in ('M', 'F', 'Other'):
+            data[key] = None
+    if data.get('confidence') not in ('high', 'medium', 'low'):
+        data['confidence'] = 'low'
+    return data
+
+
+validate_demographics.lenient = lenient_demographics
+
+
 @dataclass
 class TagResult:
     """Claude-generated tags."""
@@ -233,7 +269,9 @@ class YouTubeScraper:
             # Transcribe with OpenAI Whisper
             try:
                 with open(audio_path, 'rb') as audio_file:
-                    transcript_response = openai_client.audio.transcriptions.create(
+                    transcript_response = transcribe_audio(
+                        openai_client,
+                        task="real_talk.whisper",
                         model="whisper-1",
                         file=audio_file,
                         response_format="text"
@@ -300,18 +338,15 @@ Return JSON:
 If nothing found, return all null with confidence "low"."""
 
         try:
-            response = anthropic.messages.create(
-                model="claude-sonnet-4-5-20250929",
+            data = model_router.create(
+                anthropic,
+                task="real_talk.demographics",
+                validate=validate_demographics,
                 max_tokens=300,
                 messages=[{"role": "user", "content": prompt}]
             )
             
-            text = response.content[0].text.strip()
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
-            
-            if json_match:
-                import json
-                data = json.loads(json_match.group())
+            if data:
                 demographics.poster_age = data.get('poster_age')
                 demographics.poster_gender = data.get('poster_gender')
                 demographics.other_party_age = data.get('other_party_age')
@@ -326,11 +361,13 @@ If nothing found, return all null with confidence "low"."""
     def get_available_tags(self) -> Tuple[List[str], List[str]]:
         """Get current situation and emotion tags from database."""
         try:
-            situation_result = supabase.table('real_talk_tags').select('tag_name').eq('tag_type', 'situation').execute()
-            emotion_result = supabase.table('real_talk_tags').select('tag_name').eq('tag_type', 'emotion').execute()
+            def tag_names(tag_type):
+                return lambda: supabase.table('real_talk_tags').select('tag_name').eq('tag_type', tag_type).execute()
+            
+            results = fetch_parallel({'situation': tag_names('situation'), 'emotion': tag_names('emotion')})
             
-            situations = [r['tag_name'] for r in situation_result.data]
-            emotions = [r['tag_name'] for r in emotion_result.data]
+            situations = [r['tag_name'] for r in results['situation'].data]
+            emotions = [r['tag_name'] for r in results['emotion'].data]
             
             return situations, emotions
         except Exception as e:
@@ -400,7 +437,9 @@ Return JSON ONLY:
 If no quotes are interesting enough, return empty arrays."""
 
         try:
-            response = anthropic.messages.create(
+            response = create_message(
+                anthropic,
+                task="real_talk.extract_quotes",
                 model="claude-sonnet-4-5-20250929",
                 max_tokens=2000,  # More tokens for multiple quotes
                 messages=[{"role": "user", "content": prompt}]
@@ -0,0 +1,19 @@
+-- Add inferred key columns to songs table
+-- Run this in your Supabase SQL Editor, then run backend/key_inference.py
+
+-- Key estimated from the song's chords (UG tonality format, e.g. 'G', 'F#m')
+ALTER TABLE songs 
+ADD COLUMN IF NOT EXISTS musical_key_inferred TEXT;
+
+-- Confidence of the estimate (0-1)
+ALTER TABLE songs 
+ADD COLUMN IF NOT EXISTS musical_key_confidence REAL;
+
+-- How musical_key relates to the estimate:
+-- 'inferred' (filled from chords), 'inferred_low_confidence' (left empty),
+-- 'conflict' (stored key disagrees with a confident estimate)
+ALTER TABLE songs 
+ADD COLUMN IF NOT EXISTS musical_key_source TEXT;
+
+-- Add index for reviewing flagged songs
+CREATE INDEX IF NOT EXISTS idx_songs_musical_key_source ON songs(musical_key_source);
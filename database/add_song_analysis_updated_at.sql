@@ -0,0 +1,23 @@
+-- Add updated_at to song_analysis so in-place re-analysis is detectable
+-- Run this in your Supabase SQL Editor
+
+-- Set on insert and on every update (the API server's corpus cache
+-- reloads when the newest value changes)
+ALTER TABLE song_analysis 
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+CREATE OR REPLACE FUNCTION set_song_analysis_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = NOW();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS song_analysis_updated_at ON song_analysis;
+CREATE TRIGGER song_analysis_updated_at
+BEFORE UPDATE ON song_analysis
+FOR EACH ROW EXECUTE FUNCTION set_song_analysis_updated_at();
+
+-- Add index for the newest-update lookup
+CREATE INDEX IF NOT EXISTS idx_song_analysis_updated_at ON song_analysis(updated_at);
@@ -0,0 +1,12 @@
+-- Canonical theme clusters for concept matching
+-- Built offline by backend/build_theme_clusters.py; read by the song corpus cache
+-- Every distinct song_analysis theme (lowercased) maps to one canonical id
+
+CREATE TABLE IF NOT EXISTS theme_canonical (
+  theme_text TEXT PRIMARY KEY,          -- Lowercased theme as stored in song_analysis.themes
+  canonical_id INTEGER NOT NULL,        -- Cluster id shared by synonymous themes
+  canonical_label TEXT NOT NULL,        -- Most common theme text in the cluster
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_theme_canonical_id ON theme_canonical(canonical_id);
@@ -78,6 +78,7 @@ function App() {
   })
   const [matchedSongs, setMatchedSongs] = useState<Array<{id: string, title: string, artist: string, rank: number | null, themes: string[], matchScore?: number, imagery?: string[], tone?: string, universal_scenarios?: string[]}>>([])
   const [extractedThemes, setExtractedThemes] = useState<string[]>([])
+  const [conceptSessionId, setConceptSessionId] = useState<string | undefined>(undefined)
   const [viewingSongDetails, setViewingSongDetails] = useState<string | null>(null)
   const [songSearchQuery, setSongSearchQuery] = useState('')
   const [songSearchResults, setSongSearchResults] = useState<Array<{id: string, title: string, artist: string}>>([])
@@ -97,6 +98,7 @@ function App() {
   const [wordsToAvoid, setWordsToAvoid] = useState('')
   const [nextLineMatchedSongs, setNextLineMatchedSongs] = useState<Array<{id: string, title: string, artist: string, rank: number | null, themes?: string[], matchScore?: number, imagery?: string[], tone?: string, universal_scenarios?: string[]}>>([])
   const [nextLineExtractedThemes, setNextLineExtractedThemes] = useState<string[]>([])
+  const [nextLineSessionId, setNextLineSessionId] = useState<string | undefined>(undefined)
   const [viewingNextLineSongDetails, setViewingNextLineSongDetails] = useState<string | null>(null)
   const [showingNextLineSongs, setShowingNextLineSongs] = useState(false)
   const [nextLineSuggestions, setNextLineSuggestions] = useState<Array<{line: string, syllables: number, diff: number}>>([])
@@ -244,7 +246,7 @@ function App() {
   const [melodySongs, setMelodySongs] = useState<any[]>([])
   const [melodySelectedSongs, setMelodySelectedSongs] = useState<Set<number>>(new Set())
   const [melodySearchCriteria, setMelodySearchCriteria] = useState<any>(null)
-  const [melodyExcludedSongs, setMelodyExcludedSongs] = useState<string[]>([])
+  const [melodySessionId, setMelodySessionId] = useState<string | null>(null)
   const [melodyTidalAuth, setMelodyTidalAuth] = useState(false)
   const [melodyCreatingPlaylist, setMelodyCreatingPlaylist] = useState(false)
   const [melodyPlaylistName, setMelodyPlaylistName] = useState('')
@@ -512,7 +514,8 @@ function App() {
             genres: conceptFilters.genres.length > 0 ? conceptFilters.genres : undefined,
             artists: conceptFilters.artists.length > 0 ? conceptFilters.artists : undefined
           },
-          matchedSongs.length > 0 ? matchedSongs.map(s => s.id) : undefined
+          matchedSongs.length > 0 ? matchedSongs.map(s => s.id) : undefined,
+          conceptSessionId
         )
         
         if (customConcept) {
@@ -537,6 +540,10 @@ function App() {
           if (customConcept._meta && customConcept._meta.example_songs) {
             setReferenceSongs(customConcept._meta.example_songs)
           }
+          // Server-side session with the themes, songs and concept
+          if (customConcept._meta?.session_id) {
+            setConceptSessionId(customConcept._meta.session_id)
+          }
         } else {
           alert('Failed to generate concept. Please try again.')
         }
@@ -549,6 +556,32 @@ function App() {
     }
   }
 
+  // Start theme extraction in the background once the user pauses typing,
+  // so Find Matching Songs / Generate usually find it already done
+  useEffect(() => {
+    if (currentPage !== 'concepts' || conceptMode !== 'custom' || !customIdea.trim()) return
+
+    const timer = setTimeout(() => {
+      fetch(`${API_URL}/api/concept/prefetch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          user_idea: customIdea,
+          num_songs: conceptFilters.numSongs,
+          filters: {
+            years: conceptFilters.years.length > 0 ? conceptFilters.years : undefined,
+            minRank: conceptFilters.minRank,
+            maxRank: conceptFilters.maxRank,
+            genres: conceptFilters.genres.length > 0 ? conceptFilters.genres : undefined,
+            artists: conceptFilters.artists.length > 0 ? conceptFilters.artists : undefined
+          }
+        })
+      }).catch(err => console.error('Concept prefetch failed:', err))
+    }, 1200)
+
+    return () => clearTimeout(timer)
+  }, [customIdea, conceptFilters, conceptMode, currentPage])
+
   // Calculate estimated time for concept generation
   const getEstimatedTime = () => {
     if (conceptMode === 'random') return 1
@@ -572,6 +605,7 @@ function App() {
         body: JSON.stringify({
           user_idea: customIdea,
           num_songs: conceptFilters.numSongs,
+          session_id: conceptSessionId,
           filters: {
             years: conceptFilters.years.length > 0 ? conceptFilters.years : undefined,
             minRank: conceptFilters.minRank,
@@ -587,6 +621,7 @@ function App() {
         console.log('Concepts - Received data:', data)
         setMatchedSongs(data.songs || [])
         setExtractedThemes(data.extracted_themes || [])
+        setConceptSessionId(data.session_id)
         setShowingSongMatches(true)
       } else {
         const errorText = await response.text()
@@ -694,6 +729,7 @@ function App() {
         body: JSON.stringify({
           user_idea: combinedContext,
           num_songs: nextLineFilters.numSongs,
+          session_id: nextLineSessionId,
           filters: {
             years: nextLineFilters.years.length > 0 ? nextLineFilters.years : undefined,
             minRank: nextLineFilters.minRank,
@@ -709,6 +745,7 @@ function App() {
         console.log('Next Line - Received data:', data)
         setNextLineMatchedSongs(data.songs || [])
         setNextLineExtractedThemes(data.extracted_themes || [])
+        setNextLineSessionId(data.session_id)
         setShowingNextLineSongs(true)
       } else {
         const errorText = await response.text()
@@ -743,6 +780,7 @@ function App() {
           rhyme_position: rhymePosition,
           rhyme_type: rhymeTypeFilter !== 'any' ? rhymeTypeFilter : undefined,
           reference_song_ids: nextLineMatchedSongs.map(s => s.id),
+          session_id: nextLineSessionId,
           line_meaning: lineMeaning.trim() || undefined,
           specific_rhyme_word: specificRhymeWord.trim() || undefined,
           partial_line: partialLine.trim() || undefined,
@@ -1414,7 +1452,8 @@ function App() {
             tone: concept.tone
           },
           reference_songs: referenceSongs,
-          existing_titles: titles
+          existing_titles: titles,
+          session_id: conceptSessionId
         })
       })
 
@@ -1792,7 +1831,7 @@ function App() {
     setMelodySearching(true)
     setMelodySongs([])
     setMelodySelectedSongs(new Set())
-    setMelodyExcludedSongs([])
+    setMelodySessionId(null)
     
     try {
       const body: any = {
@@ -1820,6 +1859,7 @@ function App() {
         const data = await res.json()
         setMelodySongs(data.songs || [])
         setMelodySearchCriteria(data.search_criteria)
+        setMelodySessionId(data.session_id || null)
         // Select all songs by default
         const allIndices = new Set(data.songs.map((_: any, i: number) => i))
         setMelodySelectedSongs(allIndices)
@@ -1850,9 +1890,11 @@ function App() {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
-          original_criteria: melodySearchCriteria,
+          session_id: melodySessionId,
           liked_songs: likedSongs,
-          excluded_songs: melodyExcludedSongs
+          // Fallbacks if the server session has expired
+          original_criteria: melodySearchCriteria,
+          excluded_songs: melodySongs.map(s => `${s.artist_name} - ${s.song_name}`)
         })
       })
 
@@ -1867,11 +1909,8 @@ function App() {
           newSongs.forEach((_: any, i: number) => newSet.add(prev.size + i))
           return newSet
         })
-        // Add current song names to excluded list
-        const currentSongNames = [...melodySongs, ...newSongs].map(
-          (s: any) => `${s.artist_name} - ${s.song_name}`
-        )
-        setMelodyExcludedSongs(currentSongNames)
+        // The server tracks songs already shown; keep its (possibly renewed) session
+        setMelodySessionId(data.session_id || null)
       } else {
         const error = await res.json()
         alert(error.error || 'Failed to find more songs')
@@ -1885,10 +1924,7 @@ function App() {
   }
 
   const handleMelodyRemoveSong = (index: number) => {
-    const song = melodySongs[index]
-    // Add to excluded list
-    setMelodyExcludedSongs(prev => [...prev, `${song.artist_name} - ${song.song_name}`])
-    // Remove from songs list
+    // Remove from songs list (the server session already counts it as seen)
     setMelodySongs(prev => prev.filter((_, i) => i !== index))
     // Update selected indices
     setMelodySelectedSongs(prev => {
@@ -3906,33 +3942,43 @@ function App() {
                           setRtAiSearching(true)
                           setRtSearchPerformed(true)
                           try {
-                            // Get entries with optional filters, limit by rtAiLimit
-                            const params = new URLSearchParams()
-                            if (rtFilters.situations.length) params.append('situations', rtFilters.situations.join(','))
-                            if (rtFilters.emotions.length) params.append('emotions', rtFilters.emotions.join(','))
-                            if (rtFilters.ageMin) params.append('age_min', rtFilters.ageMin.toString())
-                            if (rtFilters.ageMax) params.append('age_max', rtFilters.ageMax.toString())
-                            if (rtFilters.gender) params.append('gender', rtFilters.gender)
-                            if (rtFilters.yearMin) params.append('year_min', rtFilters.yearMin.toString())
-                            if (rtFilters.yearMax) params.append('year_max', rtFilters.yearMax.toString())
-                            // Use the selected limit (50, 100, or 200) - searches ALL entries if no filters
-                            params.append('limit', rtAiLimit.toString())
-                            
-                            const entriesRes = await fetch(`${API_URL}/api/real-talk/entries?${params}`)
-                            const entriesData = await entriesRes.json()
-                            
-                            // Then run AI search
+                            // Server ranks every entry matching the filters, Claude reranks the top rtAiLimit
                             const aiRes = await fetch(`${API_URL}/api/real-talk/intelligent-search`, {
                               method: 'POST',
                               headers: { 'Content-Type': 'application/json' },
                               body: JSON.stringify({
                                 query: rtAiQuery,
-                                entries: entriesData.entries || [],
-                                limit: rtAiLimit
+                                filters: {
+                                  situations: rtFilters.situations,
+                                  emotions: rtFilters.emotions,
+                                  age_min: rtFilters.ageMin,
+                                  age_max: rtFilters.ageMax,
+                                  gender: rtFilters.gender,
+                                  year_min: rtFilters.yearMin,
+                                  year_max: rtFilters.yearMax
+                                },
+                                limit: rtAiLimit,
+                                stream: true
                               })
                             })
-                            const aiData = await aiRes.json()
-                            setRtEntries(aiData.results || [])
+                            
+                            // Stream merged rankings as each chunk of candidates is scored
+                            const reader = aiRes.body?.getReader()
+                            const decoder = new TextDecoder()
+                            let buffer = ''
+                            while (reader) {
+                              const { done, value } = await reader.read()
+                              if (done) break
+                              buffer += decoder.decode(value, { stream: true })
+                              const events = buffer.split('\n\n')
+                              buffer = events.pop() || ''
+                              for (const event of events) {
+                                if (!event.startsWith('data: ')) continue
+                                const update = JSON.parse(event.slice(6))
+                                if (update.error) throw new Error(update.error)
+                                setRtEntries(update.results || [])
+                              }
+                            }
                           } catch (err) {
                             console.error('AI search failed:', err)
                           } finally {
@@ -4560,6 +4606,12 @@ function App() {
                           <span className="label">Chords:</span>
                           <span className="value">{song.chorus_chords}</span>
                         </div>
+                        {song.verified && song.section && (
+                          <div className="melody-detail">
+                            <span className="label">Section:</span>
+                            <span className="value">{song.section} (verified)</span>
+                          </div>
+                        )}
                         <div className="melody-detail">
                           <span className="label">BPM:</span>
                           <span className="value">{song.bpm}</span>
@@ -261,6 +261,13 @@ export interface Concept {
   alternative_titles: string[]
   thematic_vocabulary: string[]
   section_breakdown: string[]
+  _meta?: {
+    user_idea: string
+    extracted_themes: string[]
+    num_examples: number
+    example_songs: string[]
+    session_id?: string
+  }
 }
 
 export interface ConceptWithSong extends Concept {
@@ -311,7 +318,8 @@ export async function generateCustomConcept(
     genres?: string[]
     artists?: string[]
   } = {},
-  manualSongIds?: string[]
+  manualSongIds?: string[],
+  sessionId?: string
 ): Promise<Concept | null> {
   try {
     const response = await fetch(`${API_URL}/api/generate-custom-concept`, {
@@ -323,7 +331,8 @@ export async function generateCustomConcept(
         user_idea: userIdea,
         num_songs: numSongs,
         filters,
-        manual_song_ids: manualSongIds
+        manual_song_ids: manualSongIds,
+        session_id: sessionId
       })
     })
     